@@ -5,3 +5,6 @@ class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
 
+    def ready(self):
+        from .catalog_helpers import load_service_images
+        load_service_images()
@@ -1,19 +1,45 @@
 """
 Custom authentication helpers for Customer and Admin authentication
 """
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.shortcuts import redirect
 from functools import wraps
 from .models import Customer
 
 
+CUSTOMER_SNAPSHOT_KEY = 'customer_snapshot'
+CREDENTIAL_VERSION_KEY = 'glamora:credential_version:{}'
+
+# Marks an identity that has not been looked up yet on this request
+_UNRESOLVED = object()
+
+
 def get_customer_from_session(request):
-    """Get customer from session"""
+    """Get customer from session (queried at most once per request)"""
+    customer = getattr(request, '_cached_customer', _UNRESOLVED)
+    if customer is _UNRESOLVED:
+        customer = _load_customer_from_session(request)
+        request._cached_customer = customer
+    return customer
+
+
+def _load_customer_from_session(request):
     customer_id = request.session.get('customer_id')
     if customer_id:
+        if settings.IDENTITY_SNAPSHOT_ENABLED:
+            customer = _customer_from_snapshot(request, customer_id)
+            if customer is not None:
+                return customer
         try:
             from django.db import connection
             db_executor = connection.cursor()
-            db_executor.execute("SELECT Customer_ID, First_Name, Last_Name, Mobile_No, Password, Address FROM CUSTOMER WHERE Customer_ID = %s", [customer_id])
+            if settings.IDENTITY_SNAPSHOT_ENABLED:
+                db_executor.execute("SELECT Customer_ID, First_Name, Last_Name, Mobile_No, Address, Credential_Version FROM CUSTOMER WHERE Customer_ID = %s", [customer_id])
+            else:
+                db_executor.execute("SELECT Customer_ID, First_Name, Last_Name, Mobile_No, Address FROM CUSTOMER WHERE Customer_ID = %s", [customer_id])
             row = db_executor.fetchone()
             
             if row:
@@ -22,8 +48,10 @@ def get_customer_from_session(request):
                 customer.First_Name = row[1]
                 customer.Last_Name = row[2]
                 customer.Mobile_No = row[3]
-                customer.Password = row[4]
-                customer.Address = row[5] if len(row) > 5 else None
+                customer.Address = row[4]
+                if settings.IDENTITY_SNAPSHOT_ENABLED:
+                    cache.set(CREDENTIAL_VERSION_KEY.format(customer.Customer_ID), row[5], timeout=None)
+                    _store_customer_snapshot(request, customer, row[5])
                 return customer
         except Exception as e:
             print(f"Error getting customer from session: {e}")
@@ -31,16 +59,81 @@ def get_customer_from_session(request):
     return None
 
 
+def _customer_from_snapshot(request, customer_id):
+    """Build the customer from the session snapshot if it is still current"""
+    snapshot = request.session.get(CUSTOMER_SNAPSHOT_KEY)
+    if not snapshot or snapshot.get('id') != customer_id:
+        return None
+    if time.time() - snapshot.get('checked_at', 0) > settings.IDENTITY_RECHECK_SECONDS:
+        return None
+    if cache.get(CREDENTIAL_VERSION_KEY.format(customer_id)) != snapshot.get('version'):
+        return None
+
+    customer = Customer()
+    customer.Customer_ID = snapshot['id']
+    customer.First_Name = snapshot['first_name']
+    customer.Last_Name = snapshot['last_name']
+    customer.Mobile_No = snapshot['mobile']
+    customer.Address = snapshot['address']
+    return customer
+
+
+def _store_customer_snapshot(request, customer, version):
+    request.session[CUSTOMER_SNAPSHOT_KEY] = {
+        'id': customer.Customer_ID,
+        'first_name': customer.First_Name,
+        'last_name': customer.Last_Name,
+        'mobile': customer.Mobile_No,
+        'address': customer.Address,
+        'version': version,
+        'checked_at': time.time(),
+    }
+
+
+def update_customer_snapshot(request, customer):
+    """Carry the customer's own profile edits (e.g. address) into their snapshot"""
+    snapshot = request.session.get(CUSTOMER_SNAPSHOT_KEY)
+    if snapshot and snapshot.get('id') == customer.Customer_ID:
+        snapshot.update({
+            'first_name': customer.First_Name,
+            'last_name': customer.Last_Name,
+            'mobile': customer.Mobile_No,
+            'address': customer.Address,
+        })
+        request.session.modified = True
+
+
+def bump_credential_version(db_executor, customer_id):
+    """
+    Mark every session snapshot of this customer as stale. Call from the same
+    transaction as a password/profile change or before deleting the customer.
+    """
+    if not settings.IDENTITY_SNAPSHOT_ENABLED:
+        return
+    db_executor.execute("UPDATE CUSTOMER SET Credential_Version = Credential_Version + 1 WHERE Customer_ID = %s", [customer_id])
+    transaction.on_commit(lambda: cache.delete(CREDENTIAL_VERSION_KEY.format(customer_id)))
+
+
 def customer_login(request, customer):
     """Login customer by storing in session"""
     request.session['customer_id'] = customer.Customer_ID
     request.session['customer_mobile'] = customer.Mobile_No
     request.session['customer_name'] = f"{customer.First_Name} {customer.Last_Name}"
+    # The first authenticated request verifies and stores a fresh snapshot
+    request.session.pop(CUSTOMER_SNAPSHOT_KEY, None)
+    request._cached_customer = customer
 
 
 def customer_logout(request):
     """Logout customer by clearing session"""
     request.session.flush()
+    clear_identity_cache(request)
+
+
+def clear_identity_cache(request):
+    """Forget identities resolved earlier in this request"""
+    request._cached_customer = _UNRESOLVED
+    request._cached_admin = _UNRESOLVED
 
 
 def customer_required(view_func):
@@ -60,7 +153,15 @@ def customer_required(view_func):
 
 # Admin authentication helpers
 def get_admin_from_session(request):
-    """Get admin from session"""
+    """Get admin from session (queried at most once per request)"""
+    admin = getattr(request, '_cached_admin', _UNRESOLVED)
+    if admin is _UNRESOLVED:
+        admin = _load_admin_from_session(request)
+        request._cached_admin = admin
+    return admin
+
+
+def _load_admin_from_session(request):
     admin_id = request.session.get('admin_id')
     if admin_id:
         try:
@@ -70,29 +171,36 @@ def get_admin_from_session(request):
             row = db_executor.fetchone()
             
             if row:
-                admin = type('Admin', (), {})()
-                admin.Admin_ID = row[0]
-                admin.First_Name = row[1]
-                admin.Last_Name = row[2]
-                admin.Mobile_No = row[3]
-                admin.Role = row[4]
-                admin.Password = row[5]
-                return admin
+                return build_admin(*row)
         except Exception:
             return None
     return None
 
 
+def build_admin(admin_id, first_name, last_name, mobile_no, role, password=None):
+    """Admins have no model - build a plain attribute object"""
+    admin = type('Admin', (), {})()
+    admin.Admin_ID = admin_id
+    admin.First_Name = first_name
+    admin.Last_Name = last_name
+    admin.Mobile_No = mobile_no
+    admin.Role = role
+    admin.Password = password
+    return admin
+
+
 def admin_login(request, admin):
     """Login admin by storing in session"""
     request.session['admin_id'] = admin.Admin_ID
     request.session['admin_name'] = f"{admin.First_Name} {admin.Last_Name}"
     request.session['admin_role'] = admin.Role
+    request._cached_admin = admin
 
 
 def admin_logout(request):
     """Logout admin by clearing session"""
     request.session.flush()
+    clear_identity_cache(request)
 
 
 def admin_required(view_func):
@@ -109,3 +217,49 @@ def admin_required(view_func):
         return view_func(request, *args, **kwargs)
     return _wrapped_view
 
+
+
+# Mobile number identity lookups (USER_IDENTITY is kept in sync by triggers)
+def lookup_identity_by_mobile(mobile):
+    """
+    Resolve a mobile number to ('customer', Customer) or ('admin', Admin)
+    in one indexed round trip; returns (None, None) if it is not registered.
+    """
+    from django.db import connection
+    with connection.cursor() as db_executor:
+        db_executor.execute("""
+            SELECT i.User_Type, i.User_ID,
+                   COALESCE(c.First_Name, a.First_Name), COALESCE(c.Last_Name, a.Last_Name),
+                   i.Mobile_No, COALESCE(c.Password, a.Password),
+                   c.Address, a.Role
+            FROM USER_IDENTITY i
+            LEFT JOIN CUSTOMER c ON i.User_Type = 'customer' AND c.Customer_ID = i.User_ID
+            LEFT JOIN ADMIN a ON i.User_Type = 'admin' AND a.Admin_ID = i.User_ID
+            WHERE i.Mobile_No = %s
+        """, [mobile])
+        row = db_executor.fetchone()
+
+    if not row:
+        return None, None
+    user_type = row[0]
+    if user_type == 'customer':
+        customer = Customer()
+        customer.Customer_ID = row[1]
+        customer.First_Name = row[2]
+        customer.Last_Name = row[3]
+        customer.Mobile_No = row[4]
+        customer.Password = row[5]
+        customer.Address = row[6]
+        return user_type, customer
+    return user_type, build_admin(row[1], row[2], row[3], row[4], row[7], row[5])
+
+
+def is_mobile_registered(mobile, exclude_user_type=None, exclude_user_id=None):
+    """Check whether any customer or admin (other than the excluded one) owns this mobile number"""
+    from django.db import connection
+    with connection.cursor() as db_executor:
+        db_executor.execute("SELECT User_Type, User_ID FROM USER_IDENTITY WHERE Mobile_No = %s", [mobile])
+        row = db_executor.fetchone()
+    if not row:
+        return False
+    return not (row[0] == exclude_user_type and row[1] == exclude_user_id)
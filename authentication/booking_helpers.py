@@ -0,0 +1,820 @@
+"""
+Booking helpers - slot availability computed from employee working hours,
+service durations and booked appointments, employee assignment, slot claims
+and the booking commit pipeline
+"""
+import logging
+import math
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction, IntegrityError, OperationalError
+
+from .report_helpers import adjust_dashboard, record_revenue
+from .search_helpers import tokenize
+
+
+# Bookable start times run every SLOT_INTERVAL_MINUTES from opening until the last slot
+SALON_OPENING_MINUTES = 11 * 60
+SALON_LAST_SLOT_MINUTES = 16 * 60
+SLOT_INTERVAL_MINUTES = 30
+
+DEFAULT_SERVICE_DURATION_MINUTES = 30
+
+# Appointment statuses that keep an employee busy
+ACTIVE_APPOINTMENT_STATUSES = ('scheduled', 'confirmed', 'in_progress')
+
+# How long (seconds) loaded data is reused before re-reading it, which bounds
+# how stale another worker's view of bookings and staff can get
+SCHEDULE_CACHE_SECONDS = 30
+ROSTER_CACHE_SECONDS = 300
+
+# Skill keywords (from EMPLOYEE.Skills) that qualify an employee for a
+# service category. Categories not listed here (e.g. Deals) take anyone.
+CATEGORY_SKILLS = {
+    'Hair': ('hair', 'color', 'colour', 'styling', 'cut', 'haircut'),
+    'Waxing': ('waxing', 'wax', 'spa'),
+    'Threading': ('threading', 'eyebrow', 'eyebrows'),
+    'Facial': ('facial', 'facials', 'spa', 'skin', 'skincare'),
+    'Nails': ('nails', 'nail', 'manicure', 'pedicure'),
+}
+
+# Largest date range one availability lookup may cover
+AVAILABILITY_MAX_DAYS = 31
+
+# How many days ahead (from the first bookable day) a slot can be picked
+BOOKING_WINDOW_DAYS = 60
+
+# Online bookings are attributed to the salon's primary admin account
+ONLINE_BOOKING_ADMIN_ID = 1
+
+# Employees tried before a booking gives up on a slot taken concurrently
+CLAIM_MAX_ATTEMPTS = 3
+
+# How long (seconds) a slot picked on the booking page stays reserved while
+# the customer pays; every payment/address page view renews it
+SLOT_HOLD_SECONDS = 10 * 60
+
+# Booking commits kept for latency percentiles, and how often they are logged
+COMMIT_LATENCY_WINDOW = 1000
+COMMIT_LATENCY_LOG_EVERY = 100
+
+# Days a checkout token is kept to answer a replayed submission
+BOOKING_REQUEST_RETENTION_DAYS = 7
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_roster = None
+_schedules = {}
+
+
+class SlotConflictError(Exception):
+    """The requested slot was taken by a concurrent booking"""
+
+    # Position of the lost slot's item when committing a cart
+    item_index = None
+
+
+class DuplicateBookingError(Exception):
+    """The checkout token was already used by a committed booking"""
+
+
+def format_slot(minutes):
+    """Minutes since midnight to the booking page label, e.g. 690 -> '11:30 AM'"""
+    hour, minute = divmod(minutes, 60)
+    hour_12 = hour % 12 or 12
+    return f"{hour_12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+SLOT_MINUTES = tuple(range(SALON_OPENING_MINUTES, SALON_LAST_SLOT_MINUTES + 1, SLOT_INTERVAL_MINUTES))
+SLOT_TIMES = tuple(format_slot(minutes) for minutes in SLOT_MINUTES)
+
+
+def parse_slot(slot):
+    """Booking page label ('1:30 PM') to minutes since midnight, or None"""
+    try:
+        value = datetime.strptime((slot or '').strip(), '%I:%M %p')
+    except ValueError:
+        return None
+    return value.hour * 60 + value.minute
+
+
+def booking_window(first_day=None):
+    """(first, last) bookable dates; bookings open from tomorrow unless first_day is given"""
+    if first_day is None:
+        first_day = datetime.now().date() + timedelta(days=1)
+    return first_day, first_day + timedelta(days=BOOKING_WINDOW_DAYS - 1)
+
+
+def _to_minutes(value, default):
+    """TIME column value (time, timedelta or 'HH:MM[:SS]') to minutes since midnight"""
+    if value is None:
+        return default
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    if hasattr(value, 'hour'):
+        return value.hour * 60 + value.minute
+    try:
+        parts = str(value).split(':')
+        return int(parts[0]) * 60 + int(parts[1])
+    except (ValueError, IndexError):
+        return default
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value
+
+
+class Employee:
+    """Booking-relevant EMPLOYEE columns, with times in minutes since midnight"""
+
+    __slots__ = ('employee_id', 'skills', 'rating', 'busy', 'work_start', 'work_end')
+
+    def __init__(self, employee_id, skills, rating, busy, work_start, work_end):
+        self.employee_id = employee_id
+        self.skills = skills
+        self.rating = rating
+        self.busy = busy
+        self.work_start = work_start
+        self.work_end = work_end
+
+    def rank_key(self, load):
+        """Least loaded first, then 'available' before 'busy', then best rated"""
+        return (load, self.busy, -self.rating, self.employee_id)
+
+
+class EmployeeRoster:
+    """Every employee that can take bookings, with who qualifies for each category"""
+
+    def __init__(self, employees):
+        self.employees = {employee.employee_id: employee for employee in employees}
+        self.loaded_at = time.monotonic()
+        self._qualified = {}
+
+    def qualified(self, category):
+        """
+        Employee ids that can perform a category: those with a matching skill
+        plus generalists with no skills listed. Falls back to everyone when
+        nobody matches so a gap in the skills data never closes the salon.
+        """
+        ids = self._qualified.get(category)
+        if ids is None:
+            keywords = set(CATEGORY_SKILLS.get(category, ()))
+            ids = frozenset(
+                employee_id for employee_id, employee in self.employees.items()
+                if not keywords or not employee.skills or employee.skills & keywords
+            ) or frozenset(self.employees)
+            self._qualified[category] = ids
+        return ids
+
+
+class DaySchedule:
+    """
+    Booked intervals and appointment counts for one day, per employee.
+
+    Intervals are kept sorted by start time with a running maximum of their
+    end times, so an overlap check is a single bisect even when legacy rows
+    overlap each other. Employees are also kept in a list sorted by their
+    rank key (load first), so assignment walks it from the least-loaded end
+    and a new booking moves one entry instead of re-sorting the staff.
+    """
+
+    def __init__(self):
+        self.loaded_at = time.monotonic()
+        self._intervals = {}
+        self._max_ends = {}
+        self._loads = {}
+        self._ranking = None
+        self._ranked_roster = None
+
+    def add(self, employee_id, start, end, booked=True):
+        """Block an interval; booked=False (a slot hold) leaves the load count alone"""
+        intervals = self._intervals.setdefault(employee_id, [])
+        insort(intervals, (start, end))
+        max_ends = []
+        latest = 0
+        for _, interval_end in intervals:
+            latest = max(latest, interval_end)
+            max_ends.append(latest)
+        self._max_ends[employee_id] = max_ends
+        if not booked:
+            return
+
+        load = self._loads.get(employee_id, 0)
+        self._loads[employee_id] = load + 1
+        employee = self._ranked_roster.employees.get(employee_id) if self._ranking is not None else None
+        if employee is not None:
+            del self._ranking[bisect_left(self._ranking, employee.rank_key(load))]
+            insort(self._ranking, employee.rank_key(load + 1))
+
+    def is_free(self, employee_id, start, end):
+        intervals = self._intervals.get(employee_id)
+        if not intervals:
+            return True
+        # Intervals starting before `end` are the only candidates for overlap
+        index = bisect_left(intervals, (end,))
+        return index == 0 or self._max_ends[employee_id][index - 1] <= start
+
+    def ranking(self, roster):
+        """Rank keys of the roster's employees, least loaded first"""
+        if self._ranked_roster is not roster:
+            self._ranking = sorted(
+                employee.rank_key(self._loads.get(employee_id, 0))
+                for employee_id, employee in roster.employees.items()
+            )
+            self._ranked_roster = roster
+        return self._ranking
+
+
+def _load_roster():
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT Employee_ID, Skills, Rating, Availability, Work_Start, Work_End
+            FROM EMPLOYEE
+            WHERE Availability <> 'unavailable'
+            ORDER BY Employee_ID
+        """)
+        rows = cursor.fetchall()
+    last_end = SALON_LAST_SLOT_MINUTES + SLOT_INTERVAL_MINUTES
+    return EmployeeRoster(
+        Employee(
+            employee_id=row[0],
+            skills=frozenset(tokenize(row[1])),
+            rating=float(row[2] or 0),
+            busy=row[3] == 'busy',
+            work_start=_to_minutes(row[4], SALON_OPENING_MINUTES),
+            work_end=_to_minutes(row[5], last_end),
+        )
+        for row in rows
+    )
+
+
+def _load_schedules(first_day, last_day):
+    """Build a DaySchedule for every day in the range from its appointments and active holds"""
+    placeholders = ', '.join(['%s'] * len(ACTIVE_APPOINTMENT_STATUSES))
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT a.Date, a.Employee_ID, a.Time, sv.Duration_Minutes
+            FROM APPOINTMENT a
+            LEFT JOIN SALES s ON a.Sales_ID = s.Sales_ID
+            LEFT JOIN SERVICE sv ON s.Service_ID = sv.Service_ID
+            WHERE a.Date BETWEEN %s AND %s
+            AND a.Status IN ({placeholders})
+        """, [first_day, last_day, *ACTIVE_APPOINTMENT_STATUSES])
+        rows = cursor.fetchall()
+        cursor.execute("""
+            SELECT Date, Employee_ID, Time
+            FROM SLOT_CLAIM
+            WHERE Appointment_ID IS NULL AND Expires_At > NOW()
+            AND Date BETWEEN %s AND %s
+        """, [first_day, last_day])
+        hold_rows = cursor.fetchall()
+
+    schedules = {}
+    day = first_day
+    while day <= last_day:
+        schedules[day] = DaySchedule()
+        day += timedelta(days=1)
+    for row_date, employee_id, row_time, duration in rows:
+        row_date = _to_date(row_date)
+        start = _to_minutes(row_time, None)
+        if start is None or row_date not in schedules:
+            continue
+        schedules[row_date].add(employee_id, start, start + (duration or DEFAULT_SERVICE_DURATION_MINUTES))
+    # Each hold row covers one grid slot
+    for row_date, employee_id, row_time in hold_rows:
+        row_date = _to_date(row_date)
+        start = _to_minutes(row_time, None)
+        if start is None or row_date not in schedules:
+            continue
+        schedules[row_date].add(employee_id, start, start + SLOT_INTERVAL_MINUTES, booked=False)
+    return schedules
+
+
+def _get_roster():
+    global _roster
+    roster = _roster
+    if roster is None or time.monotonic() - roster.loaded_at > ROSTER_CACHE_SECONDS:
+        roster = _load_roster()
+        _roster = roster
+    return roster
+
+
+def _get_schedules(first_day, last_day):
+    """Day schedules for the range, loading only the missing or expired days"""
+    now = time.monotonic()
+    days = []
+    day = first_day
+    while day <= last_day:
+        days.append(day)
+        day += timedelta(days=1)
+
+    with _lock:
+        schedules = {day: _schedules.get(day) for day in days}
+    stale = [
+        day for day, schedule in schedules.items()
+        if schedule is None or now - schedule.loaded_at > SCHEDULE_CACHE_SECONDS
+    ]
+    if stale:
+        loaded = _load_schedules(min(stale), max(stale))
+        today = datetime.now().date()
+        with _lock:
+            for day in list(_schedules):
+                if day < today:
+                    del _schedules[day]
+            for day in stale:
+                _schedules[day] = schedules[day] = loaded[day]
+    return schedules
+
+
+def _service_needs(service):
+    """(duration, category) for a catalog service dict (defaults when unknown)"""
+    if not service:
+        return DEFAULT_SERVICE_DURATION_MINUTES, None
+    return service.get('duration') or DEFAULT_SERVICE_DURATION_MINUTES, service.get('category')
+
+
+def _can_take(employee, schedule, start, end):
+    return (
+        employee.work_start <= start and end <= employee.work_end
+        and schedule.is_free(employee.employee_id, start, end)
+    )
+
+
+def _has_free_employee(roster, schedule, start, duration, category):
+    end = start + duration
+    return any(
+        _can_take(roster.employees[employee_id], schedule, start, end)
+        for employee_id in roster.qualified(category)
+    )
+
+
+def get_availability(first_day, last_day, service=None):
+    """
+    Open slot labels per date ('YYYY-MM-DD' -> ['11:00 AM', ...]) for a
+    catalog service: a slot is open while at least one qualified, working
+    employee is free for the whole service duration.
+    """
+    duration, category = _service_needs(service)
+    if (last_day - first_day).days >= AVAILABILITY_MAX_DAYS:
+        last_day = first_day + timedelta(days=AVAILABILITY_MAX_DAYS - 1)
+    try:
+        roster = _get_roster()
+        schedules = _get_schedules(first_day, last_day)
+    except OperationalError:
+        return OrderedDict()
+
+    availability = OrderedDict()
+    for day, schedule in sorted(schedules.items()):
+        availability[day.strftime('%Y-%m-%d')] = [
+            label for minutes, label in zip(SLOT_MINUTES, SLOT_TIMES)
+            if _has_free_employee(roster, schedule, minutes, duration, category)
+        ]
+    return availability
+
+
+def is_slot_available(day, slot, service=None):
+    """Whether a qualified employee is free to take the slot ('1:30 PM') on the given date"""
+    start = parse_slot(slot)
+    if start not in SLOT_MINUTES:
+        return False
+    duration, category = _service_needs(service)
+    try:
+        roster = _get_roster()
+        schedule = _get_schedules(day, day)[day]
+    except OperationalError:
+        return False
+    return _has_free_employee(roster, schedule, start, duration, category)
+
+
+def assign_employee(day, slot, service=None, exclude=()):
+    """
+    Pick the employee for a new booking: the least-loaded qualified employee
+    (fewest appointments that day, then 'available' over 'busy', then best
+    rated) who works those hours and is free. Returns None when nobody is.
+    """
+    start = parse_slot(slot)
+    if start is None:
+        return None
+    duration, category = _service_needs(service)
+    end = start + duration
+    roster = _get_roster()
+    schedule = _get_schedules(day, day)[day]
+    qualified = roster.qualified(category)
+    with _lock:
+        for rank_key in schedule.ranking(roster):
+            employee_id = rank_key[-1]
+            if employee_id in exclude:
+                continue
+            if employee_id in qualified and _can_take(roster.employees[employee_id], schedule, start, end):
+                return employee_id
+    return None
+
+
+def _claim_rows(employee_id, day, start, duration):
+    """One SLOT_CLAIM key per grid slot the service occupies"""
+    return [
+        (employee_id, day, '%02d:%02d:00' % divmod(minutes, 60))
+        for minutes in range(start, start + duration, SLOT_INTERVAL_MINUTES)
+    ]
+
+
+def _time_placeholders(rows):
+    return ', '.join(['%s'] * len(rows))
+
+
+def _insert_claim(cursor, rows, customer_id, hold_seconds=None):
+    """
+    Insert one employee's claim rows in a savepoint, taking over expired holds
+    on the same keys. Returns False when the slot is already claimed.
+    """
+    employee_id, day = rows[0][0], rows[0][1]
+    times = [row[2] for row in rows]
+    expires_sql = 'DATE_ADD(NOW(), INTERVAL %s SECOND)' if hold_seconds else 'NULL'
+    expires_params = [hold_seconds] if hold_seconds else []
+    try:
+        with transaction.atomic():
+            cursor.execute(f"""
+                DELETE FROM SLOT_CLAIM
+                WHERE Employee_ID = %s AND Date = %s AND Time IN ({_time_placeholders(rows)})
+                AND Appointment_ID IS NULL AND Expires_At < NOW()
+            """, [employee_id, day, *times])
+            cursor.executemany(f"""
+                INSERT INTO SLOT_CLAIM (Employee_ID, Date, Time, Customer_ID, Expires_At)
+                VALUES (%s, %s, %s, %s, {expires_sql})
+            """, [(*row, customer_id, *expires_params) for row in rows])
+        return True
+    except IntegrityError:
+        return False
+
+
+def _claim(cursor, day, slot, service, customer_id, hold_seconds=None):
+    start = parse_slot(slot)
+    if day is None or start not in SLOT_MINUTES:
+        raise SlotConflictError(slot)
+    duration, _ = _service_needs(service)
+    tried = set()
+    for _ in range(CLAIM_MAX_ATTEMPTS):
+        employee_id = assign_employee(day, slot, service, exclude=tried)
+        if employee_id is None:
+            break
+        if _insert_claim(cursor, _claim_rows(employee_id, day, start, duration), customer_id, hold_seconds):
+            return employee_id
+        tried.add(employee_id)
+        # Another worker booked this employee - our copy of the day is stale
+        invalidate_availability(day)
+    raise SlotConflictError(slot)
+
+
+def claim_slot(cursor, day, slot, service, customer_id, held_employee_id=None):
+    """
+    Reserve the slot inside the caller's transaction and return the employee
+    it was reserved for.
+
+    SLOT_CLAIM's (Employee_ID, Date, Time) primary key is the arbiter: two
+    bookings racing for the same employee and time cannot both insert, so no
+    table lock is needed. A duplicate key only rolls back its own savepoint
+    and the next least-loaded employee is tried. Raises SlotConflictError
+    when nobody is left.
+
+    If the customer holds the slot (see hold_slot) the hold is made permanent
+    instead; a hold that expired and was taken over falls back to a new claim.
+    """
+    if held_employee_id is not None and parse_slot(slot) in SLOT_MINUTES:
+        duration, _ = _service_needs(service)
+        rows = _claim_rows(held_employee_id, day, parse_slot(slot), duration)
+        cursor.execute(f"""
+            UPDATE SLOT_CLAIM
+            SET Expires_At = NULL
+            WHERE Employee_ID = %s AND Date = %s AND Time IN ({_time_placeholders(rows)})
+            AND Customer_ID = %s AND Appointment_ID IS NULL
+        """, [held_employee_id, day, *(row[2] for row in rows), customer_id])
+        if cursor.rowcount == len(rows):
+            return held_employee_id
+        release_slot_hold(cursor, customer_id, held_employee_id, day, slot, service)
+    return _claim(cursor, day, slot, service, customer_id)
+
+
+def hold_slot(cursor, day, slot, service, customer_id, keep_holds=False):
+    """
+    Reserve the slot for SLOT_HOLD_SECONDS while the customer pays, replacing
+    any hold they already have (or adding to them with keep_holds, for a cart
+    of several services). Returns the employee held for; raises
+    SlotConflictError like claim_slot.
+    """
+    if not keep_holds and release_slot_holds(cursor, customer_id):
+        # The cached schedules may still show the hold being replaced
+        invalidate_availability()
+    employee_id = _claim(cursor, day, slot, service, customer_id, hold_seconds=SLOT_HOLD_SECONDS)
+    transaction.on_commit(lambda: record_hold(day, employee_id, slot, service))
+    return employee_id
+
+
+def renew_slot_holds(customer_id):
+    """Push back the expiry of the customer's holds; returns how many were renewed"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            UPDATE SLOT_CLAIM
+            SET Expires_At = DATE_ADD(NOW(), INTERVAL %s SECOND)
+            WHERE Customer_ID = %s AND Appointment_ID IS NULL AND Expires_At IS NOT NULL
+        """, [SLOT_HOLD_SECONDS, customer_id])
+        return cursor.rowcount
+
+
+def release_slot_holds(cursor, customer_id):
+    """Drop the customer's unconverted holds; returns how many rows were removed"""
+    cursor.execute(
+        "DELETE FROM SLOT_CLAIM WHERE Customer_ID = %s AND Appointment_ID IS NULL",
+        [customer_id]
+    )
+    return cursor.rowcount
+
+
+def release_slot_hold(cursor, customer_id, employee_id, day, slot, service=None):
+    """Drop the customer's unconverted hold on one slot; returns how many rows were removed"""
+    start = parse_slot(slot)
+    if employee_id is None or start not in SLOT_MINUTES:
+        return 0
+    duration, _ = _service_needs(service)
+    rows = _claim_rows(employee_id, day, start, duration)
+    cursor.execute(f"""
+        DELETE FROM SLOT_CLAIM
+        WHERE Employee_ID = %s AND Date = %s AND Time IN ({_time_placeholders(rows)})
+        AND Customer_ID = %s AND Appointment_ID IS NULL
+    """, [employee_id, day, *(row[2] for row in rows), customer_id])
+    return cursor.rowcount
+
+
+def sweep_expired_holds(batch_size=1000):
+    """Delete expired holds in batches (run periodically); returns the number removed"""
+    removed = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM SLOT_CLAIM
+                WHERE Appointment_ID IS NULL AND Expires_At < NOW()
+                LIMIT %s
+            """, [batch_size])
+            deleted = cursor.rowcount
+        removed += deleted
+        if deleted < batch_size:
+            return removed
+
+
+def sweep_booking_requests(max_age_days=BOOKING_REQUEST_RETENTION_DAYS, batch_size=1000):
+    """Delete checkout tokens older than max_age_days in batches; returns the number removed"""
+    removed = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM BOOKING_REQUEST
+                WHERE created_at < DATE_SUB(NOW(), INTERVAL %s DAY)
+                LIMIT %s
+            """, [max_age_days, batch_size])
+            deleted = cursor.rowcount
+        removed += deleted
+        if deleted < batch_size:
+            return removed
+
+
+def attach_slot_claim(cursor, employee_id, day, slot, service, appointment_id):
+    """Link claimed rows to the appointment so they are released with it (ON DELETE CASCADE)"""
+    duration, _ = _service_needs(service)
+    rows = _claim_rows(employee_id, day, parse_slot(slot), duration)
+    placeholders = ', '.join(['%s'] * len(rows))
+    cursor.execute(f"""
+        UPDATE SLOT_CLAIM
+        SET Appointment_ID = %s
+        WHERE Employee_ID = %s AND Date = %s AND Time IN ({placeholders})
+    """, [appointment_id, employee_id, day, *(row[2] for row in rows)])
+
+
+def release_slot_claims(cursor, appointment_id):
+    """Free every slot held by an appointment (e.g. before it is rescheduled)"""
+    cursor.execute("DELETE FROM SLOT_CLAIM WHERE Appointment_ID = %s", [appointment_id])
+
+
+def record_appointment(day, employee_id, slot, service=None, booked=True):
+    """Add a committed booking to the cached day schedule (call after commit)"""
+    duration, _ = _service_needs(service)
+    start = parse_slot(slot) if isinstance(slot, str) else None
+    if start is None:
+        start = _to_minutes(slot, None)
+    if start is None:
+        return
+    with _lock:
+        schedule = _schedules.get(day)
+        if schedule is not None:
+            schedule.add(employee_id, start, start + duration, booked=booked)
+
+
+def record_hold(day, employee_id, slot, service=None):
+    """Block a committed hold in the cached day schedule without counting it as load"""
+    record_appointment(day, employee_id, slot, service, booked=False)
+
+
+def invalidate_availability(*days):
+    """Drop cached schedules for the given dates (all dates when none are given)"""
+    with _lock:
+        if not days:
+            _schedules.clear()
+        for day in days:
+            _schedules.pop(day, None)
+
+
+def invalidate_roster():
+    """Re-read employees on the next lookup (call after EMPLOYEE changes)"""
+    global _roster
+    _roster = None
+
+
+class LatencyWindow:
+    """Rolling window of the most recent durations (seconds) with percentiles"""
+
+    def __init__(self, size):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            return self.count
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[max(0, math.ceil(pct / 100 * len(samples)) - 1)]
+
+
+commit_latency = LatencyWindow(COMMIT_LATENCY_WINDOW)
+
+
+def new_booking_token():
+    """Token identifying one checkout submission (rendered into the address form)"""
+    return uuid.uuid4().hex
+
+
+def is_booking_token(value):
+    return isinstance(value, str) and len(value) == 32 and all(c in '0123456789abcdef' for c in value)
+
+
+def find_booking_request(token, customer_id):
+    """Receipt id of the booking already committed for this checkout token, or None"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT r.Receipt_ID
+            FROM BOOKING_REQUEST b
+            INNER JOIN RECEIPTS r ON r.Receipt_Number = b.Receipt_Number
+            WHERE b.Token = %s AND b.Customer_ID = %s
+        """, [token, customer_id])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _insert_rows(cursor, sql, rows):
+    """
+    Run a single-row INSERT once per row and return the new ids in row order.
+
+    Each id is read back from its own statement: a multi-row INSERT's ids
+    are only consecutive under some auto-increment settings, and the
+    driver does not batch VALUES lists containing literals anyway. A cart
+    holds only a handful of rows.
+    """
+    ids = []
+    for row in rows:
+        cursor.execute(sql, row)
+        ids.append(cursor.lastrowid)
+    return ids
+
+
+def commit_booking(customer_id, items, payment_method, receipt_number, request_token=None):
+    """
+    Write a paid cart of bookings and return (receipt_id, appointment_ids).
+
+    Each item is a dict with day, slot, service (catalog dict or None),
+    service_name, amount and the employee_id its slot is held for (or
+    None). After the slot claims, each table takes the cart's rows in
+    turn, already linked to the ids written before, so nothing is back-patched:
+    SALES.Receipt and APPOINTMENT.Receipt take the pre-allocated receipt
+    number, PAYMENT.Appointment_ID is filled by the APPOINTMENT insert
+    trigger, and one combined RECEIPTS row covers the whole cart. Raises
+    SlotConflictError when a slot is gone (nothing is written).
+
+    With a request_token the token is recorded first, in the same
+    transaction: a second submission of the same checkout waits on the
+    first one's key and raises DuplicateBookingError once it commits.
+    """
+    started = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if request_token:
+            try:
+                cursor.execute("""
+                    INSERT INTO BOOKING_REQUEST (Token, Customer_ID, Receipt_Number)
+                    VALUES (%s, %s, %s)
+                """, [request_token, customer_id, receipt_number])
+            except IntegrityError:
+                raise DuplicateBookingError(request_token)
+
+        # Reserve every slot before writing anything else - a concurrent
+        # booking of the same employee and time fails here
+        employee_ids = []
+        for index, item in enumerate(items):
+            try:
+                employee_ids.append(claim_slot(
+                    cursor, item['day'], item['slot'], item['service'], customer_id,
+                    held_employee_id=item.get('employee_id')
+                ))
+            except SlotConflictError as exc:
+                exc.item_index = index
+                raise
+
+        payment_ids = _insert_rows(cursor, """
+            INSERT INTO PAYMENT (Appointment_ID, Method, Amount, Date, Status)
+            VALUES (NULL, %s, %s, %s, 'completed')
+        """, [(payment_method, item['amount'], item['day']) for item in items])
+
+        sales_ids = _insert_rows(cursor, """
+            INSERT INTO SALES (Payment_ID, Employee_ID, Admin_ID, Service_ID, ServiceName, Date, Receipt)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, [
+            (payment_id, employee_id, ONLINE_BOOKING_ADMIN_ID,
+             item['service']['id'] if item['service'] else None,
+             item['service_name'], item['day'], receipt_number)
+            for item, payment_id, employee_id in zip(items, payment_ids, employee_ids)
+        ])
+
+        appointment_ids = _insert_rows(cursor, """
+            INSERT INTO APPOINTMENT (
+                Customer_ID, Employee_ID, Payment_ID, Admin_ID, Sales_ID,
+                Date, Time, Status, Receipt
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, 'confirmed', %s)
+        """, [
+            (customer_id, employee_id, payment_id, ONLINE_BOOKING_ADMIN_ID, sales_id,
+             item['day'], '%02d:%02d:00' % divmod(parse_slot(item['slot']), 60), receipt_number)
+            for item, payment_id, sales_id, employee_id
+            in zip(items, payment_ids, sales_ids, employee_ids)
+        ])
+        for item, employee_id, appointment_id in zip(items, employee_ids, appointment_ids):
+            attach_slot_claim(cursor, employee_id, item['day'], item['slot'], item['service'], appointment_id)
+
+        # One receipt for the cart; its lines are the appointments sharing the receipt number
+        cursor.execute("""
+            INSERT INTO RECEIPTS (
+                Customer_ID, Appointment_ID, Payment_ID, Sales_ID,
+                Amount, Receipt_Date, Receipt_Number, created_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+        """, [
+            customer_id, appointment_ids[0], payment_ids[0], sales_ids[0],
+            sum(item['amount'] for item in items), datetime.now().date(), receipt_number,
+        ])
+        receipt_id = cursor.lastrowid
+
+        adjust_dashboard(
+            cursor,
+            sales=sum(Decimal(str(item['amount'])) for item in items),
+            appointment_days=Counter(item['day'] for item in items),
+        )
+        record_revenue(cursor, [
+            (item['day'],
+             item['service']['id'] if item['service'] else None,
+             employee_id,
+             item['service']['category'] if item['service'] else None,
+             item['amount'])
+            for item, employee_id in zip(items, employee_ids)
+        ])
+
+        for item, employee_id in zip(items, employee_ids):
+            transaction.on_commit(
+                lambda item=item, employee_id=employee_id:
+                    record_appointment(item['day'], employee_id, item['slot'], item['service'])
+            )
+
+    _record_commit_latency(time.perf_counter() - started)
+    return receipt_id, appointment_ids
+
+
+def _record_commit_latency(seconds):
+    count = commit_latency.record(seconds)
+    if count % COMMIT_LATENCY_LOG_EVERY == 0:
+        logger.info(
+            'Booking commit latency over last %d: p50=%.1fms p99=%.1fms',
+            min(count, COMMIT_LATENCY_WINDOW),
+            commit_latency.percentile(50) * 1000,
+            commit_latency.percentile(99) * 1000,
+        )
@@ -0,0 +1,220 @@
+"""
+Service catalog helpers - in-process cache of the active service list
+(checked against the CATALOG_VERSION row) and the service image lookup table
+"""
+import os
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction, OperationalError, ProgrammingError
+
+from .search_helpers import service_index
+
+
+CATALOG_VERSION_KEY = 'glamora:catalog_version'
+CATALOG_VERSION_ID = 1
+
+# How long (seconds) a worker reuses the catalog version it read before
+# checking CATALOG_VERSION again, which bounds how stale its catalog can get
+CATALOG_VERSION_CHECK_SECONDS = 5
+
+# Service name keywords mapped to image filenames in Assets/service images.
+# Order matters - more specific matches should come first
+SERVICE_IMAGE_KEYWORDS = (
+    # Threading services
+    ('eyebrow threading', 'eyebrow threading.jpeg'),
+    ('facial threading', 'face threading.jpeg'),
+    ('threading face', 'threading face.jpg'),
+    ('threading', 'Threading.jpeg'),
+
+    # Facial services
+    ('deep cleansing facial', 'Deep Cleaning Facial.jpeg'),
+    ('deep cleaning facial', 'Deep Cleaning Facial.jpeg'),
+    ('facial treatment', 'Facial Treatment.jpg'),
+    ('hydra facial', 'Hydra Facial.jpeg'),
+    ('facial', 'Facial.jpeg'),
+
+    # Hair services
+    ('hair color', 'hair color.jpg'),
+    ('hair colour', 'hair color.jpg'),
+    ('hair coloring', 'hair color.jpg'),
+    ('hair cut', 'hair cut img.webp'),
+    ('haircut', 'hair cut img.webp'),
+    ('hair wash', 'Hair wash.jpg'),
+    ('styling', 'hair cut img.webp'),
+
+    # Nail services
+    ('nail art', 'Nails Art.jpeg'),
+    ('nails art', 'Nails Art.jpeg'),
+    ('manicure & pedicure', 'Pedicure & manicure.jpeg'),
+    ('pedicure & manicure', 'Pedicure & manicure.jpeg'),
+    ('manicure', 'Manicure.jpeg'),
+    ('pedicure', 'Pedicure.jpeg'),
+    ('nails', 'Nails.jpeg'),
+
+    # Waxing services
+    ('full body wax', 'waxing.jpg'),
+    ('full body waxing', 'waxing.jpg'),
+    ('waxing', 'waxing.jpg'),
+)
+
+# How often (seconds) the image directory is re-stat'ed to pick up new files
+SERVICE_IMAGE_RESCAN_SECONDS = 60
+
+_image_lock = threading.Lock()
+_image_table = ()
+_image_dir_mtime = None
+_image_checked_at = 0.0
+
+_catalog_lock = threading.Lock()
+_catalog = None
+
+
+class CatalogSnapshot:
+    """Fully built service dicts for one catalog version"""
+
+    def __init__(self, version, services):
+        self.version = version
+        self.services = tuple(services)
+        self.by_name = {service['name']: service for service in self.services}
+        self.built_at = time.time()
+
+
+def _now_version():
+    return time.time_ns() // 1000
+
+
+def _read_catalog_version():
+    """
+    The CATALOG_VERSION row, or None when the table or its row (seeded by
+    database_queries.sql) is missing, so callers fall back to uncached reads
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT Version FROM CATALOG_VERSION WHERE Catalog_ID = %s", [CATALOG_VERSION_ID])
+            row = cursor.fetchone()
+    except (OperationalError, ProgrammingError):
+        # MySQL reports a missing table (1146) as ProgrammingError
+        return None
+    return int(row[0]) if row else None
+
+
+def get_catalog_version():
+    """
+    The current catalog version. It lives in the database, so every worker
+    sees the same value; each worker re-reads it at most every
+    CATALOG_VERSION_CHECK_SECONDS.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = _read_catalog_version()
+        if version is not None:
+            cache.set(CATALOG_VERSION_KEY, version, timeout=CATALOG_VERSION_CHECK_SECONDS)
+    return version
+
+
+def bump_catalog_version(cursor):
+    """
+    Move the catalog version on. Call it in the same transaction as the
+    SERVICE change, so the new version commits with the data it describes.
+    """
+    cursor.execute("""
+        INSERT INTO CATALOG_VERSION (Catalog_ID, Version) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE Version = GREATEST(Version + 1, VALUES(Version))
+    """, [CATALOG_VERSION_ID, _now_version()])
+    # This worker picks the change up straight away, the others within
+    # CATALOG_VERSION_CHECK_SECONDS
+    transaction.on_commit(lambda: cache.delete(CATALOG_VERSION_KEY))
+
+
+def get_catalog(loader):
+    """
+    Return the catalog snapshot for the current version, calling loader()
+    to rebuild the service dicts (and re-sync the search index) only when
+    the version has moved on.
+    """
+    global _catalog
+    version = get_catalog_version()
+    if version is None:
+        # No CATALOG_VERSION table yet - never serve stale data
+        snapshot = CatalogSnapshot(None, loader())
+        service_index.sync(snapshot.services)
+        return snapshot
+
+    snapshot = _catalog
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _catalog_lock:
+        snapshot = _catalog
+        if snapshot is None or snapshot.version != version:
+            # Tag with the version read before loading so a bump that lands
+            # mid-rebuild still forces another rebuild on the next request
+            snapshot = CatalogSnapshot(version, loader())
+            service_index.sync(snapshot.services)
+            _catalog = snapshot
+    return snapshot
+
+
+def get_service_images_dir():
+    return os.path.join(settings.BASE_DIR, 'Assets', 'service images')
+
+
+def load_service_images():
+    """
+    Scan the service image directory once and compile the keyword table down
+    to the entries whose file is present, each with its ready-to-use URL.
+    """
+    global _image_table, _image_dir_mtime, _image_checked_at
+    images_dir = get_service_images_dir()
+    try:
+        mtime = os.stat(images_dir).st_mtime
+        with os.scandir(images_dir) as entries:
+            available = {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        mtime = None
+        available = set()
+
+    with _image_lock:
+        _image_table = tuple(
+            (keyword, f'/service-images/{quote(image_file)}')
+            for keyword, image_file in SERVICE_IMAGE_KEYWORDS
+            if image_file in available
+        )
+        _image_dir_mtime = mtime
+        _image_checked_at = time.monotonic()
+        _resolve_service_image.cache_clear()
+
+
+def _refresh_service_images():
+    """Rescan only if the directory changed, and stat it at most once per interval"""
+    global _image_checked_at
+    if time.monotonic() - _image_checked_at < SERVICE_IMAGE_RESCAN_SECONDS:
+        return
+    _image_checked_at = time.monotonic()
+    try:
+        mtime = os.stat(get_service_images_dir()).st_mtime
+    except OSError:
+        mtime = None
+    if mtime != _image_dir_mtime:
+        load_service_images()
+
+
+@lru_cache(maxsize=1024)
+def _resolve_service_image(normalized_name):
+    for keyword, url in _image_table:
+        if keyword in normalized_name:
+            return url
+    return None
+
+
+def resolve_service_image(service_name):
+    """Map service name to image URL (no filesystem access in the common case)"""
+    if not service_name:
+        return None
+    _refresh_service_images()
+    return _resolve_service_image(service_name.lower().strip())
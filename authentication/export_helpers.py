@@ -0,0 +1,146 @@
+"""
+Export helpers - stream admin datasets as CSV or JSONL straight from a
+server-side cursor, so memory stays flat whatever the table size
+"""
+import csv
+import json
+from datetime import timedelta
+
+from django.db import connection
+
+
+# Rows pulled from the server per round trip (and per chunk sent to the client)
+EXPORT_FETCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Dataset name -> columns, query (without WHERE), the date column the
+# from/to filter applies to, and an ORDER BY served by an index
+EXPORTS = {
+    'sales': {
+        'columns': (
+            'sales_id', 'date', 'service', 'receipt', 'customer_id', 'customer_first_name',
+            'customer_last_name', 'customer_mobile', 'employee_id', 'payment_method',
+            'amount', 'payment_status',
+        ),
+        'sql': """
+            SELECT s.Sales_ID, s.Date, s.ServiceName, s.Receipt,
+                   c.Customer_ID, c.First_Name, c.Last_Name, c.Mobile_No,
+                   s.Employee_ID, p.Method, p.Amount, p.Status
+            FROM SALES s
+            LEFT JOIN APPOINTMENT a ON s.Sales_ID = a.Sales_ID
+            LEFT JOIN CUSTOMER c ON a.Customer_ID = c.Customer_ID
+            LEFT JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
+        """,
+        'date_column': 's.Date',
+        'order_by': 's.Date, s.Sales_ID',
+    },
+    'appointments': {
+        'columns': (
+            'appointment_id', 'date', 'time', 'status', 'receipt', 'customer_id',
+            'customer_first_name', 'customer_last_name', 'customer_mobile', 'employee_id',
+            'service', 'amount',
+        ),
+        'sql': """
+            SELECT a.Appointment_ID, a.Date, a.Time, a.Status, a.Receipt,
+                   c.Customer_ID, c.First_Name, c.Last_Name, c.Mobile_No,
+                   a.Employee_ID, s.ServiceName, p.Amount
+            FROM APPOINTMENT a
+            LEFT JOIN CUSTOMER c ON a.Customer_ID = c.Customer_ID
+            LEFT JOIN SALES s ON a.Sales_ID = s.Sales_ID
+            LEFT JOIN PAYMENT p ON a.Payment_ID = p.Payment_ID
+        """,
+        'date_column': 'a.Date',
+        'order_by': 'a.Date, a.Time, a.Appointment_ID',
+    },
+    'customers': {
+        'columns': ('customer_id', 'first_name', 'last_name', 'mobile', 'address', 'created_at'),
+        'sql': """
+            SELECT Customer_ID, First_Name, Last_Name, Mobile_No, Address, created_at
+            FROM CUSTOMER
+        """,
+        'date_column': 'created_at',
+        'order_by': 'Customer_ID',
+    },
+}
+
+
+def build_export_query(dataset, first_day=None, last_day=None):
+    """SQL and params for a dataset limited to [first_day, last_day] (either may be None)"""
+    export = EXPORTS[dataset]
+    where = []
+    params = []
+    if first_day:
+        where.append(f"{export['date_column']} >= %s")
+        params.append(first_day)
+    if last_day:
+        # Half-open so the whole last day is included for DATE and TIMESTAMP columns
+        where.append(f"{export['date_column']} < %s")
+        params.append(last_day + timedelta(days=1))
+    sql = export['sql']
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f" ORDER BY {export['order_by']}"
+    return sql, params
+
+
+def _open_cursor():
+    """
+    A server-side (unbuffered) cursor on MySQL, so rows arrive as they are
+    read instead of the whole result being loaded first. Other backends
+    fall back to a regular cursor read with fetchmany().
+    """
+    if connection.vendor == 'mysql':
+        from MySQLdb.cursors import SSCursor
+        connection.ensure_connection()
+        return connection.connection.cursor(SSCursor)
+    return connection.cursor()
+
+
+def stream_rows(sql, params, fetch_size=EXPORT_FETCH_SIZE):
+    """Yield lists of at most fetch_size rows until the result is exhausted"""
+    cursor = _open_cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+class _Echo:
+    """File-like object whose write() hands back the line for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_export(dataset, export_format, first_day=None, last_day=None):
+    """Generate the encoded export, one chunk per fetched batch (header first)"""
+    columns = EXPORTS[dataset]['columns']
+    sql, params = build_export_query(dataset, first_day, last_day)
+    if export_format == 'jsonl':
+        for rows in stream_rows(sql, params):
+            yield ''.join(
+                json.dumps(dict(zip(columns, map(_json_value, row)))) + '\n' for row in rows
+            ).encode('utf-8')
+        return
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns).encode('utf-8')
+    for rows in stream_rows(sql, params):
+        yield ''.join(writer.writerow(row) for row in rows).encode('utf-8')
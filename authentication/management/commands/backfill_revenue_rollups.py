@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from authentication.report_helpers import backfill_revenue_rollups
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the REVENUE_DAILY and REVENUE_MONTHLY rollups from the SALES/PAYMENT ledger '
+            '(run once after creating them, or after bulk imports or manual SQL edits)')
+
+    def handle(self, *args, **options):
+        daily_rows, monthly_rows = backfill_revenue_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Revenue rollups rebuilt: {daily_rows} daily row(s), {monthly_rows} monthly row(s).'
+        ))
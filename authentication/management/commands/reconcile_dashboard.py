@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from authentication.report_helpers import rebuild_dashboard
+
+
+class Command(BaseCommand):
+    help = ('Recount the admin dashboard counters (DASHBOARD_SUMMARY, DAILY_APPOINTMENT_COUNT) '
+            'from the base tables (run after bulk imports or manual SQL edits)')
+
+    def handle(self, *args, **options):
+        totals = rebuild_dashboard()
+        self.stdout.write(self.style.SUCCESS(
+            f"Dashboard rebuilt: {totals['total_customers']} customer(s), "
+            f"{totals['total_appointments']} appointment(s) over {totals['days']} day(s), "
+            f"sales ${totals['total_sales']:,.2f}."
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from authentication.booking_helpers import sweep_expired_holds, sweep_booking_requests
+
+
+class Command(BaseCommand):
+    help = ('Delete expired slot holds from SLOT_CLAIM and old checkout tokens from BOOKING_REQUEST '
+            '(schedule every few minutes, e.g. with cron)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows deleted per statement (default: 1000)')
+
+    def handle(self, *args, **options):
+        removed = sweep_expired_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired slot hold(s).'))
+        removed = sweep_booking_requests(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} old checkout token(s).'))
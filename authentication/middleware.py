@@ -0,0 +1,25 @@
+"""
+Middleware for Customer and Admin identity resolution
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .auth_helpers import get_customer_from_session, get_admin_from_session
+
+
+class IdentityMiddleware:
+    """
+    Attach request.customer and request.admin as lazy objects.
+
+    Nothing is queried until a view or template actually touches them, and
+    the lookups share the per-request cache used by get_customer_from_session
+    and get_admin_from_session, so a request runs at most one identity query
+    and anonymous requests (no id in the session) run none.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.customer = SimpleLazyObject(lambda: get_customer_from_session(request))
+        request.admin = SimpleLazyObject(lambda: get_admin_from_session(request))
+        return self.get_response(request)
@@ -28,6 +28,7 @@ class Service(models.Model):
     Price = models.DecimalField(max_digits=10, decimal_places=2, db_column='Price')
     Original_Price = models.DecimalField(max_digits=10, decimal_places=2, db_column='Original_Price', null=True, blank=True)
     Discount_Label = models.CharField(max_length=50, db_column='Discount_Label', null=True, blank=True)
+    Duration_Minutes = models.PositiveIntegerField(default=30, db_column='Duration_Minutes')
     is_active = models.BooleanField(default=True, db_column='is_active')
 
     class Meta:
@@ -0,0 +1,88 @@
+"""
+Keyset (cursor) pagination helpers for the raw SQL listings
+"""
+from datetime import date, datetime, time, timedelta
+
+
+CURSOR_SEPARATOR = '_'
+
+
+def _cursor_value(value):
+    if isinstance(value, timedelta):
+        # MySQL TIME columns can come back as timedelta
+        hours, seconds = divmod(int(value.total_seconds()), 3600)
+        return '%02d:%02d:%02d' % (hours, seconds // 60, seconds % 60)
+    if isinstance(value, time):
+        return value.strftime('%H:%M:%S')
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(*values):
+    """Sort key of the last row on a page -> opaque ?after= value"""
+    return CURSOR_SEPARATOR.join(_cursor_value(value) for value in values)
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_time(value):
+    return datetime.strptime(value, '%H:%M:%S').time()
+
+
+def parse_datetime(value):
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
+
+
+def decode_cursor(value, *parsers):
+    """
+    ?after= value -> tuple of sort key values, one per parser
+    (parse_date, parse_time, int, ...). None when missing or malformed.
+    """
+    if not value:
+        return None
+    parts = value.split(CURSOR_SEPARATOR)
+    if len(parts) != len(parsers):
+        return None
+    try:
+        return tuple(parser(part) for parser, part in zip(parsers, parts))
+    except (TypeError, ValueError):
+        return None
+
+
+def keyset_condition(columns, descending=True):
+    """
+    WHERE clause for the rows after a cursor in (col1, col2, ...) order.
+
+    Written out as nested OR/AND rather than a row comparison so MySQL can
+    range-scan the matching composite index. Pass keyset_params(cursor)
+    as its parameters.
+    """
+    op = '<' if descending else '>'
+    condition = f'{columns[-1]} {op} %s'
+    for column in reversed(columns[:-1]):
+        condition = f'({column} {op} %s OR ({column} = %s AND {condition}))'
+    return condition
+
+
+def keyset_params(cursor_values):
+    params = []
+    for value in cursor_values[:-1]:
+        params.extend((value, value))
+    params.append(cursor_values[-1])
+    return params
+
+
+def split_page(rows, page_size, sort_key):
+    """
+    Trim rows fetched with LIMIT page_size + 1 to one page and return
+    (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(*sort_key(rows[-1]))
@@ -0,0 +1,362 @@
+"""
+Receipt helpers - receipt number allocation, the rendered receipt PDF cache
+and background pre-rendering of new receipts
+"""
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from io import BytesIO
+
+from django.conf import settings
+from django.db import connection
+from django.utils.crypto import salted_hmac
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+
+RECEIPT_NUMBER_PREFIX = 'RCP'
+RECEIPT_SEQUENCE_NAME = 'receipt'
+
+# Receipt numbers each worker reserves per trip to RECEIPT_SEQUENCE. Numbers
+# left in a block when the worker exits are skipped, never reused.
+RECEIPT_BLOCK_SIZE = 20
+
+# Bump when render_receipt_pdf's layout changes so every cached PDF is re-rendered
+RECEIPT_PDF_VERSION = 1
+RECEIPT_PDF_DIR = 'receipts'
+_RECEIPT_PDF_NAME = re.compile(r'^receipts/[0-9a-f]{64}\.pdf$')
+
+# Renders waiting in the pre-render pool beyond this are not queued; the
+# receipt is rendered by its first view instead
+RECEIPT_RENDER_MAX_PENDING = 32
+# How long a view waits for a queued render before rendering it itself
+RECEIPT_RENDER_WAIT_SECONDS = 2
+
+_lock = threading.Lock()
+_next_value = 0
+_block_end = 0
+
+_render_lock = threading.Lock()
+_render_pool = None
+# Cache file path -> Future of its queued render
+_pending_renders = {}
+
+
+def format_receipt_number(value):
+    """RCP001, RCP002, ... (at least three digits)"""
+    return f"{RECEIPT_NUMBER_PREFIX}{str(value).zfill(3)}"
+
+
+def _reserve_block(size):
+    """
+    Atomically move the counter on by `size` and return the last value reserved.
+
+    The single-row UPDATE is committed straight away when called outside a
+    transaction, so its row lock is held only for that statement and RECEIPTS
+    itself is never locked or scanned.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            UPDATE RECEIPT_SEQUENCE
+            SET Last_Value = LAST_INSERT_ID(Last_Value + %s)
+            WHERE Name = %s
+        """, [size, RECEIPT_SEQUENCE_NAME])
+        if not cursor.rowcount:
+            # First use on this database: start after the highest existing number
+            cursor.execute("""
+                INSERT IGNORE INTO RECEIPT_SEQUENCE (Name, Last_Value)
+                SELECT %s, COALESCE(MAX(CAST(SUBSTRING(Receipt_Number, 4) AS UNSIGNED)), 0)
+                FROM RECEIPTS
+                WHERE Receipt_Number LIKE 'RCP%%'
+            """, [RECEIPT_SEQUENCE_NAME])
+            return _reserve_block(size)
+        # LAST_INSERT_ID(expr) sets the statement's insert id, which the
+        # driver reports as lastrowid - no second round trip needed
+        return cursor.lastrowid
+
+
+def next_receipt_number():
+    """
+    Hand out the next receipt number from this worker's reserved block.
+
+    Numbers are unique across workers and increase within a worker, but may
+    have gaps. Call it before opening the booking transaction so the counter
+    row is not locked for the length of the booking.
+    """
+    global _next_value, _block_end
+    with _lock:
+        if _next_value == 0 or _next_value > _block_end:
+            _block_end = _reserve_block(RECEIPT_BLOCK_SIZE)
+            _next_value = _block_end - RECEIPT_BLOCK_SIZE + 1
+        value = _next_value
+        _next_value += 1
+    return format_receipt_number(value)
+
+
+@lru_cache(maxsize=None)
+def _receipt_styles():
+    """The receipt's paragraph styles, built once per process"""
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=28,
+            textColor=colors.HexColor('#603D44'),
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'label': ParagraphStyle(
+            'ReceiptLabel',
+            parent=styles['Normal'],
+            fontSize=12,
+            textColor=colors.grey,
+            alignment=TA_CENTER,
+            spaceAfter=30
+        ),
+        'number': ParagraphStyle(
+            'ReceiptNumber',
+            parent=styles['Normal'],
+            fontSize=14,
+            alignment=TA_CENTER,
+            spaceAfter=20,
+            fontName='Helvetica-Bold'
+        ),
+        'address': ParagraphStyle(
+            'AddressStyle',
+            parent=styles['Normal'],
+            fontSize=11,
+            fontName='Helvetica',
+            leading=13,
+            wordWrap='LTR'
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=TA_CENTER,
+            textColor=colors.grey,
+            spaceBefore=20
+        ),
+    }
+
+
+def render_receipt_pdf(data):
+    """
+    Render a receipt to PDF bytes. `data` holds only display strings
+    (see receipt_pdf_digest), so the output depends on nothing else.
+    """
+    styles = _receipt_styles()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=18)
+    elements = [
+        Paragraph("GLAMORA", styles['title']),
+        Paragraph("RECEIPT", styles['label']),
+        Spacer(1, 0.2*inch),
+        Paragraph(f"Receipt Number: {data['receipt_number']}", styles['number']),
+        Spacer(1, 0.3*inch),
+    ]
+
+    receipt_data = []
+    if data['customer_name']:
+        receipt_data.append(['Customer Name:', data['customer_name']])
+    if data['lines']:
+        # Combined cart receipt: one row per service
+        for line in data['lines']:
+            receipt_data.append([
+                f"{line['service_name']}:",
+                f"{line['appointment_date']}, {line['appointment_time']} - {line['amount']}",
+            ])
+    else:
+        receipt_data.append(['Service:', data['service_name']])
+        receipt_data.append(['Appointment Date:', data['appointment_date']])
+        receipt_data.append(['Appointment Time:', data['appointment_time']])
+    receipt_data.append(['Payment Method:', data['payment_method']])
+    receipt_data.append(['Receipt Date:', data['receipt_date']])
+    if data['mobile']:
+        receipt_data.append(['Mobile:', data['mobile']])
+    if data['address']:
+        # Use Paragraph for address to handle wrapping
+        receipt_data.append(['Address:', Paragraph(data['address'], styles['address'])])
+
+    # Count data rows (before separator and total)
+    data_row_count = len(receipt_data)
+    receipt_data.append(['', ''])
+    receipt_data.append(['TOTAL AMOUNT:', data['amount']])
+
+    receipt_table = Table(receipt_data, colWidths=[2.5*inch, 3.5*inch])
+    receipt_table.setStyle(TableStyle([
+        # Gray background only for data rows (left column)
+        ('BACKGROUND', (0, 0), (0, data_row_count - 1), colors.HexColor('#f5f5f5')),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('FONTNAME', (0, 0), (0, data_row_count - 1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, data_row_count - 1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, data_row_count - 1), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('TOPPADDING', (0, 0), (-1, -1), 12),
+        # Grid lines only for data rows
+        ('GRID', (0, 0), (-1, data_row_count - 1), 1, colors.grey),
+        # Separator line before total
+        ('LINEBELOW', (0, data_row_count), (-1, data_row_count), 2, colors.HexColor('#603D44')),
+        # Total row styling
+        ('FONTSIZE', (0, -1), (-1, -1), 14),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('TOPPADDING', (0, -1), (-1, -1), 15),
+        ('BOTTOMPADDING', (0, -1), (-1, -1), 15),
+    ]))
+    elements.append(receipt_table)
+    elements.append(Spacer(1, 0.5*inch))
+    elements.append(Paragraph("Thank you for choosing GLAMORA!", styles['footer']))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def receipt_pdf_digest(data):
+    """
+    Content hash of the receipt data (and layout version). Keyed with
+    SECRET_KEY so a file name cannot be derived from guessed receipt details.
+    """
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return salted_hmac(f'receipt-pdf-{RECEIPT_PDF_VERSION}', payload, algorithm='sha256').hexdigest()
+
+
+def receipt_pdf_name(digest):
+    """RECEIPTS.Receipt_File value for a digest (relative to RECEIPT_FILES_ROOT)"""
+    return f'{RECEIPT_PDF_DIR}/{digest}.pdf'
+
+
+def receipt_pdf_path(name):
+    return os.path.join(settings.RECEIPT_FILES_ROOT, name)
+
+
+def write_receipt_pdf(path, content):
+    """Write via a temporary file and rename, so readers never see a partial PDF"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def remove_receipt_pdf(name):
+    """Delete a cached PDF (names not written by this cache are left alone)"""
+    if not name or not _RECEIPT_PDF_NAME.match(name):
+        return
+    try:
+        os.remove(receipt_pdf_path(name))
+    except FileNotFoundError:
+        pass
+
+
+def cached_receipt_pdf(receipt_id, data, receipt_file=None, digest=None):
+    """
+    Path of the receipt's rendered PDF, rendering it on a cache miss (after
+    briefly waiting for a pre-render queued by queue_receipt_pdf).
+
+    The file is named by receipt_pdf_digest(data), so any change to the
+    receipt, its appointments or the customer's details yields a new file.
+    RECEIPTS.Receipt_File (passed in as receipt_file) is pointed at it and
+    the superseded file removed.
+    """
+    name = receipt_pdf_name(digest or receipt_pdf_digest(data))
+    path = receipt_pdf_path(name)
+    if not os.path.exists(path):
+        _wait_for_render(path)
+    if not os.path.exists(path):
+        write_receipt_pdf(path, render_receipt_pdf(data))
+    if receipt_file != name:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE RECEIPTS SET Receipt_File = %s WHERE Receipt_ID = %s",
+                [name, receipt_id]
+            )
+        remove_receipt_pdf(receipt_file)
+    return path
+
+
+def _render_receipt_file(path, data):
+    """Pool task: render one receipt to its cache file (runs in a worker process)"""
+    if not os.path.exists(path):
+        write_receipt_pdf(path, render_receipt_pdf(data))
+
+
+def _get_render_pool():
+    global _render_pool
+    if _render_pool is None:
+        # spawn, not fork: the workers must not inherit the web process's
+        # database connections or threads
+        _render_pool = ProcessPoolExecutor(
+            max_workers=settings.RECEIPT_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _render_pool
+
+
+def _render_finished(path, future):
+    with _render_lock:
+        if _pending_renders.get(path) is future:
+            del _pending_renders[path]
+
+
+def queue_receipt_pdf(data, digest=None):
+    """
+    Queue a receipt for rendering on the background process pool so its
+    PDF is usually cached before the first view. Returns False when it was
+    not queued (pool disabled or full, or already cached); the first view
+    then renders it in the request.
+    """
+    global _render_pool
+    if settings.RECEIPT_RENDER_WORKERS <= 0:
+        return False
+    path = receipt_pdf_path(receipt_pdf_name(digest or receipt_pdf_digest(data)))
+    if os.path.exists(path):
+        return False
+    with _render_lock:
+        if path in _pending_renders:
+            return True
+        if len(_pending_renders) >= RECEIPT_RENDER_MAX_PENDING:
+            return False
+        try:
+            future = _get_render_pool().submit(_render_receipt_file, path, data)
+        except (BrokenProcessPool, RuntimeError):
+            # A worker died (or the pool was shut down); start a new pool next time
+            _render_pool = None
+            return False
+        _pending_renders[path] = future
+    future.add_done_callback(partial(_render_finished, path))
+    return True
+
+
+def _wait_for_render(path, timeout=RECEIPT_RENDER_WAIT_SECONDS):
+    """Block up to timeout seconds for a queued render of path, if there is one"""
+    with _render_lock:
+        future = _pending_renders.get(path)
+    if future is None:
+        return
+    try:
+        future.result(timeout=timeout)
+    except Exception:
+        # Still running or failed - the caller renders it itself
+        pass
@@ -0,0 +1,401 @@
+"""
+Report helpers - dashboard counters (DASHBOARD_SUMMARY,
+DAILY_APPOINTMENT_COUNT) and revenue rollups (REVENUE_DAILY,
+REVENUE_MONTHLY) kept up to date by the same transactions that change
+the data
+"""
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+
+# DASHBOARD_SUMMARY row holding the last recount; writers add their deltas
+# to one of DASHBOARD_SUMMARY_SLOTS further rows (Summary_ID 2, 3, ...)
+# picked at random, so concurrent checkouts rarely wait on the same row.
+# The dashboard shows the sum of all rows.
+DASHBOARD_SUMMARY_ID = 1
+DASHBOARD_SUMMARY_SLOTS = 16
+
+# Columns whose appointments can be counted before a delete removes them
+_APPOINTMENT_OWNER_COLUMNS = ('Customer_ID', 'Employee_ID', 'Appointment_ID')
+
+# Breakdowns the revenue analytics can group by
+REVENUE_GROUPS = ('day', 'month', 'service', 'employee', 'category')
+
+# Rows read per round trip while backfilling the rollups
+REVENUE_BACKFILL_FETCH_SIZE = 1000
+
+# Bounds used for an open-ended date range (MySQL's DATE range)
+REVENUE_EARLIEST_DAY = date(1000, 1, 1)
+REVENUE_LATEST_DAY = date(9999, 12, 30)
+
+
+def adjust_dashboard(cursor, customers=0, sales=Decimal('0.00'), appointment_days=None):
+    """
+    Add deltas to the dashboard counters inside the caller's transaction.
+
+    appointment_days maps a date to the change in that day's appointment
+    count; the total appointment count moves by their sum. The totals go to
+    a random slot row, which only writers that happen to pick the same slot
+    wait on; the day rows follow in date order so writers never deadlock.
+    Holding a slot row is also what keeps rebuild_dashboard() and the
+    rollup backfill (which lock every slot) from running mid-write.
+    """
+    appointment_days = {day: delta for day, delta in (appointment_days or {}).items() if delta}
+    appointments = sum(appointment_days.values())
+    if customers or sales or appointment_days:
+        cursor.execute("""
+            INSERT INTO DASHBOARD_SUMMARY (Summary_ID, Total_Customers, Total_Appointments, Total_Sales)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                Total_Customers = Total_Customers + VALUES(Total_Customers),
+                Total_Appointments = Total_Appointments + VALUES(Total_Appointments),
+                Total_Sales = Total_Sales + VALUES(Total_Sales)
+        """, [
+            DASHBOARD_SUMMARY_ID + random.randint(1, DASHBOARD_SUMMARY_SLOTS),
+            customers, appointments, sales,
+        ])
+    for day in sorted(appointment_days):
+        cursor.execute("""
+            INSERT INTO DAILY_APPOINTMENT_COUNT (Date, Appointment_Count)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE Appointment_Count = Appointment_Count + VALUES(Appointment_Count)
+        """, [day, appointment_days[day]])
+
+
+def appointment_days_for(cursor, column, value):
+    """
+    Date -> number of appointments with column = value, for deletes that
+    remove them (directly or by ON DELETE CASCADE, which fires no triggers).
+    Lock the parent row first so no appointment is added in between.
+    """
+    if column not in _APPOINTMENT_OWNER_COLUMNS:
+        raise ValueError(f'Unsupported column: {column}')
+    cursor.execute(f"""
+        SELECT Date, COUNT(*)
+        FROM APPOINTMENT
+        WHERE {column} = %s
+        GROUP BY Date
+    """, [value])
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def _summary_ids():
+    return range(DASHBOARD_SUMMARY_ID, DASHBOARD_SUMMARY_ID + DASHBOARD_SUMMARY_SLOTS + 1)
+
+
+def _lock_dashboard(cursor):
+    """
+    Lock every summary row, in key order. Every write that moves a counter
+    or a rollup holds one of the slot rows, so until the caller commits they
+    wait, and they add their deltas on top of whatever the caller recounts.
+    """
+    cursor.executemany(
+        "INSERT IGNORE INTO DASHBOARD_SUMMARY (Summary_ID) VALUES (%s)",
+        [(summary_id,) for summary_id in _summary_ids()]
+    )
+    cursor.execute(
+        "SELECT Summary_ID FROM DASHBOARD_SUMMARY WHERE Summary_ID BETWEEN %s AND %s ORDER BY Summary_ID FOR UPDATE",
+        [DASHBOARD_SUMMARY_ID, DASHBOARD_SUMMARY_ID + DASHBOARD_SUMMARY_SLOTS]
+    )
+
+
+def rebuild_dashboard():
+    """
+    Recount every dashboard counter from the base tables and return the totals.
+
+    The summary rows are locked before anything is read, so writers that
+    have not committed yet wait and add their deltas on top of the recount,
+    and writers that already committed are in it. The recount goes to the
+    DASHBOARD_SUMMARY_ID row and the slot rows are zeroed.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock_dashboard(cursor)
+        cursor.execute("SELECT COUNT(*) FROM CUSTOMER")
+        total_customers = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT COALESCE(SUM(p.Amount), 0)
+            FROM SALES s
+            JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
+            WHERE p.Status <> 'refunded'
+        """)
+        total_sales = Decimal(str(cursor.fetchone()[0] or 0))
+        cursor.execute("SELECT Date, COUNT(*) FROM APPOINTMENT GROUP BY Date")
+        days = {row[0]: row[1] for row in cursor.fetchall()}
+        total_appointments = sum(days.values())
+
+        cursor.execute("""
+            UPDATE DASHBOARD_SUMMARY
+            SET Total_Customers = 0, Total_Appointments = 0, Total_Sales = 0
+            WHERE Summary_ID <> %s
+        """, [DASHBOARD_SUMMARY_ID])
+        cursor.execute("""
+            UPDATE DASHBOARD_SUMMARY
+            SET Total_Customers = %s, Total_Appointments = %s, Total_Sales = %s
+            WHERE Summary_ID = %s
+        """, [total_customers, total_appointments, total_sales, DASHBOARD_SUMMARY_ID])
+        cursor.execute("DELETE FROM DAILY_APPOINTMENT_COUNT")
+        if days:
+            cursor.executemany(
+                "INSERT INTO DAILY_APPOINTMENT_COUNT (Date, Appointment_Count) VALUES (%s, %s)",
+                sorted(days.items())
+            )
+    return {
+        'total_customers': total_customers,
+        'total_appointments': total_appointments,
+        'total_sales': total_sales,
+        'days': len(days),
+    }
+
+
+def get_dashboard_summary():
+    """The dashboard counters (summed over the slot rows) with today's appointment count"""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT SUM(Summary_ID = %s), SUM(Total_Customers), SUM(Total_Appointments), SUM(Total_Sales),
+                   (SELECT Appointment_Count FROM DAILY_APPOINTMENT_COUNT WHERE Date = CURDATE())
+            FROM DASHBOARD_SUMMARY
+        """, [DASHBOARD_SUMMARY_ID])
+        row = cursor.fetchone()
+    if not row[0]:
+        # First load on this database: seed the counters once
+        rebuild_dashboard()
+        return get_dashboard_summary()
+    return {
+        'total_customers': int(row[1]),
+        'total_appointments': int(row[2]),
+        'total_sales': float(row[3]) if row[3] else 0.00,
+        'today_appointments': row[4] or 0,
+    }
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def record_revenue(cursor, lines, refunds=False, sign=1):
+    """
+    Add sales (or with refunds=True, refunds) to REVENUE_DAILY and
+    REVENUE_MONTHLY inside the caller's transaction.
+
+    lines are (day, service_id, employee_id, category, amount) tuples; a
+    missing service, employee or category is stored as 0 / ''. sign=-1
+    takes lines back out. Call it after adjust_dashboard() so a summary
+    slot row is always locked first.
+    """
+    daily = defaultdict(lambda: [0, Decimal('0.00')])
+    monthly = defaultdict(lambda: [0, Decimal('0.00')])
+    for day, service_id, employee_id, category, amount in lines:
+        key = (service_id or 0, employee_id or 0, category or '')
+        for totals in (daily[(day,) + key], monthly[(_month(day),) + key]):
+            totals[0] += sign
+            totals[1] += sign * Decimal(str(amount or 0))
+    count_column, amount_column = ('Refund_Count', 'Refunds') if refunds else ('Sales_Count', 'Revenue')
+    for table, date_column, groups in (('REVENUE_DAILY', 'Date', daily), ('REVENUE_MONTHLY', 'Month', monthly)):
+        if not groups:
+            continue
+        cursor.executemany(f"""
+            INSERT INTO {table} (
+                {date_column}, Service_ID, Employee_ID, Category, {count_column}, {amount_column}
+            )
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                {count_column} = {count_column} + VALUES({count_column}),
+                {amount_column} = {amount_column} + VALUES({amount_column})
+        """, [key + tuple(totals) for key, totals in sorted(groups.items())])
+
+
+def sale_revenue_lines(cursor, column, value):
+    """
+    Revenue lines of the paid SALES rows with column = value (Sales_ID or
+    Employee_ID), split into (sales, refunds) for record_revenue()
+    """
+    if column not in ('Sales_ID', 'Employee_ID'):
+        raise ValueError(f'Unsupported column: {column}')
+    cursor.execute(f"""
+        SELECT s.Date, s.Service_ID, s.Employee_ID, sv.Category, p.Amount, p.Status
+        FROM SALES s
+        JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
+        LEFT JOIN SERVICE sv ON s.Service_ID = sv.Service_ID
+        WHERE s.{column} = %s
+    """, [value])
+    sales = []
+    refunds = []
+    for row in cursor.fetchall():
+        sales.append(row[:5])
+        if row[5] == 'refunded':
+            refunds.append(row[:5])
+    return sales, refunds
+
+
+def reassign_sale_revenue(cursor, sales_id, employee_id):
+    """Move a sale's revenue to the employee it is being reassigned to (call before updating SALES)"""
+    sales, refunds = sale_revenue_lines(cursor, 'Sales_ID', sales_id)
+    record_revenue(cursor, sales, sign=-1)
+    record_revenue(cursor, refunds, refunds=True, sign=-1)
+    record_revenue(cursor, [line[:2] + (employee_id,) + line[3:] for line in sales])
+    record_revenue(cursor, [line[:2] + (employee_id,) + line[3:] for line in refunds], refunds=True)
+
+
+def backfill_revenue_rollups():
+    """
+    Rebuild REVENUE_DAILY and REVENUE_MONTHLY from the SALES/PAYMENT ledger
+    and return (daily rows, monthly rows) written. Holds every summary row
+    lock, so bookings and refunds wait instead of being double counted.
+    """
+    insert_daily = """
+        INSERT INTO REVENUE_DAILY (
+            Date, Service_ID, Employee_ID, Category,
+            Sales_Count, Revenue, Refund_Count, Refunds
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    daily_rows = 0
+    monthly = defaultdict(lambda: [0, Decimal('0.00'), 0, Decimal('0.00')])
+    with transaction.atomic(), connection.cursor() as cursor:
+        _lock_dashboard(cursor)
+        cursor.execute("DELETE FROM REVENUE_DAILY")
+        cursor.execute("DELETE FROM REVENUE_MONTHLY")
+        with connection.cursor() as ledger:
+            ledger.execute("""
+                SELECT s.Date, COALESCE(s.Service_ID, 0), COALESCE(s.Employee_ID, 0),
+                       COALESCE(sv.Category, ''),
+                       COUNT(*), SUM(p.Amount),
+                       SUM(CASE WHEN p.Status = 'refunded' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN p.Status = 'refunded' THEN p.Amount ELSE 0 END)
+                FROM SALES s
+                JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
+                LEFT JOIN SERVICE sv ON s.Service_ID = sv.Service_ID
+                GROUP BY s.Date, COALESCE(s.Service_ID, 0), COALESCE(s.Employee_ID, 0), COALESCE(sv.Category, '')
+                ORDER BY s.Date
+            """)
+            while True:
+                rows = ledger.fetchmany(REVENUE_BACKFILL_FETCH_SIZE)
+                if not rows:
+                    break
+                cursor.executemany(insert_daily, rows)
+                daily_rows += len(rows)
+                for row in rows:
+                    totals = monthly[(_month(row[0]),) + tuple(row[1:4])]
+                    for index, value in enumerate(row[4:]):
+                        totals[index] += value or 0
+        if monthly:
+            cursor.executemany("""
+                INSERT INTO REVENUE_MONTHLY (
+                    Month, Service_ID, Employee_ID, Category,
+                    Sales_Count, Revenue, Refund_Count, Refunds
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, [key + tuple(totals) for key, totals in sorted(monthly.items())])
+    return daily_rows, len(monthly)
+
+
+def _revenue_segments(first_day, last_day, group_by):
+    """
+    Split [first_day, last_day] into (table, date column, start, end)
+    reads: whole calendar months come from REVENUE_MONTHLY, the partial
+    months at either end from REVENUE_DAILY
+    """
+    first_month = first_day if first_day.day == 1 else _month(_month(first_day) + timedelta(days=32))
+    after_last_month = _month(last_day + timedelta(days=1))
+    if group_by == 'day' or first_month >= after_last_month:
+        return [('REVENUE_DAILY', 'Date', first_day, last_day)]
+    segments = []
+    if first_day < first_month:
+        segments.append(('REVENUE_DAILY', 'Date', first_day, first_month - timedelta(days=1)))
+    segments.append(('REVENUE_MONTHLY', 'Month', first_month, _month(after_last_month - timedelta(days=1))))
+    if after_last_month <= last_day:
+        segments.append(('REVENUE_DAILY', 'Date', after_last_month, last_day))
+    return segments
+
+
+def revenue_breakdown(group_by, first_day, last_day):
+    """
+    Revenue between two dates (inclusive) grouped by day, month, service,
+    employee or category, read from the rollups. Returns a list of dicts
+    with key, label, sales, revenue, refunds and net, sorted by key.
+    """
+    if group_by not in REVENUE_GROUPS:
+        raise ValueError(f'Unsupported grouping: {group_by}')
+    group_columns = {'service': 'Service_ID', 'employee': 'Employee_ID', 'category': 'Category'}
+    totals = defaultdict(lambda: [0, Decimal('0.00'), 0, Decimal('0.00')])
+    with connection.cursor() as cursor:
+        for table, date_column, start, end in _revenue_segments(first_day, last_day, group_by):
+            column = group_columns.get(group_by, date_column)
+            cursor.execute(f"""
+                SELECT {column}, SUM(Sales_Count), SUM(Revenue), SUM(Refund_Count), SUM(Refunds)
+                FROM {table}
+                WHERE {date_column} >= %s AND {date_column} <= %s
+                GROUP BY {column}
+            """, [start, end])
+            for row in cursor.fetchall():
+                key = _month(row[0]) if group_by == 'month' else row[0]
+                for index, value in enumerate(row[1:]):
+                    totals[key][index] += value or 0
+
+        labels = {}
+        ids = [key for key in totals if key]
+        if group_by in ('service', 'employee') and ids:
+            placeholders = ', '.join(['%s'] * len(ids))
+            if group_by == 'service':
+                cursor.execute(
+                    f"SELECT Service_ID, ServiceName FROM SERVICE WHERE Service_ID IN ({placeholders})", ids
+                )
+                labels = {row[0]: row[1] for row in cursor.fetchall()}
+            else:
+                cursor.execute(
+                    f"SELECT Employee_ID, First_Name, Last_Name FROM EMPLOYEE WHERE Employee_ID IN ({placeholders})", ids
+                )
+                labels = {row[0]: f"{row[1]} {row[2]}" for row in cursor.fetchall()}
+
+    breakdown = []
+    for key in sorted(totals):
+        sales, revenue, refund_count, refunds = totals[key]
+        if group_by == 'day':
+            label = key.isoformat()
+        elif group_by == 'month':
+            label = key.strftime('%Y-%m')
+        elif group_by == 'category':
+            label = key or 'Uncategorized'
+        else:
+            label = labels.get(key, 'Unassigned' if not key else f'#{key}')
+        breakdown.append({
+            'key': key if group_by in ('service', 'employee') else label,
+            'label': label,
+            'sales': int(sales),
+            'revenue': revenue,
+            'refund_count': int(refund_count),
+            'refunds': refunds,
+            'net': revenue - refunds,
+        })
+    return breakdown
+
+
+def revenue_totals(first_day=None, last_day=None, service_id=None):
+    """
+    (paid sales, revenue net of refunds) between two dates (inclusive,
+    either may be None) for one service or all, summed from the rollups
+    """
+    sales = 0
+    net = Decimal('0.00')
+    first_day = first_day or REVENUE_EARLIEST_DAY
+    last_day = last_day or REVENUE_LATEST_DAY
+    with connection.cursor() as cursor:
+        for table, date_column, start, end in _revenue_segments(first_day, last_day, 'service'):
+            sql = f"""
+                SELECT COALESCE(SUM(Sales_Count), 0), COALESCE(SUM(Revenue - Refunds), 0)
+                FROM {table}
+                WHERE {date_column} >= %s AND {date_column} <= %s
+            """
+            params = [start, end]
+            if service_id:
+                sql += ' AND Service_ID = %s'
+                params.append(service_id)
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+            sales += int(row[0])
+            net += Decimal(str(row[1]))
+    return sales, net
@@ -0,0 +1,217 @@
+"""
+Service search index - token, prefix, infix and fuzzy lookups over the catalog
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+
+# Weight of a token depending on the field it was found in
+SEARCH_FIELD_WEIGHTS = (('name', 3.0), ('category', 2.0), ('description', 1.0))
+
+# Multiplier applied depending on how a query token matched an indexed token
+EXACT_MATCH_BOOST = 1.0
+PREFIX_MATCH_BOOST = 0.7
+INFIX_MATCH_BOOST = 0.5
+FUZZY_MATCH_BOOST = 0.4
+
+# Bonus when the whole query appears verbatim in the service name
+PHRASE_MATCH_BONUS = 2.0
+
+STOP_WORDS = frozenset({'a', 'an', 'and', 'for', 'of', 'the', 'with'})
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_text(text):
+    """Lowercase and strip accents so 'Colour' and 'colour' index the same"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.findall(normalize_text(text)) if token not in STOP_WORDS]
+
+
+def _trigrams(token):
+    padded = f'${token}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _max_edits(token):
+    return 1 if len(token) <= 5 else 2
+
+
+def _edit_distance(left, right, limit):
+    """Levenshtein distance, giving up early once it exceeds limit"""
+    if abs(len(left) - len(right)) > limit:
+        return limit + 1
+    previous = list(range(len(right) + 1))
+    for i, left_char in enumerate(left, 1):
+        current = [i]
+        for j, right_char in enumerate(right, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (left_char != right_char),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class ServiceSearchIndex:
+    """
+    Inverted index over service name, category and description.
+
+    Postings map each token to {service_id: field weight}. A sorted vocabulary
+    answers prefix queries with bisect, and trigram postings over the
+    vocabulary answer infix and typo-tolerant (edit distance) queries, so a
+    lookup only touches the tokens it can match, not every service.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._services = {}
+        self._positions = {}
+        self._fingerprints = {}
+        self._doc_tokens = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._trigram_postings = defaultdict(set)
+
+    def sync(self, services):
+        """
+        Bring the index in line with the given catalog, re-indexing only
+        services that were added, removed or whose text changed.
+        """
+        with self._lock:
+            current_ids = set()
+            for position, service in enumerate(services):
+                service_id = service['id']
+                current_ids.add(service_id)
+                fingerprint = tuple(service.get(field) or '' for field, _ in SEARCH_FIELD_WEIGHTS)
+                if self._fingerprints.get(service_id) != fingerprint:
+                    self._remove_document(service_id)
+                    self._add_document(service_id, fingerprint)
+                self._services[service_id] = service
+                self._positions[service_id] = position
+
+            for service_id in set(self._services) - current_ids:
+                self._remove_document(service_id)
+                del self._services[service_id]
+                del self._positions[service_id]
+
+    def search(self, query, limit=None):
+        """Return matching service dicts, best match first"""
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            scores = None
+            for query_token in dict.fromkeys(query_tokens):
+                token_scores = {}
+                for token, boost in self._match_token(query_token):
+                    for service_id, weight in self._postings[token].items():
+                        score = boost * weight
+                        if score > token_scores.get(service_id, 0):
+                            token_scores[service_id] = score
+                if not token_scores:
+                    return []
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        service_id: score + token_scores[service_id]
+                        for service_id, score in scores.items()
+                        if service_id in token_scores
+                    }
+                if not scores:
+                    return []
+
+            phrase = normalize_text(query).strip()
+            for service_id in scores:
+                if phrase and phrase in normalize_text(self._services[service_id]['name']):
+                    scores[service_id] += PHRASE_MATCH_BONUS
+
+            ranked = sorted(scores, key=lambda service_id: (-scores[service_id], self._positions[service_id]))
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [self._services[service_id] for service_id in ranked]
+
+    def _match_token(self, query_token):
+        """Yield (indexed token, boost) pairs for one query token"""
+        matches = {}
+        if query_token in self._postings:
+            matches[query_token] = EXACT_MATCH_BOOST
+
+        start = bisect_left(self._vocabulary, query_token)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(query_token):
+                break
+            matches.setdefault(token, PREFIX_MATCH_BOOST)
+
+        if len(query_token) >= 3:
+            inner_grams = [query_token[i:i + 3] for i in range(len(query_token) - 2)]
+            candidates = set.intersection(*(self._trigram_postings.get(gram, set()) for gram in inner_grams))
+            for token in candidates:
+                if query_token in token:
+                    matches.setdefault(token, INFIX_MATCH_BOOST)
+
+        if not matches and len(query_token) >= 4:
+            limit = _max_edits(query_token)
+            query_grams = _trigrams(query_token)
+            shared = defaultdict(int)
+            for gram in query_grams:
+                for token in self._trigram_postings.get(gram, ()):
+                    shared[token] += 1
+            # Each edit can destroy at most three trigrams
+            min_shared = len(query_grams) - 3 * limit
+            for token, count in shared.items():
+                if count >= min_shared and _edit_distance(query_token, token, limit) <= limit:
+                    matches[token] = FUZZY_MATCH_BOOST
+
+        return matches.items()
+
+    def _add_document(self, service_id, fingerprint):
+        doc_tokens = {}
+        for (field, field_weight), text in zip(SEARCH_FIELD_WEIGHTS, fingerprint):
+            for token in tokenize(text):
+                doc_tokens[token] = max(doc_tokens.get(token, 0), field_weight)
+
+        for token, weight in doc_tokens.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._vocabulary, token)
+                for gram in _trigrams(token):
+                    self._trigram_postings[gram].add(token)
+            postings[service_id] = weight
+
+        self._doc_tokens[service_id] = doc_tokens
+        self._fingerprints[service_id] = fingerprint
+
+    def _remove_document(self, service_id):
+        doc_tokens = self._doc_tokens.pop(service_id, None)
+        self._fingerprints.pop(service_id, None)
+        if not doc_tokens:
+            return
+        for token in doc_tokens:
+            postings = self._postings[token]
+            postings.pop(service_id, None)
+            if postings:
+                continue
+            del self._postings[token]
+            del self._vocabulary[bisect_left(self._vocabulary, token)]
+            for gram in _trigrams(token):
+                tokens = self._trigram_postings[gram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigram_postings[gram]
+
+
+service_index = ServiceSearchIndex()
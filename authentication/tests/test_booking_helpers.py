@@ -0,0 +1,83 @@
+import re
+from contextlib import nullcontext
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from authentication import booking_helpers
+
+
+class RecordingCursor:
+    """
+    Stands in for a MySQL cursor: records every INSERT and hands out ids
+    with gaps between them (as auto_increment_increment > 1 or concurrent
+    inserts would), so ids can only be known by reading lastrowid.
+    """
+
+    def __init__(self):
+        self.inserts = {}
+        self.lastrowid = None
+        self._next_id = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        table = re.search(r'INSERT INTO (\w+)', sql).group(1)
+        self._next_id[table] = self._next_id.get(table, 100) + 7
+        self.lastrowid = self._next_id[table]
+        self.inserts.setdefault(table, []).append((self.lastrowid, list(params or [])))
+
+    def executemany(self, sql, rows):
+        # mysqlclient falls back to one execute() per row for these statements
+        for row in rows:
+            self.execute(sql, row)
+
+
+class CommitBookingTests(SimpleTestCase):
+
+    def commit_cart(self, items):
+        cursor = RecordingCursor()
+        self.claims = []
+        with mock.patch.object(booking_helpers, 'connection') as connection, \
+                mock.patch.object(booking_helpers.transaction, 'atomic', nullcontext), \
+                mock.patch.object(booking_helpers.transaction, 'on_commit'), \
+                mock.patch.object(booking_helpers, 'claim_slot', side_effect=[11, 12, 13]), \
+                mock.patch.object(booking_helpers, 'attach_slot_claim',
+                                  side_effect=lambda *args: self.claims.append(args)), \
+                mock.patch.object(booking_helpers, 'adjust_dashboard'), \
+                mock.patch.object(booking_helpers, 'record_revenue'):
+            connection.cursor.return_value = cursor
+            result = booking_helpers.commit_booking(1, items, 'card', 'RCP100')
+        return cursor, result
+
+    def test_multi_item_cart_links_rows_by_their_own_ids(self):
+        items = [
+            {'day': date(2026, 5, 4), 'slot': '11:00 AM', 'service': None,
+             'service_name': 'Manicure', 'amount': Decimal('30.00')},
+            {'day': date(2026, 5, 4), 'slot': '1:00 PM', 'service': None,
+             'service_name': 'Pedicure', 'amount': Decimal('40.00')},
+            {'day': date(2026, 5, 5), 'slot': '2:30 PM', 'service': None,
+             'service_name': 'Facial', 'amount': Decimal('55.00')},
+        ]
+        cursor, (receipt_id, appointment_ids) = self.commit_cart(items)
+
+        payment_ids = [row_id for row_id, _ in cursor.inserts['PAYMENT']]
+        sales = cursor.inserts['SALES']
+        appointments = cursor.inserts['APPOINTMENT']
+        self.assertEqual(len(payment_ids), 3)
+        self.assertEqual([params[0] for _, params in sales], payment_ids)
+        self.assertEqual([params[2] for _, params in appointments], payment_ids)
+        self.assertEqual([params[4] for _, params in appointments], [row_id for row_id, _ in sales])
+        self.assertEqual(appointment_ids, [row_id for row_id, _ in appointments])
+        self.assertEqual([claim[-1] for claim in self.claims], appointment_ids)
+
+        (receipt_row_id, receipt), = cursor.inserts['RECEIPTS']
+        self.assertEqual(receipt_id, receipt_row_id)
+        self.assertEqual(receipt[1:4], [appointment_ids[0], payment_ids[0], sales[0][0]])
+        self.assertEqual(receipt[4], Decimal('125.00'))
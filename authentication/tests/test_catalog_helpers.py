@@ -0,0 +1,36 @@
+from unittest import mock
+
+from django.db import OperationalError, ProgrammingError
+from django.test import SimpleTestCase
+
+from authentication import catalog_helpers
+
+
+class ReadCatalogVersionTests(SimpleTestCase):
+
+    def read(self, cursor):
+        connection = mock.Mock()
+        connection.cursor.return_value.__enter__ = mock.Mock(return_value=cursor)
+        connection.cursor.return_value.__exit__ = mock.Mock(return_value=False)
+        with mock.patch.object(catalog_helpers, 'connection', connection):
+            return catalog_helpers._read_catalog_version()
+
+    def test_reads_the_version_row(self):
+        cursor = mock.Mock()
+        cursor.fetchone.return_value = (1700000000000001,)
+        self.assertEqual(self.read(cursor), 1700000000000001)
+
+    def test_missing_row_is_none_and_nothing_is_written(self):
+        cursor = mock.Mock()
+        cursor.fetchone.return_value = None
+        self.assertIsNone(self.read(cursor))
+        cursor.execute.assert_called_once()
+        self.assertTrue(cursor.execute.call_args[0][0].startswith('SELECT'))
+
+    def test_missing_table_is_none(self):
+        for error in (ProgrammingError(1146, "Table 'glamora.CATALOG_VERSION' doesn't exist"),
+                      OperationalError(2006, 'MySQL server has gone away')):
+            cursor = mock.Mock()
+            cursor.execute.side_effect = error
+            with self.subTest(error=type(error).__name__):
+                self.assertIsNone(self.read(cursor))
@@ -0,0 +1,142 @@
+from contextlib import nullcontext
+from unittest import mock
+
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.test import RequestFactory, SimpleTestCase
+
+from authentication import views
+from authentication.auth_helpers import build_admin, is_mobile_registered
+
+
+class IdentityCursor:
+    """Answers USER_IDENTITY lookups from a dict and records every other statement"""
+
+    def __init__(self, identities):
+        self.identities = identities
+        self.statements = []
+        self._row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        if 'FROM USER_IDENTITY' in sql:
+            self._row = self.identities.get(params[0])
+        else:
+            self.statements.append(' '.join(sql.split()))
+
+    def fetchone(self):
+        return self._row
+
+
+class IdentityTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.cursor = IdentityCursor({
+            '5550001': ('customer', 1),
+            '5550002': ('admin', 2),
+        })
+        connection = mock.Mock()
+        connection.cursor.return_value = self.cursor
+        for patcher in (
+            mock.patch('django.db.connection', connection),
+            mock.patch.object(views, 'connection', connection),
+            mock.patch.object(views.transaction, 'atomic', nullcontext),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class IsMobileRegisteredTests(IdentityTestCase):
+
+    def test_unknown_number_is_free(self):
+        self.assertFalse(is_mobile_registered('5559999'))
+
+    def test_number_of_a_customer_or_admin_is_taken(self):
+        self.assertTrue(is_mobile_registered('5550001'))
+        self.assertTrue(is_mobile_registered('5550002'))
+
+    def test_owner_keeps_their_own_number(self):
+        self.assertFalse(is_mobile_registered('5550001', 'customer', 1))
+        self.assertTrue(is_mobile_registered('5550001', 'admin', 1))
+
+
+class AdminUserMobileTests(IdentityTestCase):
+
+    def post(self, view, data):
+        request = RequestFactory().post('/', data)
+        request._dont_enforce_csrf_checks = True
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        request._cached_admin = build_admin(2, 'Ada', 'Admin', '5550002', 'owner')
+        response = view(request)
+        return response, [str(message) for message in get_messages(request)]
+
+    def test_add_rejects_a_registered_mobile(self):
+        for user_type, tab in (('customer', 'customers'), ('admin', 'admins')):
+            response, errors = self.post(views.admin_add_user_view, {
+                'user_type': user_type, 'first_name': 'New', 'last_name': 'User',
+                'mobile': '5550001', 'password': 'secret', 'role': 'manager',
+            })
+            self.assertEqual(response.status_code, 302)
+            self.assertTrue(response.url.endswith(f'?tab={tab}'))
+            self.assertEqual(errors, ['Mobile number already exists. Please use another number.'])
+        self.assertEqual(self.cursor.statements, [])
+
+    def test_edit_rejects_another_users_mobile(self):
+        response, errors = self.post(views.admin_edit_user_view, {
+            'user_type': 'customer', 'user_id': '1', 'first_name': 'Old', 'last_name': 'User',
+            'mobile': '5550002',
+        })
+        self.assertEqual(errors, ['Mobile number already exists. Please use another number.'])
+        self.assertEqual(self.cursor.statements, [])
+
+    def test_edit_keeps_own_mobile(self):
+        with mock.patch.object(views, 'bump_credential_version') as bump:
+            response, errors = self.post(views.admin_edit_user_view, {
+                'user_type': 'customer', 'user_id': '1', 'first_name': 'Old', 'last_name': 'User',
+                'mobile': '5550001',
+            })
+        self.assertEqual(errors, ['Customer updated successfully!'])
+        self.assertTrue(self.cursor.statements[0].startswith('UPDATE CUSTOMER'))
+        bump.assert_called_once()
+
+    def test_edit_rolls_back_when_the_version_bump_fails(self):
+        atomic = mock.MagicMock()
+        with mock.patch.object(views.transaction, 'atomic', return_value=atomic), \
+                mock.patch.object(views, 'bump_credential_version', side_effect=RuntimeError('lost')):
+            response, errors = self.post(views.admin_edit_user_view, {
+                'user_type': 'customer', 'user_id': '1', 'first_name': 'Old', 'last_name': 'User',
+                'mobile': '5550001', 'password': 'changed',
+            })
+        self.assertEqual(errors, ['Error updating customer: lost'])
+        # The UPDATE ran inside the atomic block, which saw the exception and rolls back
+        atomic.__enter__.assert_called_once()
+        self.assertIs(atomic.__exit__.call_args[0][0], RuntimeError)
+
+
+class ForgotPasswordTests(IdentityTestCase):
+
+    def test_password_reset_rolls_back_when_the_version_bump_fails(self):
+        request = RequestFactory().post('/', {
+            'save_password': '1', 'user_id': '1', 'user_type': 'customer',
+            'new_password': 'changed', 'confirm_password': 'changed',
+        })
+        request._dont_enforce_csrf_checks = True
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        atomic = mock.MagicMock()
+        with mock.patch.object(views.transaction, 'atomic', return_value=atomic), \
+                mock.patch.object(views, 'render', return_value=None) as render, \
+                mock.patch.object(views, 'bump_credential_version', side_effect=RuntimeError('lost')):
+            views.forgot_password_view(request)
+        self.assertTrue(self.cursor.statements[0].startswith('UPDATE CUSTOMER'))
+        atomic.__enter__.assert_called_once()
+        self.assertIs(atomic.__exit__.call_args[0][0], RuntimeError)
+        self.assertNotIn('password_updated', render.call_args[0][2])
+        self.assertEqual([str(message) for message in get_messages(request)],
+                         ['An error occurred while updating password. Please try again.'])
@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import date, time, timedelta
+
+from django.test import SimpleTestCase
+
+from authentication.pagination_helpers import (
+    decode_cursor, encode_cursor, keyset_condition, keyset_params,
+    parse_date, parse_time, split_page,
+)
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        value = encode_cursor(date(2026, 3, 1), time(9, 30), 42)
+        self.assertEqual(decode_cursor(value, parse_date, parse_time, int),
+                         (date(2026, 3, 1), time(9, 30), 42))
+
+    def test_time_column_read_as_timedelta(self):
+        value = encode_cursor(date(2026, 3, 1), timedelta(hours=14, minutes=5), 7)
+        self.assertEqual(value, '2026-03-01_14:05:00_7')
+        self.assertEqual(decode_cursor(value, parse_date, parse_time, int)[1], time(14, 5))
+
+    def test_missing_or_malformed_is_none(self):
+        parsers = (parse_date, parse_time, int)
+        for value in (None, '', '2026-03-01_09:30:00', '2026-03-01_09:30:00_7_8',
+                      '2026-13-01_09:30:00_7', '2026-03-01_9h_7', '2026-03-01_09:30:00_x'):
+            with self.subTest(value=value):
+                self.assertIsNone(decode_cursor(value, *parsers))
+
+
+class KeysetConditionTests(SimpleTestCase):
+    """Runs the generated WHERE clause against rows to check which come after the cursor"""
+
+    rows = [(d, t, i) for d in (1, 2, 3) for t in (1, 2) for i in (1, 2)]
+
+    def after(self, columns, cursor_values, descending):
+        db = sqlite3.connect(':memory:')
+        db.execute('CREATE TABLE t (a INT, b INT, c INT)')
+        db.executemany('INSERT INTO t VALUES (?, ?, ?)', self.rows)
+        where = keyset_condition(columns, descending).replace('%s', '?')
+        found = db.execute(f'SELECT a, b, c FROM t WHERE {where}',
+                           keyset_params(cursor_values)).fetchall()
+        db.close()
+        return sorted(found)
+
+    def test_descending_three_columns(self):
+        cursor = (2, 1, 2)
+        self.assertEqual(self.after(['a', 'b', 'c'], cursor, True),
+                         sorted(row for row in self.rows if row < cursor))
+
+    def test_ascending_three_columns(self):
+        cursor = (2, 1, 2)
+        self.assertEqual(self.after(['a', 'b', 'c'], cursor, False),
+                         sorted(row for row in self.rows if row > cursor))
+
+    def test_two_columns(self):
+        self.assertEqual(keyset_condition(['a', 'c']), '(a < %s OR (a = %s AND c < %s))')
+        self.assertEqual(keyset_params((5, 9)), [5, 5, 9])
+
+
+class SplitPageTests(SimpleTestCase):
+
+    def test_extra_row_gives_next_cursor(self):
+        rows = [(date(2026, 3, 3), 3), (date(2026, 3, 2), 2), (date(2026, 3, 1), 1)]
+        page, next_cursor = split_page(rows, 2, lambda row: row)
+        self.assertEqual(page, rows[:2])
+        self.assertEqual(next_cursor, '2026-03-02_2')
+
+    def test_last_page_has_no_cursor(self):
+        rows = [(date(2026, 3, 1), 1)]
+        self.assertEqual(split_page(rows, 2, lambda row: row), (rows, None))
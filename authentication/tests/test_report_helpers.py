@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from authentication import report_helpers
+
+
+class StatementCursor:
+    """Records (sql, params) for every statement"""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((' '.join(sql.split()), list(params or [])))
+
+    def executemany(self, sql, rows):
+        for row in rows:
+            self.execute(sql, row)
+
+
+class AdjustDashboardTests(SimpleTestCase):
+
+    def adjust(self, slot, **deltas):
+        cursor = StatementCursor()
+        with mock.patch.object(report_helpers.random, 'randint', return_value=slot):
+            report_helpers.adjust_dashboard(cursor, **deltas)
+        return cursor.statements
+
+    def test_totals_go_to_a_slot_row_not_the_recount_row(self):
+        statements = self.adjust(5, customers=1, sales=Decimal('20.00'))
+        self.assertEqual(len(statements), 1)
+        sql, params = statements[0]
+        self.assertIn('INSERT INTO DASHBOARD_SUMMARY', sql)
+        self.assertIn('ON DUPLICATE KEY UPDATE', sql)
+        self.assertEqual(params, [report_helpers.DASHBOARD_SUMMARY_ID + 5, 1, 0, Decimal('20.00')])
+
+    def test_slot_is_taken_before_the_day_rows_in_date_order(self):
+        statements = self.adjust(
+            1, appointment_days={date(2026, 3, 2): 1, date(2026, 3, 1): -1}
+        )
+        self.assertIn('INSERT INTO DASHBOARD_SUMMARY', statements[0][0])
+        self.assertEqual(statements[0][1][1:3], [0, 0])
+        self.assertEqual([params[0] for _, params in statements[1:]],
+                         [date(2026, 3, 1), date(2026, 3, 2)])
+
+    def test_no_deltas_writes_nothing(self):
+        self.assertEqual(self.adjust(1, appointment_days={date(2026, 3, 1): 0}), [])
+
+
+class RevenueSegmentsTests(SimpleTestCase):
+
+    def segments(self, first_day, last_day, group_by='service'):
+        return report_helpers._revenue_segments(first_day, last_day, group_by)
+
+    def test_partial_months_at_both_ends(self):
+        self.assertEqual(self.segments(date(2026, 1, 31), date(2026, 4, 2)), [
+            ('REVENUE_DAILY', 'Date', date(2026, 1, 31), date(2026, 1, 31)),
+            ('REVENUE_MONTHLY', 'Month', date(2026, 2, 1), date(2026, 3, 1)),
+            ('REVENUE_DAILY', 'Date', date(2026, 4, 1), date(2026, 4, 2)),
+        ])
+
+    def test_whole_month_reads_only_the_monthly_rollup(self):
+        self.assertEqual(self.segments(date(2026, 2, 1), date(2026, 2, 28)), [
+            ('REVENUE_MONTHLY', 'Month', date(2026, 2, 1), date(2026, 2, 1)),
+        ])
+
+    def test_within_one_month_reads_only_the_daily_rollup(self):
+        self.assertEqual(self.segments(date(2026, 1, 5), date(2026, 1, 20)), [
+            ('REVENUE_DAILY', 'Date', date(2026, 1, 5), date(2026, 1, 20)),
+        ])
+
+    def test_month_crossing_without_a_whole_month(self):
+        self.assertEqual(self.segments(date(2026, 1, 20), date(2026, 2, 10)), [
+            ('REVENUE_DAILY', 'Date', date(2026, 1, 20), date(2026, 2, 10)),
+        ])
+
+    def test_year_boundary(self):
+        self.assertEqual(self.segments(date(2026, 12, 15), date(2027, 2, 1)), [
+            ('REVENUE_DAILY', 'Date', date(2026, 12, 15), date(2026, 12, 31)),
+            ('REVENUE_MONTHLY', 'Month', date(2027, 1, 1), date(2027, 1, 1)),
+            ('REVENUE_DAILY', 'Date', date(2027, 2, 1), date(2027, 2, 1)),
+        ])
+
+    def test_group_by_day_always_reads_daily_rows(self):
+        self.assertEqual(self.segments(date(2026, 1, 1), date(2026, 3, 31), 'day'), [
+            ('REVENUE_DAILY', 'Date', date(2026, 1, 1), date(2026, 3, 31)),
+        ])
+
+    def test_every_day_is_read_exactly_once(self):
+        start = date(2027, 12, 1)
+        for first_offset in range(0, 70, 3):
+            for length in range(0, 120, 7):
+                first_day = start + timedelta(days=first_offset)
+                last_day = first_day + timedelta(days=length)
+                covered = []
+                for table, _, segment_start, segment_end in self.segments(first_day, last_day):
+                    if table == 'REVENUE_MONTHLY':
+                        self.assertEqual(segment_start.day, 1)
+                        segment_end = report_helpers._month(
+                            segment_end + timedelta(days=32)) - timedelta(days=1)
+                    day = segment_start
+                    while day <= segment_end:
+                        covered.append(day)
+                        day += timedelta(days=1)
+                with self.subTest(first_day=first_day, last_day=last_day):
+                    self.assertEqual(covered, [first_day + timedelta(days=n) for n in range(length + 1)])
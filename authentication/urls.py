@@ -10,7 +10,10 @@ urlpatterns = [
     path('home/', views.home_view, name='home'),
     path('services/', views.services_view, name='services'),
     path('search/', views.search_results_view, name='search'),
+    path('search/suggestions/', views.search_suggestions_view, name='search_suggestions'),
     path('booking/', views.booking_view, name='booking'),
+    path('booking/availability/', views.booking_availability_view, name='booking_availability'),
+    path('booking/cart/remove/', views.booking_cart_remove_view, name='booking_cart_remove'),
     path('payment/', views.payment_view, name='payment'),
     path('address/', views.address_view, name='address'),
     path('booking-confirmation/<int:receipt_id>/', views.booking_confirmation_view, name='booking_confirmation'),
@@ -31,8 +34,14 @@ urlpatterns = [
     path('admin/home/', views.admin_home_view, name='admin_home'),
     path('admin/services/', views.admin_services_view, name='admin_services'),
     path('admin/users/', views.admin_users_view, name='admin_users'),
+    path('admin/users/data/<str:tab>/', views.admin_users_data_view, name='admin_users_data'),
     path('admin/appointments/', views.admin_appointments_view, name='admin_appointments'),
+    path('admin/appointments/data/', views.admin_appointments_data_view, name='admin_appointments_data'),
     path('admin/sales/', views.admin_sales_view, name='admin_sales'),
+    path('admin/sales/data/', views.admin_sales_data_view, name='admin_sales_data'),
+    path('admin/sales/<int:sales_id>/refund/', views.admin_refund_sale_view, name='admin_refund_sale'),
+    path('admin/analytics/revenue/', views.admin_revenue_analytics_view, name='admin_revenue_analytics'),
+    path('admin/export/<str:dataset>/', views.admin_export_view, name='admin_export'),
     # Service management
     path('admin/add-service/', views.admin_add_service_view, name='admin_add_service'),
     path('admin/edit-service/', views.admin_edit_service_view, name='admin_edit_service'),
@@ -1,26 +1,83 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_protect
-from django.http import JsonResponse, HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, FileResponse
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.formats import date_format
 from django.db import connection, OperationalError, transaction
-from .models import Customer, Service
+from .models import Service
 from .auth_helpers import (
     get_customer_from_session, customer_login, customer_logout, customer_required,
-    get_admin_from_session, admin_login, admin_logout, admin_required
+    get_admin_from_session, admin_login, admin_logout, admin_required,
+    bump_credential_version, update_customer_snapshot,
+    lookup_identity_by_mobile, is_mobile_registered
 )
-from datetime import datetime, date, time, timedelta
+from .catalog_helpers import get_catalog, bump_catalog_version, resolve_service_image
+from .search_helpers import service_index
+from .receipt_helpers import (
+    next_receipt_number, receipt_pdf_digest, cached_receipt_pdf, remove_receipt_pdf, queue_receipt_pdf,
+)
+from .report_helpers import (
+    REVENUE_GROUPS, adjust_dashboard, appointment_days_for, get_dashboard_summary,
+    record_revenue, sale_revenue_lines, reassign_sale_revenue, revenue_breakdown, revenue_totals
+)
+from .export_helpers import EXPORTS, EXPORT_FORMATS, stream_export
+from .pagination_helpers import (
+    decode_cursor, keyset_condition, keyset_params, split_page, parse_date, parse_time, parse_datetime
+)
+from .booking_helpers import (
+    AVAILABILITY_MAX_DAYS, SLOT_TIMES, booking_window, get_availability,
+    hold_slot, renew_slot_holds, release_slot_hold, claim_slot, attach_slot_claim, release_slot_claims,
+    commit_booking, invalidate_availability, invalidate_roster, SlotConflictError,
+    new_booking_token, is_booking_token, find_booking_request, DuplicateBookingError
+)
+from datetime import datetime, date, time, timedelta, timezone
 from collections import OrderedDict
 from decimal import Decimal
 import json
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+import logging
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
 
 CATEGORY_ORDER = ['Deals', 'Hair', 'Waxing', 'Threading', 'Facial', 'Nails']
+SEARCH_SUGGESTIONS_LIMIT = 5
+SEARCH_SUGGESTIONS_MAX_LIMIT = 20
+AVAILABILITY_DEFAULT_DAYS = 7
+BOOKING_CART_MAX_ITEMS = 5
+BOOKINGS_PAGE_SIZE = 12
+RECEIPTS_PAGE_SIZE = 12
+PROFILE_RECENT_BOOKINGS = 5
+ADMIN_APPOINTMENTS_PAGE_SIZE = 50
+ADMIN_USERS_PAGE_SIZE = 25
+ADMIN_SALES_PAGE_SIZE = 50
+APPOINTMENT_STATUSES = ('scheduled', 'confirmed', 'in_progress', 'completed', 'cancelled')
+PAYMENT_STATUSES = ('pending', 'completed', 'failed', 'refunded')
+
+# Per-tab listing: table, id and phone columns, and the columns each row shows
+ADMIN_USER_LISTS = {
+    'customers': {
+        'table': 'CUSTOMER',
+        'id_column': 'Customer_ID',
+        'mobile_column': 'Mobile_No',
+        'columns': 'Customer_ID, First_Name, Last_Name, Mobile_No, Address, created_at',
+    },
+    'employees': {
+        'table': 'EMPLOYEE',
+        'id_column': 'Employee_ID',
+        'mobile_column': 'Phone',
+        'columns': 'Employee_ID, First_Name, Last_Name, Phone, Skills, Rating, Availability, created_at',
+    },
+    'admins': {
+        'table': 'ADMIN',
+        'id_column': 'Admin_ID',
+        'mobile_column': 'Mobile_No',
+        'columns': 'Admin_ID, First_Name, Last_Name, Mobile_No, Role, created_at',
+    },
+}
 
 
 def _format_price(value):
@@ -30,64 +87,8 @@ def _format_price(value):
 
 
 def _get_service_image(service_name):
-    """Map service name to image filename"""
-    import os
-    from django.conf import settings
-    
-    # Normalize service name for matching (lowercase, remove special chars)
-    normalized_name = service_name.lower().strip()
-    
-    # Comprehensive mapping of service name keywords to image filenames
-    # Order matters - more specific matches should come first
-    image_mapping = [
-        # Threading services
-        ('eyebrow threading', 'eyebrow threading.jpeg'),
-        ('facial threading', 'face threading.jpeg'),
-        ('threading face', 'threading face.jpg'),
-        ('threading', 'Threading.jpeg'),
-        
-        # Facial services
-        ('deep cleansing facial', 'Deep Cleaning Facial.jpeg'),
-        ('deep cleaning facial', 'Deep Cleaning Facial.jpeg'),
-        ('facial treatment', 'Facial Treatment.jpg'),
-        ('hydra facial', 'Hydra Facial.jpeg'),
-        ('facial', 'Facial.jpeg'),
-        
-        # Hair services
-        ('hair color', 'hair color.jpg'),
-        ('hair colour', 'hair color.jpg'),
-        ('hair coloring', 'hair color.jpg'),
-        ('hair cut', 'hair cut img.webp'),
-        ('haircut', 'hair cut img.webp'),
-        ('hair wash', 'Hair wash.jpg'),
-        ('styling', 'hair cut img.webp'),
-        
-        # Nail services
-        ('nail art', 'Nails Art.jpeg'),
-        ('nails art', 'Nails Art.jpeg'),
-        ('manicure & pedicure', 'Pedicure & manicure.jpeg'),
-        ('pedicure & manicure', 'Pedicure & manicure.jpeg'),
-        ('manicure', 'Manicure.jpeg'),
-        ('pedicure', 'Pedicure.jpeg'),
-        ('nails', 'Nails.jpeg'),
-        
-        # Waxing services
-        ('full body wax', 'waxing.jpg'),
-        ('full body waxing', 'waxing.jpg'),
-        ('waxing', 'waxing.jpg'),
-    ]
-    
-    # Try to find matching image (check in order for most specific match first)
-    for key, image_file in image_mapping:
-        if key in normalized_name:
-            image_path = os.path.join(settings.BASE_DIR, 'Assets', 'service images', image_file)
-            if os.path.exists(image_path):
-                # Return URL path for serving images
-                from urllib.parse import quote
-                encoded_filename = quote(image_file)
-                return f'/service-images/{encoded_filename}'
-    
-    return None
+    """Map service name to image URL"""
+    return resolve_service_image(service_name)
 
 
 def _service_to_dict(service):
@@ -99,16 +100,27 @@ def _service_to_dict(service):
         'price': _format_price(service.Price),
         'original_price': _format_price(service.Original_Price) if getattr(service, 'Original_Price', None) else None,
         'discount': getattr(service, 'Discount_Label', None),
+        'duration': service.Duration_Minutes,
         'image': _get_service_image(service.ServiceName),
     }
     return data
 
 
-def _get_services_data():
+def _build_services_data():
     services = list(Service.objects.filter(is_active=True).order_by('Category', 'ServiceName'))
     return [_service_to_dict(service) for service in services]
 
 
+def _get_catalog():
+    """Catalog snapshot for the current version (rebuilt only after admin service changes)"""
+    return get_catalog(_build_services_data)
+
+
+def _get_services_data():
+    # The dicts are shared by every request - callers must not mutate them
+    return list(_get_catalog().services)
+
+
 def _format_time_slot(value):
     if isinstance(value, time):
         return value.strftime('%I:%M %p')
@@ -117,8 +129,19 @@ def _format_time_slot(value):
     return value or ''
 
 
-def _fetch_appointments_for_customer(customer_id):
-    sql = """
+def _fetch_appointments_for_customer(customer_id, page_size=BOOKINGS_PAGE_SIZE, after=None):
+    """
+    One page of the customer's appointments, newest first, and the cursor
+    of the next page (None on the last page). Keyset pagination on
+    (Date, Time, Appointment_ID) over idx_customer_date_time, so every page
+    costs the same however long the history is.
+    """
+    params = [customer_id]
+    keyset = ''
+    if after:
+        keyset = 'AND ' + keyset_condition(['a.Date', 'a.Time', 'a.Appointment_ID'])
+        params.extend(keyset_params(after))
+    sql = f"""
         SELECT a.Appointment_ID,
                COALESCE(s.ServiceName, 'Scheduled Service') AS service_name,
                COALESCE(s.ServiceName, 'Scheduled Service appointment') AS service_description,
@@ -136,15 +159,17 @@ def _fetch_appointments_for_customer(customer_id):
         LEFT JOIN SALES s ON a.Sales_ID = s.Sales_ID
         LEFT JOIN PAYMENT p ON a.Payment_ID = p.Payment_ID
         LEFT JOIN EMPLOYEE e ON a.Employee_ID = e.Employee_ID
-        WHERE a.Customer_ID = %s
-        ORDER BY a.Date DESC, a.Time DESC
+        WHERE a.Customer_ID = %s {keyset}
+        ORDER BY a.Date DESC, a.Time DESC, a.Appointment_ID DESC
+        LIMIT %s
     """
     try:
         with connection.cursor() as cursor:
-            cursor.execute(sql, [customer_id])
+            cursor.execute(sql, params + [page_size + 1])
             rows = cursor.fetchall()
     except OperationalError:
-        return []
+        return [], None
+    rows, next_cursor = split_page(rows, page_size, lambda row: (row[4], row[5], row[0]))
 
     bookings = []
     for row in rows:
@@ -176,30 +201,43 @@ def _fetch_appointments_for_customer(customer_id):
             'employee_phone': employee_phone or 'N/A',
             'employee_rating': float(employee_rating) if employee_rating else None,
         })
-    return bookings
+    return bookings, next_cursor
 
 
-def _fetch_receipts_for_customer(customer_id):
-    sql = """
+def _fetch_receipts_for_customer(customer_id, page_size=RECEIPTS_PAGE_SIZE, after=None):
+    """
+    One page of the customer's receipts, newest first, and the cursor of
+    the next page. Keyset pagination on (Receipt_Date, Receipt_ID) over
+    idx_customer_receipt_date.
+    """
+    params = [customer_id]
+    keyset = ''
+    if after:
+        keyset = 'AND ' + keyset_condition(['r.Receipt_Date', 'r.Receipt_ID'])
+        params.extend(keyset_params(after))
+    sql = f"""
         SELECT r.Receipt_ID,
                COALESCE(s.ServiceName, 'Appointment Service') AS service_name,
                r.Amount,
                a.Date,
                a.Time,
                COALESCE(a.Status, 'completed') AS status,
-               r.created_at
+               r.created_at,
+               r.Receipt_Date
         FROM RECEIPTS r
         LEFT JOIN APPOINTMENT a ON r.Appointment_ID = a.Appointment_ID
         LEFT JOIN SALES s ON r.Sales_ID = s.Sales_ID
-        WHERE r.Customer_ID = %s
-        ORDER BY a.Date DESC, r.Receipt_ID DESC
+        WHERE r.Customer_ID = %s {keyset}
+        ORDER BY r.Receipt_Date DESC, r.Receipt_ID DESC
+        LIMIT %s
     """
     try:
         with connection.cursor() as cursor:
-            cursor.execute(sql, [customer_id])
+            cursor.execute(sql, params + [page_size + 1])
             rows = cursor.fetchall()
     except OperationalError:
-        return []
+        return [], None
+    rows, next_cursor = split_page(rows, page_size, lambda row: (row[7], row[0]))
 
     receipts = []
     for row in rows:
@@ -214,7 +252,7 @@ def _fetch_receipts_for_customer(customer_id):
             'created_at': row[6] or row[3],
             'service_image': _get_service_image(service_name),
         })
-    return receipts
+    return receipts, next_cursor
 
 
 def _fetch_addresses_for_customer(customer):
@@ -278,43 +316,17 @@ def login_view(request):
         mobile = ''.join(filter(str.isdigit, mobile))
         
         try:
-            db_executor = connection.cursor()
-            
-            db_executor.execute("SELECT Customer_ID, First_Name, Last_Name, Mobile_No, Password, Address FROM CUSTOMER WHERE Mobile_No = %s", [mobile])
-            customer_row = db_executor.fetchone()
+            found_type, user = lookup_identity_by_mobile(mobile)
             
-            if customer_row:
-                stored_password = customer_row[4]
-                if stored_password == password:
-                    customer = Customer()
-                    customer.Customer_ID = customer_row[0]
-                    customer.First_Name = customer_row[1]
-                    customer.Last_Name = customer_row[2]
-                    customer.Mobile_No = customer_row[3]
-                    customer.Password = customer_row[4]
-                    customer.Address = customer_row[5] if len(customer_row) > 5 else None
-                    
-                    customer_login(request, customer)
+            if user is not None and user.Password == password:
+                if found_type == 'customer':
+                    customer_login(request, user)
                     messages.success(request, 'Login successful!')
                     return redirect('home')
-            
-            db_executor.execute("SELECT Admin_ID, First_Name, Last_Name, Mobile_No, Role, Password FROM ADMIN WHERE Mobile_No = %s", [mobile])
-            admin_row = db_executor.fetchone()
-            
-            if admin_row:
-                stored_password = admin_row[5]
-                if stored_password == password:
-                    admin = type('Admin', (), {})()
-                    admin.Admin_ID = admin_row[0]
-                    admin.First_Name = admin_row[1]
-                    admin.Last_Name = admin_row[2]
-                    admin.Mobile_No = admin_row[3]
-                    admin.Role = admin_row[4]
-                    admin.Password = admin_row[5]
-                    
-                    admin_login(request, admin)
-                    messages.success(request, 'Admin login successful!')
-                    return redirect(reverse('admin_home'))
+                
+                admin_login(request, user)
+                messages.success(request, 'Admin login successful!')
+                return redirect(reverse('admin_home'))
             
             messages.error(request, 'Invalid mobile number or password.')
         except Exception:
@@ -344,43 +356,29 @@ def forgot_password_view(request):
                 return render(request, 'authentication/forgot_password.html', {'user_data': None, 'mobile_number': None, 'user_type': None})
             
             try:
-                with connection.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT Customer_ID, First_Name, Last_Name, Mobile_No 
-                        FROM CUSTOMER 
-                        WHERE Mobile_No = %s
-                    """, [mobile])
-                    row = cursor.fetchone()
-                    
-                    if row:
-                        user_data = {
-                            'user_id': row[0],
-                            'first_name': row[1],
-                            'last_name': row[2],
-                            'mobile_no': row[3]
-                        }
-                        user_type = 'customer'
-                        mobile_number = mobile
-                    else:
-                        cursor.execute("""
-                            SELECT Admin_ID, First_Name, Last_Name, Mobile_No, Role
-                            FROM ADMIN 
-                            WHERE Mobile_No = %s
-                        """, [mobile])
-                        row = cursor.fetchone()
-                        
-                        if row:
-                            user_data = {
-                                'user_id': row[0],
-                                'first_name': row[1],
-                                'last_name': row[2],
-                                'mobile_no': row[3],
-                                'role': row[4] if len(row) > 4 else None
-                            }
-                            user_type = 'admin'
-                            mobile_number = mobile
-                        else:
-                            messages.error(request, 'Mobile number not found. Please check and try again.')
+                found_type, user = lookup_identity_by_mobile(mobile)
+                
+                if found_type == 'customer':
+                    user_data = {
+                        'user_id': user.Customer_ID,
+                        'first_name': user.First_Name,
+                        'last_name': user.Last_Name,
+                        'mobile_no': user.Mobile_No
+                    }
+                    user_type = 'customer'
+                    mobile_number = mobile
+                elif found_type == 'admin':
+                    user_data = {
+                        'user_id': user.Admin_ID,
+                        'first_name': user.First_Name,
+                        'last_name': user.Last_Name,
+                        'mobile_no': user.Mobile_No,
+                        'role': user.Role
+                    }
+                    user_type = 'admin'
+                    mobile_number = mobile
+                else:
+                    messages.error(request, 'Mobile number not found. Please check and try again.')
             except Exception:
                 messages.error(request, 'An error occurred. Please try again.')
         
@@ -401,11 +399,13 @@ def forgot_password_view(request):
             try:
                 with connection.cursor() as cursor:
                     if user_type == 'customer':
-                        cursor.execute("""
-                            UPDATE CUSTOMER 
-                            SET Password = %s, updated_at = NOW()
-                            WHERE Customer_ID = %s
-                        """, [new_password, user_id])
+                        with transaction.atomic():
+                            cursor.execute("""
+                                UPDATE CUSTOMER 
+                                SET Password = %s, updated_at = NOW()
+                                WHERE Customer_ID = %s
+                            """, [new_password, user_id])
+                            bump_credential_version(cursor, user_id)
                     elif user_type == 'admin':
                         cursor.execute("""
                             UPDATE ADMIN 
@@ -454,9 +454,7 @@ def signup_view(request):
             return render(request, 'authentication/signup.html')
         
         try:
-            db_executor = connection.cursor()
-            db_executor.execute("SELECT Customer_ID FROM CUSTOMER WHERE Mobile_No = %s", [mobile])
-            if db_executor.fetchone():
+            if is_mobile_registered(mobile):
                 messages.error(request, 'User already exists with this mobile number. Please login.')
                 return render(request, 'authentication/signup.html')
         except Exception:
@@ -471,6 +469,7 @@ def signup_view(request):
                     INSERT INTO CUSTOMER (First_Name, Last_Name, Mobile_No, Password, Address, created_at, updated_at)
                     VALUES (%s, %s, %s, %s, %s, NOW(), NOW())
                 """, [first_name, last_name, mobile, password, address if address else None])
+                adjust_dashboard(db_executor, customers=1)
             
             
             messages.success(request, 'User added successfully!')
@@ -505,14 +504,9 @@ def home_view(request):
     request.customer = customer
     services_data = _get_services_data()
     popular_services = services_data[:8]
-    search_json = json.dumps(
-        [{'name': service['name'], 'price': service['price']} for service in services_data],
-        ensure_ascii=False
-    )
     context = {
         'popular_services': popular_services,
         'total_services': len(services_data),
-        'search_suggestions_json': search_json,
         'categories': CATEGORY_ORDER,
     }
     return render(request, 'authentication/home.html', context)
@@ -528,15 +522,9 @@ def services_view(request):
         ]
         if category_services:
             services_by_category[category] = category_services
-
-    search_json = json.dumps(
-        [{'name': service['name'], 'price': service['price']} for service in services_data],
-        ensure_ascii=False
-    )
-
+    
     context = {
         'services_by_category': services_by_category,
-        'search_suggestions_json': search_json,
     }
     
     return render(request, 'authentication/services.html', context)
@@ -548,55 +536,78 @@ def search_results_view(request):
     
     services_data = _get_services_data()
     if query:
-        filtered_services = [
-            service for service in services_data
-            if query.lower() in service['name'].lower()
-        ]
+        filtered_services = service_index.search(query)
     else:
         filtered_services = services_data
-
-    search_json = json.dumps(
-        [{'name': service['name'], 'price': service['price']} for service in services_data],
-        ensure_ascii=False
-    )
     
     context = {
         'query': query,
         'services': filtered_services,
         'results_count': len(filtered_services),
-        'search_suggestions_json': search_json,
     }
     
     return render(request, 'authentication/search_results.html', context)
 
 
+def _suggestions_etag(request):
+    version = _get_catalog().version
+    return f'catalog-{version}' if version is not None else None
+
+
+def _suggestions_last_modified(request):
+    version = _get_catalog().version
+    if version is None:
+        return None
+    # The catalog version is the microsecond timestamp of the last service change
+    return datetime.fromtimestamp(version / 1e6, tz=timezone.utc)
+
+
+@customer_required
+@cache_control(private=True, max_age=300)
+@condition(etag_func=_suggestions_etag, last_modified_func=_suggestions_last_modified)
+def search_suggestions_view(request):
+    """Typeahead suggestions, revalidated against the catalog version"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = int(request.GET.get('limit', SEARCH_SUGGESTIONS_LIMIT))
+    except ValueError:
+        limit = SEARCH_SUGGESTIONS_LIMIT
+    limit = max(1, min(limit, SEARCH_SUGGESTIONS_MAX_LIMIT))
+
+    if query:
+        _get_catalog()
+        services = service_index.search(query, limit=limit)
+    else:
+        services = _get_services_data()[:limit]
+
+    return JsonResponse({
+        'suggestions': [{'name': service['name'], 'price': service['price']} for service in services],
+    })
+
+
 def logout_view(request):
     customer_logout(request)
     messages.success(request, 'You have been logged out successfully.')
     return redirect('login')
 
 
-def _get_booked_time_slots_for_customer(customer_id, exclude_appointment_id=None):
-    """Get booked time slots for a customer grouped by date"""
+def _get_booked_time_slots_for_customer(customer_id, exclude_appointment_id=None, first_day=None):
+    """Get the customer's booked time slots inside the booking window, grouped by date"""
+    first_day, last_day = booking_window(first_day)
+    # Slots come back already formatted like the booking page labels ('1:00 PM');
+    # the (Customer_ID, Status, Date, Time) index covers the whole lookup
+    sql = """
+        SELECT DATE_FORMAT(Date, '%%Y-%%m-%%d'), TIME_FORMAT(Time, '%%l:%%i %%p')
+        FROM APPOINTMENT
+        WHERE Customer_ID = %s
+        AND Status IN ('confirmed', 'scheduled')
+        AND Date BETWEEN %s AND %s
+    """
+    params = [customer_id, first_day, last_day]
     if exclude_appointment_id:
-        sql = """
-            SELECT Date, Time
-            FROM APPOINTMENT
-            WHERE Customer_ID = %s
-            AND Appointment_ID != %s
-            AND Status IN ('confirmed', 'scheduled')
-            ORDER BY Date, Time
-        """
-        params = [customer_id, exclude_appointment_id]
-    else:
-        sql = """
-            SELECT Date, Time
-            FROM APPOINTMENT
-            WHERE Customer_ID = %s
-            AND Status IN ('confirmed', 'scheduled')
-            ORDER BY Date, Time
-        """
-        params = [customer_id]
+        sql += " AND Appointment_ID != %s"
+        params.append(exclude_appointment_id)
+    sql += " ORDER BY Date, Time"
     try:
         with connection.cursor() as cursor:
             cursor.execute(sql, params)
@@ -606,50 +617,108 @@ def _get_booked_time_slots_for_customer(customer_id, exclude_appointment_id=None
     
     # Group by date
     booked_slots = {}
-    for row in rows:
-        date_str = str(row[0])  # Date as string (YYYY-MM-DD format)
-        time_obj = row[1]  # Time object
-        
-        # Normalize time to match display format used in booking template
-        # Booking template uses: '11:00 AM', '1:00 PM' (no leading zero for single-digit hours)
-        if isinstance(time_obj, time):
-            # Format: "11:00 AM" or "1:00 PM" (remove leading zero from hour)
-            hour = time_obj.hour
-            minute = time_obj.minute
-            am_pm = 'AM' if hour < 12 else 'PM'
-            hour_12 = hour if hour <= 12 else hour - 12
-            if hour_12 == 0:
-                hour_12 = 12
-            # Remove leading zero from hour to match template format
-            time_str = f"{hour_12}:{minute:02d} {am_pm}"
-        elif isinstance(time_obj, str):
-            # If it's already a string, try to normalize it
-            try:
-                # Handle formats like "11:00:00" or "11:00 AM" or "01:00 PM"
-                if ':' in time_obj:
-                    time_part = time_obj.split()[0] if ' ' in time_obj else time_obj
-                    parts = time_part.split(':')
-                    hour = int(parts[0])
-                    minute = int(parts[1]) if len(parts) > 1 else 0
-                    am_pm = 'AM' if hour < 12 else 'PM'
-                    hour_12 = hour if hour <= 12 else hour - 12
-                    if hour_12 == 0:
-                        hour_12 = 12
-                    time_str = f"{hour_12}:{minute:02d} {am_pm}"
-                else:
-                    time_str = time_obj
-            except:
-                time_str = str(time_obj)
-        else:
-            time_str = str(time_obj)
-        
-        if date_str not in booked_slots:
-            booked_slots[date_str] = []
-        booked_slots[date_str].append(time_str)
-    
+    for date_str, time_str in rows:
+        booked_slots.setdefault(date_str, []).append(time_str)
     return booked_slots
 
 
+def _get_catalog_service(service_name):
+    """Catalog dict for an active service by name (None if unknown)"""
+    return _get_catalog().by_name.get(service_name)
+
+
+def _booking_page_url(pending_booking):
+    """Booking page for the service of a pending booking"""
+    booking_query = urlencode({
+        'service': pending_booking['service_name'],
+        'price': pending_booking['service_price'],
+        'description': pending_booking['service_description'],
+    })
+    return f"{reverse('booking')}?{booking_query}"
+
+
+def _renew_slot_hold(request):
+    """Keep the pending booking's slot reserved while the customer is still checking out"""
+    try:
+        renew_slot_holds(request.customer.Customer_ID)
+    except OperationalError:
+        # The checkout claim still arbitrates the slot if the hold lapses
+        pass
+
+
+def _parse_price(value):
+    """'$1,234.50' -> Decimal('1234.50') (zero when unreadable)"""
+    try:
+        return Decimal((value or '').replace('$', '').replace(',', ''))
+    except (ArithmeticError, ValueError):
+        return Decimal('0.00')
+
+
+def _cart_key(item):
+    return (item.get('service_name'), item.get('booking_date'), item.get('booking_time'))
+
+
+def _get_booking_cart(request):
+    """
+    Bookings waiting for checkout: the services added to the cart plus the
+    current selection (just the pending booking when nothing was added)
+    """
+    cart = list(request.session.get('booking_cart') or [])
+    pending_booking = request.session.get('pending_booking')
+    if pending_booking and _cart_key(pending_booking) not in {_cart_key(item) for item in cart}:
+        cart.append(pending_booking)
+    for item in cart:
+        booking_day = _parse_booking_date(item['booking_date'])
+        item['formatted_date'] = booking_day.strftime('%A, %B %d, %Y') if booking_day else item['booking_date']
+    return cart
+
+
+def _cart_total(cart):
+    return _format_price(sum((_parse_price(item['service_price']) for item in cart), Decimal('0.00')))
+
+
+def _clear_booking_session(request):
+    for key in ('pending_booking', 'payment_data', 'booking_cart'):
+        request.session.pop(key, None)
+
+
+def _find_booked_receipt(request, booking_token):
+    """Receipt of the booking already made with this checkout token, if any"""
+    try:
+        return find_booking_request(booking_token, request.customer.Customer_ID)
+    except OperationalError:
+        return None
+
+
+def _parse_booking_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+@customer_required
+def booking_availability_view(request):
+    """Open time slots per date for a service across a date range"""
+    earliest, latest = booking_window()
+    first_day = _parse_booking_date(request.GET.get('start'))
+    if first_day is None or first_day < earliest:
+        first_day = earliest
+    try:
+        days = int(request.GET.get('days', AVAILABILITY_DEFAULT_DAYS))
+    except ValueError:
+        days = AVAILABILITY_DEFAULT_DAYS
+    days = max(1, min(days, AVAILABILITY_MAX_DAYS, (latest - first_day).days + 1))
+
+    service = _get_catalog_service(request.GET.get('service', ''))
+    availability = get_availability(first_day, first_day + timedelta(days=days - 1), service)
+    return JsonResponse({
+        'success': True,
+        'slots': list(SLOT_TIMES),
+        'availability': availability,
+    })
+
+
 @customer_required
 def booking_view(request):
     service_name = request.GET.get('service', '')
@@ -662,20 +731,71 @@ def booking_view(request):
         booking_time = request.POST.get('booking_time')
         
         if booking_date and booking_time:
+            booking_day = _parse_booking_date(booking_date)
+            earliest, latest = booking_window()
+            if booking_day is None or not earliest <= booking_day <= latest:
+                return JsonResponse({'success': False, 'error': 'Please select a valid date'})
+
+            add_to_cart = request.POST.get('add_to_cart') == '1'
+            cart = list(request.session.get('booking_cart') or [])
+            for item in cart:
+                if (item['booking_date'], item['booking_time']) == (booking_date, booking_time):
+                    return JsonResponse({
+                        'success': False,
+                        'error': f"{item['service_name']} is already in your cart at this time.",
+                    })
+            if add_to_cart and len(cart) >= BOOKING_CART_MAX_ITEMS:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Your cart can hold up to {BOOKING_CART_MAX_ITEMS} services. Please check out first.',
+                })
+
+            # Hold the slot while the customer pays; the appointment itself is
+            # only written once the address step completes. The new selection
+            # replaces the previous one, but holds for cart items are kept.
+            previous = request.session.get('pending_booking')
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    if cart and previous and _cart_key(previous) not in {_cart_key(item) for item in cart}:
+                        release_slot_hold(
+                            cursor, request.customer.Customer_ID, previous.get('employee_id'),
+                            _parse_booking_date(previous['booking_date']), previous['booking_time'],
+                            _get_catalog_service(previous['service_name'])
+                        )
+                    employee_id = hold_slot(
+                        cursor, booking_day, booking_time,
+                        _get_catalog_service(service_name), request.customer.Customer_ID,
+                        keep_holds=bool(cart)
+                    )
+            except SlotConflictError:
+                return JsonResponse({
+                    'success': False,
+                    'conflict': True,
+                    'error': 'This time slot is fully booked. Please choose another time.',
+                })
+            except OperationalError:
+                return JsonResponse({'success': False, 'error': 'Unable to reserve this time slot right now.'})
+
             # Store booking data in session instead of creating appointment
-            request.session['pending_booking'] = {
+            item = {
                 'service_name': service_name,
                 'service_price': service_price,
                 'service_description': service_description,
                 'booking_date': booking_date,
                 'booking_time': booking_time,
+                'employee_id': employee_id,
             }
-            return JsonResponse({'success': True})
+            request.session['pending_booking'] = item
+            if add_to_cart:
+                cart.append(item)
+                request.session['booking_cart'] = cart
+            return JsonResponse({'success': True, 'cart_count': len(cart)})
         else:
             return JsonResponse({'success': False, 'error': 'Please select both date and time'})
     
     # Get booked time slots for this customer
-    booked_slots = _get_booked_time_slots_for_customer(request.customer.Customer_ID)
+    min_date, max_date = booking_window()
+    booked_slots = _get_booked_time_slots_for_customer(request.customer.Customer_ID, first_day=min_date)
     
     # Get service image
     service_image = _get_service_image(service_name)
@@ -686,10 +806,47 @@ def booking_view(request):
         'service_description': service_description,
         'service_image': service_image,
         'booked_slots': json.dumps(booked_slots),  # Pass as JSON for JavaScript
+        'time_slots': json.dumps(SLOT_TIMES),
+        'min_date': min_date.strftime('%Y-%m-%d'),
+        'max_date': max_date.strftime('%Y-%m-%d'),
+        'cart_count': len(request.session.get('booking_cart') or []),
     }
     return render(request, 'authentication/booking.html', context)
 
 
+@customer_required
+def booking_cart_remove_view(request):
+    """Take one service out of the cart and give up its slot hold"""
+    if request.method != 'POST':
+        return redirect('payment')
+    cart = _get_booking_cart(request)
+    try:
+        item = cart.pop(int(request.POST.get('index', '')))
+    except (ValueError, IndexError):
+        messages.error(request, 'That service is no longer in your cart.')
+        return redirect('payment')
+
+    try:
+        with connection.cursor() as cursor:
+            removed = release_slot_hold(
+                cursor, request.customer.Customer_ID, item.get('employee_id'),
+                _parse_booking_date(item['booking_date']), item['booking_time'],
+                _get_catalog_service(item['service_name'])
+            )
+        if removed:
+            invalidate_availability(_parse_booking_date(item['booking_date']))
+    except OperationalError:
+        # The hold simply expires
+        pass
+
+    if not cart:
+        _clear_booking_session(request)
+        return redirect('services')
+    request.session['booking_cart'] = cart
+    request.session['pending_booking'] = cart[-1]
+    return redirect('payment')
+
+
 @customer_required
 def confirm_booking_view(request):
     from django.http import JsonResponse
@@ -713,6 +870,30 @@ def confirm_booking_view(request):
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
 
+def _fetch_receipt_lines(cursor, receipt_number, customer_id):
+    """The services on a combined cart receipt (empty for a single-service receipt)"""
+    cursor.execute("""
+        SELECT s.ServiceName, a.Date, a.Time, p.Amount
+        FROM APPOINTMENT a
+        LEFT JOIN SALES s ON a.Sales_ID = s.Sales_ID
+        LEFT JOIN PAYMENT p ON a.Payment_ID = p.Payment_ID
+        WHERE a.Receipt = %s AND a.Customer_ID = %s
+        ORDER BY a.Date, a.Time
+    """, [receipt_number, customer_id])
+    rows = cursor.fetchall()
+    if len(rows) < 2:
+        return []
+    return [
+        {
+            'service_name': service_name or 'Service',
+            'appointment_date': appointment_date.strftime('%A, %B %d, %Y') if hasattr(appointment_date, 'strftime') else str(appointment_date),
+            'appointment_time': _format_time_slot(appointment_time).lstrip('0'),
+            'amount': _format_price(amount),
+        }
+        for service_name, appointment_date, appointment_time, amount in rows
+    ]
+
+
 @customer_required
 def booking_confirmation_view(request, receipt_id):
     """Display booking confirmation with receipt details"""
@@ -796,6 +977,7 @@ def booking_confirmation_view(request, receipt_id):
                 'receipt_date': formatted_receipt_date,
                 'customer_name': f"{row[10]} {row[11]}" if row[10] and row[11] else 'Customer',
                 'customer_mobile': row[12] or '',
+                'receipt_lines': _fetch_receipt_lines(cursor, row[1], request.customer.Customer_ID),
             }
             
             return render(request, 'authentication/booking_confirmation.html', context)
@@ -807,9 +989,12 @@ def booking_confirmation_view(request, receipt_id):
 
 @customer_required
 def my_bookings_view(request):
-    bookings = _fetch_appointments_for_customer(request.customer.Customer_ID)
+    after = decode_cursor(request.GET.get('after'), parse_date, parse_time, int)
+    bookings, next_cursor = _fetch_appointments_for_customer(request.customer.Customer_ID, after=after)
     context = {
         'bookings': bookings,
+        'next_cursor': next_cursor,
+        'is_first_page': after is None,
     }
     return render(request, 'authentication/my_bookings.html', context)
 
@@ -820,12 +1005,19 @@ def delete_booking_view(request):
     if request.method == 'POST':
         booking_id = request.POST.get('booking_id')
         try:
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT Date FROM APPOINTMENT WHERE Appointment_ID = %s AND Customer_ID = %s FOR UPDATE",
+                    [booking_id, request.customer.Customer_ID]
+                )
+                row = cursor.fetchone()
                 cursor.execute(
                     "DELETE FROM APPOINTMENT WHERE Appointment_ID = %s AND Customer_ID = %s",
                     [booking_id, request.customer.Customer_ID]
                 )
                 if cursor.rowcount:
+                    adjust_dashboard(cursor, appointment_days={row[0]: -1})
+                    transaction.on_commit(invalidate_availability)
                     return JsonResponse({'success': True})
         except OperationalError as exc:
             return JsonResponse({'success': False, 'error': 'Unable to delete booking at the moment.'})
@@ -911,10 +1103,12 @@ def edit_booking_view(request):
             # Calculate minimum selectable date (next day after current booking date)
             # Since we've already verified the booking is more than 24 hours away,
             # we can safely allow the next day (Dec 3 if booking is Dec 2)
-            min_date = booking_date + timedelta(days=1)
+            min_date, max_date = booking_window(booking_date + timedelta(days=1))
             
             # Get booked time slots for this customer (excluding current booking)
-            booked_slots = _get_booked_time_slots_for_customer(request.customer.Customer_ID, exclude_appointment_id=booking_id)
+            booked_slots = _get_booked_time_slots_for_customer(
+                request.customer.Customer_ID, exclude_appointment_id=booking_id, first_day=min_date
+            )
             
             context = {
                 'booking_id': booking_id,
@@ -924,7 +1118,9 @@ def edit_booking_view(request):
                 'current_date': booking_date.strftime('%Y-%m-%d'),
                 'current_time': booking_time_str,
                 'min_date': min_date.strftime('%Y-%m-%d'),
+                'max_date': max_date.strftime('%Y-%m-%d'),
                 'booked_slots': json.dumps(booked_slots),
+                'time_slots': json.dumps(SLOT_TIMES),
             }
             
             return render(request, 'authentication/edit_booking.html', context)
@@ -948,12 +1144,13 @@ def update_booking_view(request):
             return JsonResponse({'success': False, 'error': 'Please provide all required fields.'})
         
         try:
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 # Verify booking belongs to customer and check 24-hour restriction
                 cursor.execute("""
-                    SELECT Date, Time
-                    FROM APPOINTMENT
-                    WHERE Appointment_ID = %s AND Customer_ID = %s
+                    SELECT a.Date, a.Time, s.ServiceName, a.Sales_ID
+                    FROM APPOINTMENT a
+                    LEFT JOIN SALES s ON a.Sales_ID = s.Sales_ID
+                    WHERE a.Appointment_ID = %s AND a.Customer_ID = %s
                 """, [booking_id, request.customer.Customer_ID])
                 row = cursor.fetchone()
                 
@@ -984,6 +1181,14 @@ def update_booking_view(request):
                 new_date_obj = datetime.strptime(new_date, '%Y-%m-%d').date()
                 if new_date_obj <= old_date:
                     return JsonResponse({'success': False, 'error': 'You can only select dates after the current booking date.'})
+                if new_date_obj > booking_window(old_date + timedelta(days=1))[1]:
+                    return JsonResponse({'success': False, 'error': 'Please select a date within the booking window.'})
+                
+                # Move the slot claims: the current employee may be taken at the
+                # new time, so the new slot is claimed for whoever is free
+                booking_service = _get_catalog_service(row[2])
+                release_slot_claims(cursor, booking_id)
+                employee_id = claim_slot(cursor, new_date_obj, new_time, booking_service, request.customer.Customer_ID)
                 
                 # Normalize new time
                 normalized_time = _normalize_time_slot(new_time)
@@ -991,15 +1196,31 @@ def update_booking_view(request):
                 # Update booking
                 cursor.execute("""
                     UPDATE APPOINTMENT
-                    SET Date = %s, Time = %s
+                    SET Date = %s, Time = %s, Employee_ID = %s
                     WHERE Appointment_ID = %s AND Customer_ID = %s
-                """, [new_date, normalized_time, booking_id, request.customer.Customer_ID])
+                """, [new_date, normalized_time, employee_id, booking_id, request.customer.Customer_ID])
                 
                 if cursor.rowcount:
+                    attach_slot_claim(cursor, employee_id, new_date_obj, new_time, booking_service, booking_id)
+                    adjust_dashboard(cursor, appointment_days={old_date: -1, new_date_obj: 1})
+                    if row[3]:
+                        reassign_sale_revenue(cursor, row[3], employee_id)
+                        cursor.execute(
+                            "UPDATE SALES SET Employee_ID = %s WHERE Sales_ID = %s",
+                            [employee_id, row[3]]
+                        )
+                    transaction.on_commit(lambda: invalidate_availability(old_date, new_date_obj))
                     return JsonResponse({'success': True, 'message': 'Booking updated successfully!'})
                 else:
+                    transaction.set_rollback(True)
                     return JsonResponse({'success': False, 'error': 'Failed to update booking.'})
                     
+        except SlotConflictError:
+            return JsonResponse({
+                'success': False,
+                'conflict': True,
+                'error': 'This time slot was just booked. Please choose another time.',
+            })
         except Exception as e:
             return JsonResponse({'success': False, 'error': f'Error updating booking: {str(e)}'})
     
@@ -1010,7 +1231,7 @@ def update_booking_view(request):
 @customer_required
 def profile_view(request):
     saved_addresses = _fetch_addresses_for_customer(request.customer)
-    bookings = _fetch_appointments_for_customer(request.customer.Customer_ID)[:5]
+    bookings, _ = _fetch_appointments_for_customer(request.customer.Customer_ID, page_size=PROFILE_RECENT_BOOKINGS)
     
     context = {
         'customer': request.customer,
@@ -1023,10 +1244,13 @@ def profile_view(request):
 
 @customer_required
 def my_receipts_view(request):
-    receipts = _fetch_receipts_for_customer(request.customer.Customer_ID)
+    after = decode_cursor(request.GET.get('after'), parse_date, int)
+    receipts, next_cursor = _fetch_receipts_for_customer(request.customer.Customer_ID, after=after)
     
     context = {
         'receipts': receipts,
+        'next_cursor': next_cursor,
+        'is_first_page': after is None,
     }
     return render(request, 'authentication/my_receipts.html', context)
 
@@ -1045,7 +1269,7 @@ def delete_receipt_view(request):
                 with connection.cursor() as cursor:
                     # Verify receipt belongs to customer
                     cursor.execute("""
-                        SELECT Customer_ID FROM RECEIPTS WHERE Receipt_ID = %s
+                        SELECT Customer_ID, Receipt_File FROM RECEIPTS WHERE Receipt_ID = %s
                     """, [receipt_id])
                     row = cursor.fetchone()
                     
@@ -1058,6 +1282,7 @@ def delete_receipt_view(request):
                     """, [receipt_id])
                     
                     if cursor.rowcount > 0:
+                        transaction.on_commit(lambda: remove_receipt_pdf(row[1]))
                         return JsonResponse({'success': True, 'message': 'Receipt deleted successfully.'})
                     else:
                         return JsonResponse({'success': False, 'error': 'Receipt not found.'})
@@ -1067,211 +1292,111 @@ def delete_receipt_view(request):
     return JsonResponse({'success': False, 'error': 'Invalid request method.'})
 
 
+def _receipt_pdf_data(cursor, receipt_id, customer_id):
+    """
+    (display data for render_receipt_pdf, current Receipt_File) for one of
+    the customer's receipts, or None when it does not exist
+    """
+    cursor.execute("""
+        SELECT r.Receipt_ID, r.Receipt_Number, r.Amount, r.Receipt_Date, r.Receipt_File,
+               s.ServiceName,
+               a.Date, a.Time, a.Status,
+               p.Method,
+               c.First_Name, c.Last_Name, c.Mobile_No, c.Address
+        FROM RECEIPTS r
+        LEFT JOIN APPOINTMENT a ON r.Appointment_ID = a.Appointment_ID
+        LEFT JOIN SALES s ON r.Sales_ID = s.Sales_ID
+        LEFT JOIN PAYMENT p ON a.Payment_ID = p.Payment_ID
+        LEFT JOIN CUSTOMER c ON r.Customer_ID = c.Customer_ID
+        WHERE r.Receipt_ID = %s AND r.Customer_ID = %s
+    """, [receipt_id, customer_id])
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    appointment_date = row[6]
+    appointment_time = row[7]
+    receipt_date = row[3] or datetime.now().date()
+
+    # Format dates
+    if isinstance(appointment_date, date):
+        formatted_appointment_date = appointment_date.strftime('%A, %B %d, %Y')
+    else:
+        try:
+            formatted_appointment_date = datetime.strptime(str(appointment_date), '%Y-%m-%d').strftime('%A, %B %d, %Y')
+        except:
+            formatted_appointment_date = str(appointment_date)
+
+    # Format time
+    if isinstance(appointment_time, time):
+        formatted_time = appointment_time.strftime('%I:%M %p').lstrip('0')
+    else:
+        try:
+            time_obj = datetime.strptime(str(appointment_time), '%H:%M:%S').time()
+            formatted_time = time_obj.strftime('%I:%M %p').lstrip('0')
+        except:
+            formatted_time = str(appointment_time)
+
+    # Format receipt date
+    if isinstance(receipt_date, date):
+        formatted_receipt_date = receipt_date.strftime('%B %d, %Y')
+    else:
+        try:
+            formatted_receipt_date = datetime.strptime(str(receipt_date), '%Y-%m-%d').strftime('%B %d, %Y')
+        except:
+            formatted_receipt_date = datetime.now().strftime('%B %d, %Y')
+
+    data = {
+        'receipt_number': row[1] or f'RCP{str(row[0]).zfill(3)}',
+        'customer_name': f"{row[10]} {row[11]}" if row[10] and row[11] else 'Customer',
+        'lines': _fetch_receipt_lines(cursor, row[1], customer_id),
+        'service_name': row[5] or 'Service',
+        'appointment_date': formatted_appointment_date,
+        'appointment_time': formatted_time,
+        'payment_method': (row[9] or 'Card').replace('_', ' ').title(),
+        'receipt_date': formatted_receipt_date,
+        'mobile': row[12] or '',
+        'address': row[13] or '',
+        'amount': f'${row[2]:,.2f}',
+    }
+    return data, row[4]
+
+
+def _prerender_receipt(receipt_id, customer_id):
+    """Queue a new receipt's PDF for background rendering (never fails the booking)"""
+    try:
+        with connection.cursor() as cursor:
+            found = _receipt_pdf_data(cursor, receipt_id, customer_id)
+        if found:
+            queue_receipt_pdf(found[0])
+    except Exception:
+        logger.exception('Could not queue receipt %s for rendering', receipt_id)
+
+
 @customer_required
 def view_receipt_pdf(request, receipt_id):
-    """Generate and display PDF receipt"""
+    """
+    Serve the receipt PDF from the on-disk cache (rendering it on a miss).
+    The ETag is the content hash, so unchanged receipts revalidate with a 304.
+    """
     try:
         with connection.cursor() as cursor:
-            # Fetch receipt and related data
-            cursor.execute("""
-                SELECT r.Receipt_ID, r.Receipt_Number, r.Amount, r.Receipt_Date, r.created_at,
-                       s.ServiceName,
-                       a.Date, a.Time, a.Status,
-                       p.Method,
-                       c.First_Name, c.Last_Name, c.Mobile_No, c.Address
-                FROM RECEIPTS r
-                LEFT JOIN APPOINTMENT a ON r.Appointment_ID = a.Appointment_ID
-                LEFT JOIN SALES s ON r.Sales_ID = s.Sales_ID
-                LEFT JOIN PAYMENT p ON a.Payment_ID = p.Payment_ID
-                LEFT JOIN CUSTOMER c ON r.Customer_ID = c.Customer_ID
-                WHERE r.Receipt_ID = %s AND r.Customer_ID = %s
-            """, [receipt_id, request.customer.Customer_ID])
-            row = cursor.fetchone()
-            
-            if not row:
-                return HttpResponse('Receipt not found.', status=404)
-            
-            # Extract data
-            receipt_number = row[1] or f'RCP{str(row[0]).zfill(3)}'
-            amount = row[2]
-            service_name = row[5] or 'Service'
-            appointment_date = row[6]
-            appointment_time = row[7]
-            payment_method = row[9] or 'Card'
-            customer_name = f"{row[10]} {row[11]}" if row[10] and row[11] else 'Customer'
-            customer_mobile = row[12] or ''
-            customer_address = row[13] or ''
-            receipt_date = row[3] or datetime.now().date()
-            
-            # Format dates
-            if isinstance(appointment_date, date):
-                formatted_appointment_date = appointment_date.strftime('%A, %B %d, %Y')
-            else:
-                try:
-                    formatted_appointment_date = datetime.strptime(str(appointment_date), '%Y-%m-%d').strftime('%A, %B %d, %Y')
-                except:
-                    formatted_appointment_date = str(appointment_date)
-            
-            # Format time
-            if isinstance(appointment_time, time):
-                formatted_time = appointment_time.strftime('%I:%M %p').lstrip('0')
-            else:
-                try:
-                    time_obj = datetime.strptime(str(appointment_time), '%H:%M:%S').time()
-                    formatted_time = time_obj.strftime('%I:%M %p').lstrip('0')
-                except:
-                    formatted_time = str(appointment_time)
-            
-            # Format receipt date
-            if isinstance(receipt_date, date):
-                formatted_receipt_date = receipt_date.strftime('%B %d, %Y')
-            else:
-                try:
-                    formatted_receipt_date = datetime.strptime(str(receipt_date), '%Y-%m-%d').strftime('%B %d, %Y')
-                except:
-                    formatted_receipt_date = datetime.now().strftime('%B %d, %Y')
-            
-            # Format payment method
-            payment_method_display = payment_method.replace('_', ' ').title()
-            
-            # Create PDF
-            response = HttpResponse(content_type='application/pdf')
-            response['Content-Disposition'] = f'inline; filename="Receipt_{receipt_number}.pdf"'
-            
-            # Create document
-            doc = SimpleDocTemplate(response, pagesize=letter,
-                                  rightMargin=72, leftMargin=72,
-                                  topMargin=72, bottomMargin=18)
-            
-            # Container for PDF elements
-            elements = []
-            
-            # Define styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=28,
-                textColor=colors.HexColor('#603D44'),
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=16,
-                textColor=colors.HexColor('#603D44'),
-                spaceAfter=12,
-                fontName='Helvetica-Bold'
-            )
-            
-            normal_style = ParagraphStyle(
-                'CustomNormal',
-                parent=styles['Normal'],
-                fontSize=11,
-                spaceAfter=6
-            )
-            
-            # Title
-            elements.append(Paragraph("GLAMORA", title_style))
-            elements.append(Paragraph("RECEIPT", ParagraphStyle(
-                'ReceiptLabel',
-                parent=styles['Normal'],
-                fontSize=12,
-                textColor=colors.grey,
-                alignment=TA_CENTER,
-                spaceAfter=30
-            )))
-            
-            # Receipt Number
-            elements.append(Spacer(1, 0.2*inch))
-            elements.append(Paragraph(f"Receipt Number: {receipt_number}", ParagraphStyle(
-                'ReceiptNumber',
-                parent=styles['Normal'],
-                fontSize=14,
-                alignment=TA_CENTER,
-                spaceAfter=20,
-                fontName='Helvetica-Bold'
-            )))
-            
-            elements.append(Spacer(1, 0.3*inch))
-            
-            # Receipt Details Table
-            receipt_data = []
-            
-            # Add customer info if available
-            if customer_name:
-                receipt_data.append(['Customer Name:', customer_name])
-            receipt_data.append(['Service:', service_name])
-            receipt_data.append(['Appointment Date:', formatted_appointment_date])
-            receipt_data.append(['Appointment Time:', formatted_time])
-            receipt_data.append(['Payment Method:', payment_method_display])
-            receipt_data.append(['Receipt Date:', formatted_receipt_date])
-            if customer_mobile:
-                receipt_data.append(['Mobile:', customer_mobile])
-            if customer_address:
-                # Use Paragraph for address to handle wrapping
-                address_para = Paragraph(customer_address, ParagraphStyle(
-                    'AddressStyle',
-                    parent=styles['Normal'],
-                    fontSize=11,
-                    fontName='Helvetica',
-                    leading=13,
-                    wordWrap='LTR'
-                ))
-                receipt_data.append(['Address:', address_para])
-            
-            # Count data rows (before separator and total)
-            data_row_count = len(receipt_data)
-            
-            # Add total amount
-            receipt_data.append(['', ''])
-            receipt_data.append(['TOTAL AMOUNT:', f'${amount:,.2f}'])
-            
-            receipt_table = Table(receipt_data, colWidths=[2.5*inch, 3.5*inch])
-            receipt_table.setStyle(TableStyle([
-                # Gray background only for data rows (left column)
-                ('BACKGROUND', (0, 0), (0, data_row_count - 1), colors.HexColor('#f5f5f5')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTNAME', (0, 0), (0, data_row_count - 1), 'Helvetica-Bold'),
-                ('FONTNAME', (1, 0), (1, data_row_count - 1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, data_row_count - 1), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('TOPPADDING', (0, 0), (-1, -1), 12),
-                # Grid lines only for data rows
-                ('GRID', (0, 0), (-1, data_row_count - 1), 1, colors.grey),
-                # Separator line before total
-                ('LINEBELOW', (0, data_row_count), (-1, data_row_count), 2, colors.HexColor('#603D44')),
-                # Total row styling
-                ('FONTSIZE', (0, -1), (-1, -1), 14),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('TOPPADDING', (0, -1), (-1, -1), 15),
-                ('BOTTOMPADDING', (0, -1), (-1, -1), 15),
-            ]))
-            
-            elements.append(receipt_table)
-            elements.append(Spacer(1, 0.5*inch))
-            
-            # Footer
-            elements.append(Paragraph("Thank you for choosing GLAMORA!", ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=10,
-                alignment=TA_CENTER,
-                textColor=colors.grey,
-                spaceBefore=20
-            )))
-            
-            # Build PDF
-            doc.build(elements)
-            
-            return response
-            
+            found = _receipt_pdf_data(cursor, receipt_id, request.customer.Customer_ID)
+        if not found:
+            return HttpResponse('Receipt not found.', status=404)
+        data, receipt_file = found
+
+        digest = receipt_pdf_digest(data)
+        etag = f'"{digest}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            path = cached_receipt_pdf(receipt_id, data, receipt_file, digest)
+            response = FileResponse(open(path, 'rb'), content_type='application/pdf')
+            response['Content-Disposition'] = f'inline; filename="Receipt_{data["receipt_number"]}.pdf"'
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     except Exception as e:
         return HttpResponse(f'Error generating PDF: {str(e)}', status=500)
 
@@ -1302,8 +1427,7 @@ def profile_settings_view(request):
                 db_executor = connection.cursor()
                 
                 if mobile_no != customer.Mobile_No:
-                    db_executor.execute("SELECT Customer_ID FROM CUSTOMER WHERE Mobile_No = %s", [mobile_no])
-                    if db_executor.fetchone():
+                    if is_mobile_registered(mobile_no, 'customer', customer.Customer_ID):
                         messages.error(request, 'Mobile number already exists. Please use another number.')
                         return redirect('profile_settings')
                 
@@ -1315,6 +1439,7 @@ def profile_settings_view(request):
                         updated_at = NOW()
                     WHERE Customer_ID = %s
                 """, [first_name, last_name, mobile_no, customer.Customer_ID])
+                bump_credential_version(db_executor, customer.Customer_ID)
         except Exception as e:
             messages.error(request, 'Failed to update profile. Please try again.')
             return redirect('profile_settings')
@@ -1366,6 +1491,7 @@ def change_password_view(request):
                         updated_at = NOW()
                     WHERE Customer_ID = %s
                 """, [new_password, customer.Customer_ID])
+                bump_credential_version(db_executor, customer.Customer_ID)
         except Exception as e:
             return JsonResponse({'success': False, 'error': 'Failed to change password. Please try again.'})
         
@@ -1377,10 +1503,13 @@ def change_password_view(request):
 
 @customer_required
 def payment_view(request):
-    pending_booking = request.session.get('pending_booking')
-    if not pending_booking:
+    cart = _get_booking_cart(request)
+    if not cart:
         messages.error(request, 'No booking found. Please start a new booking.')
         return redirect('services')
+    pending_booking = cart[-1]
+    
+    _renew_slot_hold(request)
     
     if request.method == 'POST':
         raw_card_number = request.POST.get('raw_card_number', '').strip()
@@ -1391,25 +1520,19 @@ def payment_view(request):
         
         if not card_number or not card_holder or not expiry_date or not cvv:
             messages.error(request, 'Please fill all card details.')
-            try:
-                booking_date_obj = datetime.strptime(pending_booking['booking_date'], '%Y-%m-%d').date()
-                pending_booking['formatted_date'] = booking_date_obj.strftime('%A, %B %d, %Y')
-            except:
-                pending_booking['formatted_date'] = pending_booking['booking_date']
             return render(request, 'authentication/payment.html', {
                 'pending_booking': pending_booking,
+                'cart_items': cart,
+                'cart_total': _cart_total(cart),
             })
         
         card_type = request.POST.get('card_type', '').strip()
         if not card_type:
             messages.error(request, 'Please select a card type (Credit Card or Debit Card).')
-            try:
-                booking_date_obj = datetime.strptime(pending_booking['booking_date'], '%Y-%m-%d').date()
-                pending_booking['formatted_date'] = booking_date_obj.strftime('%A, %B %d, %Y')
-            except:
-                pending_booking['formatted_date'] = pending_booking['booking_date']
             return render(request, 'authentication/payment.html', {
                 'pending_booking': pending_booking,
+                'cart_items': cart,
+                'cart_total': _cart_total(cart),
             })
         
         if card_type == 'credit':
@@ -1431,54 +1554,55 @@ def payment_view(request):
         
         request.session.modified = True
         
-        try:
-            booking_date_obj = datetime.strptime(pending_booking['booking_date'], '%Y-%m-%d').date()
-            pending_booking['formatted_date'] = booking_date_obj.strftime('%A, %B %d, %Y')
-        except:
-            pending_booking['formatted_date'] = pending_booking['booking_date']
-        
         payment_method_display = payment_method_db.replace('_', ' ').title()
         payment_date = datetime.now().strftime('%B %d, %Y at %I:%M %p')
         
         return render(request, 'authentication/payment_confirmation.html', {
             'pending_booking': pending_booking,
+            'cart_items': cart,
+            'cart_total': _cart_total(cart),
             'payment_data': request.session['payment_data'],
             'payment_method_display': payment_method_display,
             'payment_date': payment_date,
         })
     
-    try:
-        booking_date_obj = datetime.strptime(pending_booking['booking_date'], '%Y-%m-%d').date()
-        pending_booking['formatted_date'] = booking_date_obj.strftime('%A, %B %d, %Y')
-    except:
-        pending_booking['formatted_date'] = pending_booking['booking_date']
-    
     context = {
         'pending_booking': pending_booking,
+        'cart_items': cart,
+        'cart_total': _cart_total(cart),
     }
     return render(request, 'authentication/payment.html', context)
 
 
 @customer_required
 def address_view(request):
+    # One token per rendered checkout form; a resubmitted form (double click,
+    # retry after a timeout) carries the same token back
+    booking_token = request.POST.get('booking_token') if request.method == 'POST' else None
+    if is_booking_token(booking_token):
+        # Checked before the session so a replay still finds its booking
+        # after the first submission cleared pending_booking
+        receipt_id = _find_booked_receipt(request, booking_token)
+        if receipt_id:
+            return redirect(reverse('booking_confirmation', args=[receipt_id]))
+    else:
+        booking_token = new_booking_token()
+    
     # Check if there's pending booking and payment data
-    pending_booking = request.session.get('pending_booking')
+    cart = _get_booking_cart(request)
     payment_data = request.session.get('payment_data')
     
-    if not pending_booking:
+    if not cart:
         messages.error(request, 'No booking found. Please start a new booking.')
         return redirect('services')
+    pending_booking = cart[-1]
     
     if not payment_data:
         messages.error(request, 'Please complete payment first.')
         return redirect('payment')
     
-    # Format date for display
-    try:
-        booking_date_obj = datetime.strptime(pending_booking['booking_date'], '%Y-%m-%d').date()
-        pending_booking['formatted_date'] = booking_date_obj.strftime('%A, %B %d, %Y')
-    except:
-        pending_booking['formatted_date'] = pending_booking['booking_date']
+    if request.method != 'POST':
+        _renew_slot_hold(request)
     
     # Fetch saved addresses
     saved_addresses = _fetch_addresses_for_customer(request.customer)
@@ -1506,17 +1630,23 @@ def address_view(request):
                     messages.error(request, 'Selected address not found.')
                     return render(request, 'authentication/address.html', {
                         'pending_booking': pending_booking,
+                        'cart_items': cart,
+                        'cart_total': _cart_total(cart),
                         'payment_data': payment_data,
                         'customer': request.customer,
                         'saved_addresses': saved_addresses,
+                        'booking_token': booking_token,
                     })
             except (ValueError, IndexError):
                 messages.error(request, 'Invalid address selection.')
                 return render(request, 'authentication/address.html', {
                     'pending_booking': pending_booking,
+                    'cart_items': cart,
+                    'cart_total': _cart_total(cart),
                     'payment_data': payment_data,
                     'customer': request.customer,
                     'saved_addresses': saved_addresses,
+                    'booking_token': booking_token,
                 })
         else:
             address_line1 = request.POST.get('address_line1', '').strip()
@@ -1530,9 +1660,12 @@ def address_view(request):
                 messages.error(request, 'Please fill all required address fields.')
                 return render(request, 'authentication/address.html', {
                     'pending_booking': pending_booking,
+                    'cart_items': cart,
+                    'cart_total': _cart_total(cart),
                     'payment_data': payment_data,
                     'customer': request.customer,
                     'saved_addresses': saved_addresses,
+                    'booking_token': booking_token,
                 })
             
             # Combine address
@@ -1544,159 +1677,100 @@ def address_view(request):
                 full_address += f", {country}"
         
         try:
-            with transaction.atomic():
+            booking_items = [
+                {
+                    'day': _parse_booking_date(item['booking_date']),
+                    'slot': item['booking_time'],
+                    'service': _get_catalog_service(item['service_name']),
+                    'service_name': item['service_name'],
+                    'amount': _parse_price(item['service_price']),
+                    'employee_id': item.get('employee_id'),
+                }
+                for item in cart
+            ]
+            # Allocated outside the transaction so the sequence row is never held
+            # for the length of the booking (an unused number just leaves a gap)
+            receipt_number = next_receipt_number()
+            
+            # Get payment method (database column now supports up to 50 characters)
+            payment_method = (payment_data.get('method', 'card') or 'card').lower().strip()
+            
+            # The whole cart is written in one transaction under one receipt
+            receipt_id, appointment_ids = commit_booking(
+                customer_id=request.customer.Customer_ID,
+                items=booking_items,
+                payment_method=payment_method,
+                receipt_number=receipt_number,
+                request_token=booking_token,
+            )
+            
+            # Update customer address if save_address is checked (plain text, not JSON).
+            # Kept out of the booking transaction so it never holds the CUSTOMER row.
+            save_address = request.POST.get('save_address') == 'on'
+            if save_address and use_saved_address != 'yes':
                 with connection.cursor() as cursor:
-                    # Get service ID
-                    cursor.execute(
-                        "SELECT Service_ID FROM SERVICE WHERE ServiceName = %s LIMIT 1",
-                        [pending_booking['service_name']]
-                    )
-                    row = cursor.fetchone()
-                    service_id = row[0] if row else None
-                    
-                    # Extract price from string (remove $ and commas)
-                    price_str = pending_booking['service_price'].replace('$', '').replace(',', '')
-                    try:
-                        price_amount = Decimal(price_str)
-                    except:
-                        price_amount = Decimal('0.00')
-                    
-                    # Get payment method (database column now supports up to 50 characters)
-                    payment_method = (payment_data.get('method', 'card') or 'card').lower().strip()
-                    
-                    # Create payment record
-                    cursor.execute("""
-                        INSERT INTO PAYMENT (Appointment_ID, Method, Amount, Date, Status)
-                        VALUES (NULL, %s, %s, %s, 'completed')
-                    """, [payment_method, price_amount, pending_booking['booking_date']])
-                    payment_id = cursor.lastrowid
-                    
-                    # Create sales record
-                    cursor.execute("""
-                        INSERT INTO SALES (Payment_ID, Employee_ID, Admin_ID, Service_ID, ServiceName, Date, Receipt)
-                        VALUES (%s, %s, %s, %s, %s, %s, NULL)
-                    """, [payment_id, 1, 1, service_id, pending_booking['service_name'], pending_booking['booking_date']])
-                    sales_id = cursor.lastrowid
-                    
-                    # Create appointment record
                     cursor.execute("""
-                        INSERT INTO APPOINTMENT (
-                            Customer_ID, Employee_ID, Payment_ID, Admin_ID, Sales_ID,
-                            Date, Time, Status, Receipt
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NULL)
-                    """, [
-                        request.customer.Customer_ID,
-                        1,
-                        payment_id,
-                        1,
-                        sales_id,
-                        pending_booking['booking_date'],
-                        _normalize_time_slot(pending_booking['booking_time']),
-                        'confirmed'
-                    ])
-                    appointment_id = cursor.lastrowid
-                    
-                    # Update customer address if save_address is checked (plain text, not JSON)
-                    save_address = request.POST.get('save_address') == 'on'
-                    if save_address and use_saved_address != 'yes':
-                        # Save address as plain text (not JSON)
-                        cursor.execute("""
-                            UPDATE CUSTOMER
-                            SET Address = %s, updated_at = NOW()
-                            WHERE Customer_ID = %s
-                        """, [full_address, request.customer.Customer_ID])
-                        
-                        # Update customer object in session
-                        request.customer.Address = full_address
-                        messages.success(request, 'Address saved successfully!')
-                    
-                    # Update payment with appointment ID
-                    cursor.execute("""
-                        UPDATE PAYMENT
-                        SET Appointment_ID = %s
-                        WHERE Payment_ID = %s
-                    """, [appointment_id, payment_id])
-                    
-                    # Create receipt record
-                    receipt_date = datetime.now().date()
-                    
-                    # Generate receipt number (format: RCPXXX where XXX is an incrementing number)
-                    # Get the highest existing receipt number
-                    cursor.execute("""
-                        SELECT Receipt_Number FROM RECEIPTS 
-                        WHERE Receipt_Number LIKE 'RCP%' 
-                        ORDER BY CAST(SUBSTRING(Receipt_Number, 4) AS UNSIGNED) DESC 
-                        LIMIT 1
-                    """)
-                    row = cursor.fetchone()
-                    
-                    if row and row[0]:
-                        # Extract the numeric part and increment
-                        existing_number = row[0]
-                        try:
-                            # Extract number after "RCP" prefix
-                            numeric_part = int(existing_number[3:])
-                            next_number = numeric_part + 1
-                        except (ValueError, IndexError):
-                            # If parsing fails, start from 1
-                            next_number = 1
-                    else:
-                        # No existing receipts, start from 1
-                        next_number = 1
-                    
-                    # Format as RCPXXX (3 digits minimum, can be more if needed)
-                    receipt_number = f"RCP{str(next_number).zfill(3)}"
-                    
-                    cursor.execute("""
-                        INSERT INTO RECEIPTS (Customer_ID, Appointment_ID, Sales_ID, Amount, Receipt_Date, Receipt_Number, created_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                    """, [
-                        request.customer.Customer_ID,
-                        appointment_id,
-                        sales_id,
-                        price_amount,
-                        receipt_date,
-                        receipt_number
-                    ])
-                    receipt_id = cursor.lastrowid
-                    
-                    # Update SALES table with Receipt_ID
-                    cursor.execute("""
-                        UPDATE SALES
-                        SET Receipt = %s
-                        WHERE Sales_ID = %s
-                    """, [receipt_id, sales_id])
-                    
-                    # Update APPOINTMENT table with Receipt_Number (string format like RCP001)
-                    cursor.execute("""
-                        UPDATE APPOINTMENT
-                        SET Receipt = %s
-                        WHERE Appointment_ID = %s
-                    """, [receipt_number, appointment_id])
-                    
+                        UPDATE CUSTOMER
+                        SET Address = %s, updated_at = NOW()
+                        WHERE Customer_ID = %s
+                    """, [full_address, request.customer.Customer_ID])
+                
+                # Update customer object in session
+                request.customer.Address = full_address
+                update_customer_snapshot(request, request.customer)
+                messages.success(request, 'Address saved successfully!')
+            
+            # Both the booking and the address above are committed by now
+            # (autocommit), so the receipt can go to the background renderer
+            _prerender_receipt(receipt_id, request.customer.Customer_ID)
+            
             # Clear session data
-            del request.session['pending_booking']
-            del request.session['payment_data']
+            _clear_booking_session(request)
             
             # Redirect to booking confirmation page with receipt ID
             return redirect(reverse('booking_confirmation', args=[receipt_id]))
             
+        except DuplicateBookingError:
+            # A concurrent submission of this same form committed first
+            _clear_booking_session(request)
+            receipt_id = _find_booked_receipt(request, booking_token)
+            if receipt_id:
+                return redirect(reverse('booking_confirmation', args=[receipt_id]))
+            return redirect('my_bookings')
+        except SlotConflictError as exc:
+            # Keep the rest of the cart so the customer only has to pick a new
+            # time for the service that lost its slot
+            conflicted = cart[exc.item_index or 0]
+            remaining = [item for item in cart if item is not conflicted]
+            request.session['booking_cart'] = remaining
+            request.session['pending_booking'] = remaining[-1] if remaining else conflicted
+            messages.error(
+                request,
+                f"Sorry, the {conflicted['booking_time']} slot for {conflicted['service_name']} "
+                "was just booked. Please choose another time."
+            )
+            return redirect(_booking_page_url(conflicted))
         except OperationalError:
             messages.error(request, 'Unable to complete booking. Please try again.')
             saved_addresses = _fetch_addresses_for_customer(request.customer)
             return render(request, 'authentication/address.html', {
                 'pending_booking': pending_booking,
+                'cart_items': cart,
+                'cart_total': _cart_total(cart),
                 'payment_data': payment_data,
                 'customer': request.customer,
                 'saved_addresses': saved_addresses,
+                'booking_token': booking_token,
             })
     
     context = {
         'pending_booking': pending_booking,
+        'cart_items': cart,
+        'cart_total': _cart_total(cart),
         'payment_data': payment_data,
         'customer': request.customer,
         'saved_addresses': saved_addresses,
+        'booking_token': booking_token,
     }
     return render(request, 'authentication/address.html', context)
 
@@ -1709,30 +1783,15 @@ def address_view(request):
 def admin_home_view(request):
     """Admin homepage with dashboard statistics"""
     try:
+        # Counters maintained by the writes themselves (see report_helpers)
+        summary = get_dashboard_summary()
+        total_customers = summary['total_customers']
+        total_appointments = summary['total_appointments']
+        total_sales = summary['total_sales']
+        today_appointments = summary['today_appointments']
+        
         with connection.cursor() as cursor:
-            # Get total customers
-            cursor.execute("SELECT COUNT(*) FROM CUSTOMER")
-            total_customers = cursor.fetchone()[0]
-            
-            # Get total appointments
-            cursor.execute("SELECT COUNT(*) FROM APPOINTMENT")
-            total_appointments = cursor.fetchone()[0]
-            
-            # Get total sales - same calculation as sales management page
-            cursor.execute("""
-                SELECT COALESCE(SUM(p.Amount), 0)
-                FROM SALES s
-                LEFT JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
-                WHERE p.Amount IS NOT NULL
-            """)
-            total_sales_result = cursor.fetchone()[0]
-            total_sales = float(total_sales_result) if total_sales_result else 0.00
-            
-            # Get today's appointments
-            cursor.execute("SELECT COUNT(*) FROM APPOINTMENT WHERE Date = CURDATE()")
-            today_appointments = cursor.fetchone()[0]
-            
-            # Get recent appointments
+            # Get recent appointments (newest ten from idx_date_time)
             cursor.execute("""
                 SELECT a.Appointment_ID, a.Date, a.Time, a.Status,
                        c.First_Name, c.Last_Name, c.Mobile_No,
@@ -1783,166 +1842,479 @@ def admin_services_view(request):
     return render(request, 'authentication/admin_services.html', context)
 
 
+def _like_prefix(value):
+    """LIKE pattern matching values that start with value (wildcards escaped)"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _user_search_condition(mobile_column, search):
+    """
+    WHERE clause and params for the users search box. Every branch is a
+    prefix match so it stays on the name/phone indexes: digits search the
+    phone number, "first last" both names, and a single word either name.
+    """
+    if search.lstrip('+').replace(' ', '').replace('-', '').isdigit():
+        return f'{mobile_column} LIKE %s', [_like_prefix(search)]
+    words = search.split()
+    if len(words) >= 2:
+        return 'First_Name LIKE %s AND Last_Name LIKE %s', [_like_prefix(words[0]), _like_prefix(' '.join(words[1:]))]
+    return '(First_Name LIKE %s OR Last_Name LIKE %s)', [_like_prefix(search), _like_prefix(search)]
+
+
+def _admin_user_row(tab, row):
+    registered = date_format(row[-1], 'M d, Y') if isinstance(row[-1], date) else ''
+    if tab == 'customers':
+        return {
+            'id': row[0],
+            'first_name': row[1],
+            'last_name': row[2],
+            'mobile': row[3],
+            'address': row[4] or 'N/A',
+            'registered': registered,
+        }
+    if tab == 'employees':
+        return {
+            'id': row[0],
+            'first_name': row[1],
+            'last_name': row[2],
+            'phone': row[3],
+            'skills': row[4] or 'N/A',
+            'rating': '%.2f' % (float(row[5]) if row[5] else 0.0),
+            'availability': row[6] or 'available',
+            'registered': registered,
+        }
+    return {
+        'id': row[0],
+        'first_name': row[1],
+        'last_name': row[2],
+        'mobile': row[3],
+        'role': row[4],
+        'registered': registered,
+    }
+
+
+def _fetch_admin_users(tab, search='', after=None, page_size=ADMIN_USERS_PAGE_SIZE):
+    """One page of customers, employees or admins (newest first) and the next page's cursor"""
+    listing = ADMIN_USER_LISTS[tab]
+    where = []
+    params = []
+    if search:
+        condition, search_params = _user_search_condition(listing['mobile_column'], search)
+        where.append(condition)
+        params.extend(search_params)
+    if after:
+        where.append(keyset_condition(['created_at', listing['id_column']]))
+        params.extend(keyset_params(after))
+    sql = f"""
+        SELECT {listing['columns']}
+        FROM {listing['table']}
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY created_at DESC, {listing['id_column']} DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [page_size + 1])
+        rows = cursor.fetchall()
+    rows, next_cursor = split_page(rows, page_size, lambda row: (row[-1], row[0]))
+    return [_admin_user_row(tab, row) for row in rows], next_cursor
+
+
 @admin_required
 def admin_users_view(request):
-    """Admin users management page with tabs for Customers, Employees, and Admins"""
+    """Admin users management page; only the open tab's first page is loaded, other tabs fetch admin_users_data"""
     tab = request.GET.get('tab', 'customers')
-    
+    if tab not in ADMIN_USER_LISTS:
+        tab = 'customers'
     try:
-        with connection.cursor() as cursor:
-            # Fetch Customers
-            cursor.execute("""
-                SELECT Customer_ID, First_Name, Last_Name, Mobile_No, Address, created_at
-                FROM CUSTOMER
-                ORDER BY created_at DESC
-            """)
-            customer_rows = cursor.fetchall()
-            customers = []
-            for row in customer_rows:
-                customers.append({
-                    'id': row[0],
-                    'first_name': row[1],
-                    'last_name': row[2],
-                    'mobile': row[3],
-                    'address': row[4] or 'N/A',
-                    'created_at': row[5],
-                })
-            
-            # Fetch Employees
-            cursor.execute("""
-                SELECT Employee_ID, First_Name, Last_Name, Phone, Address, Skills, Rating, Availability, created_at
-                FROM EMPLOYEE
-                ORDER BY created_at DESC
-            """)
-            employee_rows = cursor.fetchall()
-            employees = []
-            for row in employee_rows:
-                employees.append({
-                    'id': row[0],
-                    'first_name': row[1],
-                    'last_name': row[2],
-                    'phone': row[3],
-                    'address': row[4] or 'N/A',
-                    'skills': row[5] or 'N/A',
-                    'rating': float(row[6]) if row[6] else 0.0,
-                    'availability': row[7] or 'available',
-                    'created_at': row[8],
-                })
-            
-            # Fetch Admins
-            cursor.execute("""
-                SELECT Admin_ID, First_Name, Last_Name, Mobile_No, Role, created_at
-                FROM ADMIN
-                ORDER BY created_at DESC
-            """)
-            admin_rows = cursor.fetchall()
-            admins = []
-            for row in admin_rows:
-                admins.append({
-                    'id': row[0],
-                    'first_name': row[1],
-                    'last_name': row[2],
-                    'mobile': row[3],
-                    'role': row[4],
-                    'created_at': row[5],
-                })
+        users, next_cursor = _fetch_admin_users(tab)
     except OperationalError:
-        customers = []
-        employees = []
-        admins = []
+        users, next_cursor = [], None
     
     context = {
-        'customers': customers,
-        'employees': employees,
-        'admins': admins,
         'active_tab': tab,
+        'initial_page': {'tab': tab, 'users': users, 'next_cursor': next_cursor},
     }
     return render(request, 'authentication/admin_users.html', context)
 
 
+@admin_required
+def admin_users_data_view(request, tab):
+    """JSON page of customers, employees or admins, optionally narrowed by ?q= (name or phone prefix)"""
+    if tab not in ADMIN_USER_LISTS:
+        return JsonResponse({'success': False, 'error': 'Unknown user type.'}, status=404)
+    search = request.GET.get('q', '').strip()[:100]
+    after = decode_cursor(request.GET.get('after'), parse_datetime, int)
+    try:
+        users, next_cursor = _fetch_admin_users(tab, search, after)
+    except OperationalError:
+        return JsonResponse({'success': False, 'error': 'Unable to load users right now.'})
+    return JsonResponse({
+        'success': True,
+        'users': users,
+        'next_cursor': next_cursor,
+    })
+
+
+def _admin_appointment_filters(params):
+    """Cleaned appointment filters from the query string (invalid values are dropped)"""
+    filters = {}
+    for key in ('from', 'to'):
+        day = _parse_booking_date(params.get(key))
+        if day:
+            filters[key] = day.isoformat()
+    status = params.get('status', '')
+    if status in APPOINTMENT_STATUSES:
+        filters['status'] = status
+    for key in ('employee', 'service'):
+        value = params.get(key, '')
+        if value.isdigit():
+            filters[key] = value
+    mobile = params.get('mobile', '').strip()
+    if mobile:
+        filters['mobile'] = mobile
+    if params.get('order') == 'oldest':
+        filters['order'] = 'oldest'
+    return filters
+
+
+def _fetch_admin_appointments(filters, after=None, page_size=ADMIN_APPOINTMENTS_PAGE_SIZE):
+    """
+    One page of appointments matching the filters and the next page's cursor.
+
+    Filters are applied in SQL and pages follow (Date, Time, Appointment_ID)
+    by keyset, so MySQL reads at most one page from the index matching the
+    filter (date, status, employee or customer) whatever the table size.
+    """
+    where = []
+    params = []
+    if 'from' in filters:
+        where.append('a.Date >= %s')
+        params.append(filters['from'])
+    if 'to' in filters:
+        where.append('a.Date <= %s')
+        params.append(filters['to'])
+    if 'status' in filters:
+        where.append('a.Status = %s')
+        params.append(filters['status'])
+    if 'employee' in filters:
+        where.append('a.Employee_ID = %s')
+        params.append(int(filters['employee']))
+    if 'service' in filters:
+        where.append('s.Service_ID = %s')
+        params.append(int(filters['service']))
+    if 'mobile' in filters:
+        where.append('a.Customer_ID IN (SELECT Customer_ID FROM CUSTOMER WHERE Mobile_No = %s)')
+        params.append(filters['mobile'])
+    descending = filters.get('order') != 'oldest'
+    if after:
+        where.append(keyset_condition(['a.Date', 'a.Time', 'a.Appointment_ID'], descending=descending))
+        params.extend(keyset_params(after))
+    direction = 'DESC' if descending else 'ASC'
+    sql = f"""
+        SELECT a.Appointment_ID, a.Date, a.Time, a.Status, a.Receipt,
+               c.First_Name, c.Last_Name, c.Mobile_No,
+               s.ServiceName, p.Amount
+        FROM APPOINTMENT a
+        LEFT JOIN CUSTOMER c ON a.Customer_ID = c.Customer_ID
+        LEFT JOIN SALES s ON a.Sales_ID = s.Sales_ID
+        LEFT JOIN PAYMENT p ON a.Payment_ID = p.Payment_ID
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY a.Date {direction}, a.Time {direction}, a.Appointment_ID {direction}
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [page_size + 1])
+        rows = cursor.fetchall()
+    rows, next_cursor = split_page(rows, page_size, lambda row: (row[1], row[2], row[0]))
+
+    appointments = []
+    for row in rows:
+        appointments.append({
+            'id': row[0],
+            'date': row[1],
+            'time': _format_time_slot(row[2]) if row[2] else 'N/A',
+            'status': row[3],
+            'receipt': row[4] or 'N/A',
+            'customer_name': f"{row[5]} {row[6]}" if row[5] and row[6] else 'N/A',
+            'mobile': row[7] or 'N/A',
+            'service': row[8] or 'N/A',
+            'amount': _format_price(row[9]) if row[9] else '$0.00',
+        })
+    return appointments, next_cursor
+
+
 @admin_required
 def admin_appointments_view(request):
-    """Admin appointments management page"""
+    """Admin appointments management page (first page; more rows load from admin_appointments_data)"""
+    filters = _admin_appointment_filters(request.GET)
+    after = decode_cursor(request.GET.get('after'), parse_date, parse_time, int)
     try:
+        appointments, next_cursor = _fetch_admin_appointments(filters, after)
         with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT a.Appointment_ID, a.Date, a.Time, a.Status, a.Receipt,
-                       c.First_Name, c.Last_Name, c.Mobile_No,
-                       s.ServiceName, p.Amount
-                FROM APPOINTMENT a
-                LEFT JOIN CUSTOMER c ON a.Customer_ID = c.Customer_ID
-                LEFT JOIN SALES s ON a.Sales_ID = s.Sales_ID
-                LEFT JOIN PAYMENT p ON a.Payment_ID = p.Payment_ID
-                ORDER BY a.Date DESC, a.Time DESC
-            """)
-            rows = cursor.fetchall()
-            
-            appointments = []
-            for row in rows:
-                appointments.append({
-                    'id': row[0],
-                    'date': row[1],
-                    'time': _format_time_slot(row[2]) if row[2] else 'N/A',
-                    'status': row[3],
-                    'receipt': row[4] or 'N/A',
-                    'customer_name': f"{row[5]} {row[6]}" if row[5] and row[6] else 'N/A',
-                    'mobile': row[7] or 'N/A',
-                    'service': row[8] or 'N/A',
-                    'amount': _format_price(row[9]) if row[9] else '$0.00',
-                })
+            cursor.execute("SELECT Employee_ID, First_Name, Last_Name FROM EMPLOYEE ORDER BY First_Name, Last_Name")
+            employees = [{'id': row[0], 'name': f"{row[1]} {row[2]}"} for row in cursor.fetchall()]
     except OperationalError:
-        appointments = []
+        appointments, next_cursor, employees = [], None, []
     
     context = {
         'appointments': appointments,
+        'next_cursor': next_cursor,
+        'filters': filters,
+        'filter_query': urlencode(filters),
+        'employees': employees,
+        'services': sorted(_get_services_data(), key=lambda service: service['name']),
+        'statuses': APPOINTMENT_STATUSES,
     }
     return render(request, 'authentication/admin_appointments.html', context)
 
 
+@admin_required
+def admin_appointments_data_view(request):
+    """JSON page of filtered appointments for the admin table to load incrementally"""
+    filters = _admin_appointment_filters(request.GET)
+    after = decode_cursor(request.GET.get('after'), parse_date, parse_time, int)
+    try:
+        appointments, next_cursor = _fetch_admin_appointments(filters, after)
+    except OperationalError:
+        return JsonResponse({'success': False, 'error': 'Unable to load appointments right now.'})
+    for appointment in appointments:
+        # Same rendering as the server-side rows
+        if isinstance(appointment['date'], date):
+            appointment['date'] = date_format(appointment['date'])
+    return JsonResponse({
+        'success': True,
+        'appointments': appointments,
+        'next_cursor': next_cursor,
+    })
+
+
+def _admin_sales_filters(params):
+    """Cleaned sales filters from the query string (invalid values are dropped)"""
+    filters = {}
+    for key in ('from', 'to'):
+        day = _parse_booking_date(params.get(key))
+        if day:
+            filters[key] = day.isoformat()
+    status = params.get('status', '')
+    if status in PAYMENT_STATUSES:
+        filters['status'] = status
+    service = params.get('service', '')
+    if service.isdigit():
+        filters['service'] = service
+    return filters
+
+
+def _admin_sales_conditions(filters):
+    """WHERE conditions and params shared by the sales ledger page and its totals"""
+    where = []
+    params = []
+    if 'from' in filters:
+        where.append('s.Date >= %s')
+        params.append(filters['from'])
+    if 'to' in filters:
+        where.append('s.Date <= %s')
+        params.append(filters['to'])
+    if 'service' in filters:
+        where.append('s.Service_ID = %s')
+        params.append(int(filters['service']))
+    if 'status' in filters:
+        where.append('p.Status = %s')
+        params.append(filters['status'])
+    return where, params
+
+
+def _fetch_admin_sales(filters, after=None, page_size=ADMIN_SALES_PAGE_SIZE):
+    """
+    One page of the sales ledger (newest first) matching the filters and
+    the next page's cursor. Pages follow (Date, Sales_ID) by keyset, which
+    idx_date / idx_service_date serve, so each page reads page_size rows.
+    """
+    where, params = _admin_sales_conditions(filters)
+    if after:
+        where.append(keyset_condition(['s.Date', 's.Sales_ID']))
+        params.extend(keyset_params(after))
+    sql = f"""
+        SELECT s.Sales_ID, s.Date, s.ServiceName,
+               c.First_Name, c.Last_Name,
+               p.Amount, p.Status,
+               s.Receipt
+        FROM SALES s
+        LEFT JOIN APPOINTMENT a ON s.Sales_ID = a.Sales_ID
+        LEFT JOIN CUSTOMER c ON a.Customer_ID = c.Customer_ID
+        LEFT JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY s.Date DESC, s.Sales_ID DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [page_size + 1])
+        rows = cursor.fetchall()
+    rows, next_cursor = split_page(rows, page_size, lambda row: (row[1], row[0]))
+
+    sales = []
+    for row in rows:
+        sales.append({
+            'id': row[0],
+            'date': row[1],
+            'service': row[2] or 'N/A',
+            'customer_name': f"{row[3]} {row[4]}" if row[3] and row[4] else 'N/A',
+            'amount': _format_price(row[5]) if row[5] else '$0.00',
+            'status': row[6] or 'N/A',
+            'receipt': row[7] or 'N/A',
+        })
+    return sales, next_cursor
+
+
+def _admin_sales_totals(filters):
+    """
+    (sales count, revenue excluding refunds) for the filtered ledger.
+    Date and service filters are answered from the revenue rollups; a
+    status filter needs the ledger, limited by the same indexed conditions.
+    """
+    if 'status' not in filters:
+        return revenue_totals(
+            _parse_booking_date(filters.get('from')),
+            _parse_booking_date(filters.get('to')),
+            filters.get('service'),
+        )
+    where, params = _admin_sales_conditions(filters)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(CASE WHEN p.Status <> 'refunded' THEN p.Amount ELSE 0 END), 0)
+            FROM SALES s
+            JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
+            WHERE {' AND '.join(where)}
+        """, params)
+        row = cursor.fetchone()
+    return row[0], Decimal(str(row[1]))
+
+
 @admin_required
 def admin_sales_view(request):
-    """Admin sales management page"""
+    """Admin sales ledger (first page; more rows load from admin_sales_data) with filtered totals"""
+    filters = _admin_sales_filters(request.GET)
+    after = decode_cursor(request.GET.get('after'), parse_date, int)
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT s.Sales_ID, s.Date, s.ServiceName,
-                       c.First_Name, c.Last_Name,
-                       p.Amount, p.Status,
-                       r.Receipt_Number
-                FROM SALES s
-                LEFT JOIN APPOINTMENT a ON s.Sales_ID = a.Sales_ID
-                LEFT JOIN CUSTOMER c ON a.Customer_ID = c.Customer_ID
-                LEFT JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
-                LEFT JOIN RECEIPTS r ON s.Receipt = r.Receipt_ID
-                ORDER BY s.Date DESC, s.Sales_ID DESC
-            """)
-            rows = cursor.fetchall()
-            
-            sales = []
-            total_revenue = Decimal('0.00')
-            for row in rows:
-                amount = Decimal(str(row[5])) if row[5] else Decimal('0.00')
-                total_revenue += amount
-                sales.append({
-                    'id': row[0],
-                    'date': row[1],
-                    'service': row[2] or 'N/A',
-                    'customer_name': f"{row[3]} {row[4]}" if row[3] and row[4] else 'N/A',
-                    'amount': _format_price(row[5]) if row[5] else '$0.00',
-                    'status': row[6] or 'N/A',
-                    'receipt': row[7] or 'N/A',
-                })
+        sales, next_cursor = _fetch_admin_sales(filters, after)
+        sales_count, total_revenue = _admin_sales_totals(filters)
     except OperationalError:
-        sales = []
-        total_revenue = Decimal('0.00')
+        sales, next_cursor = [], None
+        sales_count, total_revenue = 0, Decimal('0.00')
     
     context = {
         'sales': sales,
+        'next_cursor': next_cursor,
+        'sales_count': sales_count,
         'total_revenue': _format_price(total_revenue),
+        'filters': filters,
+        'filter_query': urlencode(filters),
+        'services': sorted(_get_services_data(), key=lambda service: service['name']),
+        'statuses': PAYMENT_STATUSES,
     }
     return render(request, 'authentication/admin_sales.html', context)
 
 
+@admin_required
+def admin_sales_data_view(request):
+    """JSON page of the filtered sales ledger for the admin table to load incrementally"""
+    filters = _admin_sales_filters(request.GET)
+    after = decode_cursor(request.GET.get('after'), parse_date, int)
+    try:
+        sales, next_cursor = _fetch_admin_sales(filters, after)
+    except OperationalError:
+        return JsonResponse({'success': False, 'error': 'Unable to load sales right now.'})
+    for sale in sales:
+        # Same rendering as the server-side rows
+        if isinstance(sale['date'], date):
+            sale['date'] = date_format(sale['date'])
+    return JsonResponse({
+        'success': True,
+        'sales': sales,
+        'next_cursor': next_cursor,
+    })
+
+
+@admin_required
+@csrf_protect
+def admin_refund_sale_view(request, sales_id):
+    """Mark a sale's payment refunded and take it out of the dashboard total and revenue rollups"""
+    if request.method != 'POST':
+        return redirect('admin_sales')
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT Payment_ID FROM SALES WHERE Sales_ID = %s", [sales_id])
+            row = cursor.fetchone()
+            payment_id = row[0] if row else None
+            if payment_id is None:
+                messages.error(request, 'Sale not found.')
+                return redirect('admin_sales')
+            cursor.execute(
+                "SELECT Amount, Status FROM PAYMENT WHERE Payment_ID = %s FOR UPDATE",
+                [payment_id]
+            )
+            amount, status = cursor.fetchone()
+            if status != 'completed':
+                messages.error(request, f'Only completed payments can be refunded (this one is {status}).')
+                return redirect('admin_sales')
+            cursor.execute("UPDATE PAYMENT SET Status = 'refunded' WHERE Payment_ID = %s", [payment_id])
+            sales, _ = sale_revenue_lines(cursor, 'Sales_ID', sales_id)
+            adjust_dashboard(cursor, sales=-amount)
+            record_revenue(cursor, sales, refunds=True)
+        messages.success(request, f'Sale #{sales_id} refunded ({_format_price(amount)}).')
+    except OperationalError:
+        messages.error(request, 'Unable to refund this sale right now.')
+    return redirect('admin_sales')
+
+
+@admin_required
+def admin_revenue_analytics_view(request):
+    """JSON revenue grouped by ?by=day|month|service|employee|category over ?from=&to= (default: last 30 days)"""
+    group_by = request.GET.get('by', 'day')
+    if group_by not in REVENUE_GROUPS:
+        return JsonResponse({'success': False, 'error': f"by must be one of: {', '.join(REVENUE_GROUPS)}"}, status=400)
+    last_day = _parse_booking_date(request.GET.get('to')) or datetime.now().date()
+    first_day = _parse_booking_date(request.GET.get('from')) or last_day - timedelta(days=29)
+    if first_day > last_day:
+        return JsonResponse({'success': False, 'error': 'from must not be after to.'}, status=400)
+    try:
+        rows = revenue_breakdown(group_by, first_day, last_day)
+    except OperationalError:
+        return JsonResponse({'success': False, 'error': 'Unable to load revenue right now.'})
+    return JsonResponse({
+        'success': True,
+        'by': group_by,
+        'from': first_day.isoformat(),
+        'to': last_day.isoformat(),
+        'rows': rows,
+        'totals': {
+            'sales': sum(row['sales'] for row in rows),
+            'revenue': sum((row['revenue'] for row in rows), Decimal('0.00')),
+            'refunds': sum((row['refunds'] for row in rows), Decimal('0.00')),
+            'net': sum((row['net'] for row in rows), Decimal('0.00')),
+        },
+    })
+
+
+@admin_required
+def admin_export_view(request, dataset):
+    """Stream sales, appointments or customers as CSV (default) or JSONL, optionally limited by ?from=&to="""
+    if dataset not in EXPORTS:
+        return HttpResponse('Unknown export.', status=404)
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'csv'
+    first_day = _parse_booking_date(request.GET.get('from'))
+    last_day = _parse_booking_date(request.GET.get('to'))
+    
+    response = StreamingHttpResponse(
+        stream_export(dataset, export_format, first_day, last_day),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    filename = f"glamora-{dataset}-{datetime.now().strftime('%Y%m%d')}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # ============================================
 # SERVICE MANAGEMENT VIEWS
 # ============================================
@@ -1962,11 +2334,12 @@ def admin_add_service_view(request):
             discount_label = request.POST.get('discount_label', '')
             is_active = request.POST.get('is_active') == 'on'
             
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO SERVICE (ServiceName, Category, Description, Price, Original_Price, Discount_Label, is_active)
                     VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """, [service_name, category, description, price, original_price, discount_label, is_active])
+                bump_catalog_version(cursor)
                 
             messages.success(request, 'Service added successfully!')
             return redirect('admin_services')
@@ -2019,13 +2392,14 @@ def admin_edit_service_view(request):
             discount_label = request.POST.get('discount_label', '')
             is_active = request.POST.get('is_active') == 'on'
             
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 cursor.execute("""
                     UPDATE SERVICE 
                     SET ServiceName = %s, Category = %s, Description = %s, Price = %s, 
                         Original_Price = %s, Discount_Label = %s, is_active = %s
                     WHERE Service_ID = %s
                 """, [service_name, category, description, price, original_price, discount_label, is_active, service_id])
+                bump_catalog_version(cursor)
                 
             messages.success(request, 'Service updated successfully!')
             return redirect('admin_services')
@@ -2042,8 +2416,9 @@ def admin_delete_service_view(request):
     if request.method == 'POST':
         try:
             service_id = request.POST.get('service_id')
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 cursor.execute("DELETE FROM SERVICE WHERE Service_ID = %s", [service_id])
+                bump_catalog_version(cursor)
             messages.success(request, 'Service deleted successfully!')
         except Exception as e:
             messages.error(request, f'Error deleting service: {str(e)}')
@@ -2062,7 +2437,7 @@ def admin_add_user_view(request):
         try:
             user_type = request.POST.get('user_type')
             
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 if user_type == 'customer':
                     first_name = request.POST.get('first_name')
                     last_name = request.POST.get('last_name')
@@ -2070,10 +2445,15 @@ def admin_add_user_view(request):
                     password = request.POST.get('password')
                     address = request.POST.get('address', '')
                     
+                    if is_mobile_registered(mobile):
+                        messages.error(request, 'Mobile number already exists. Please use another number.')
+                        return redirect(f"{reverse('admin_users')}?tab=customers")
+                    
                     cursor.execute("""
                         INSERT INTO CUSTOMER (First_Name, Last_Name, Mobile_No, Password, Address)
                         VALUES (%s, %s, %s, %s, %s)
                     """, [first_name, last_name, mobile, password, address])
+                    adjust_dashboard(cursor, customers=1)
                     
                 elif user_type == 'employee':
                     first_name = request.POST.get('first_name')
@@ -2088,6 +2468,7 @@ def admin_add_user_view(request):
                         INSERT INTO EMPLOYEE (First_Name, Last_Name, Phone, Address, Skills, Rating, Availability)
                         VALUES (%s, %s, %s, %s, %s, %s, %s)
                     """, [first_name, last_name, phone, address, skills, rating, availability])
+                    transaction.on_commit(invalidate_roster)
                     
                 elif user_type == 'admin':
                     first_name = request.POST.get('first_name')
@@ -2096,6 +2477,10 @@ def admin_add_user_view(request):
                     role = request.POST.get('role')
                     password = request.POST.get('password')
                     
+                    if is_mobile_registered(mobile):
+                        messages.error(request, 'Mobile number already exists. Please use another number.')
+                        return redirect(f"{reverse('admin_users')}?tab=admins")
+                    
                     cursor.execute("""
                         INSERT INTO ADMIN (First_Name, Last_Name, Mobile_No, Role, Password)
                         VALUES (%s, %s, %s, %s, %s)
@@ -2176,7 +2561,9 @@ def admin_edit_user_view(request):
             user_type = request.POST.get('user_type')
             user_id = request.POST.get('user_id')
             
-            with connection.cursor() as cursor:
+            # The edit and the credential version bump commit together, so
+            # sessions holding the old snapshot re-read it from CUSTOMER
+            with transaction.atomic(), connection.cursor() as cursor:
                 if user_type == 'customer':
                     first_name = request.POST.get('first_name')
                     last_name = request.POST.get('last_name')
@@ -2184,6 +2571,10 @@ def admin_edit_user_view(request):
                     password = request.POST.get('password')
                     address = request.POST.get('address', '')
                     
+                    if is_mobile_registered(mobile, 'customer', int(user_id)):
+                        messages.error(request, 'Mobile number already exists. Please use another number.')
+                        return redirect(f"{reverse('admin_users')}?tab=customers")
+                    
                     if password:
                         cursor.execute("""
                             UPDATE CUSTOMER 
@@ -2196,6 +2587,7 @@ def admin_edit_user_view(request):
                             SET First_Name = %s, Last_Name = %s, Mobile_No = %s, Address = %s, updated_at = NOW()
                             WHERE Customer_ID = %s
                         """, [first_name, last_name, mobile, address, user_id])
+                    bump_credential_version(cursor, user_id)
                     
                 elif user_type == 'employee':
                     first_name = request.POST.get('first_name')
@@ -2212,6 +2604,7 @@ def admin_edit_user_view(request):
                             Skills = %s, Rating = %s, Availability = %s, updated_at = NOW()
                         WHERE Employee_ID = %s
                     """, [first_name, last_name, phone, address, skills, rating, availability, user_id])
+                    transaction.on_commit(invalidate_roster)
                     
                 elif user_type == 'admin':
                     first_name = request.POST.get('first_name')
@@ -2220,6 +2613,10 @@ def admin_edit_user_view(request):
                     role = request.POST.get('role')
                     password = request.POST.get('password')
                     
+                    if is_mobile_registered(mobile, 'admin', int(user_id)):
+                        messages.error(request, 'Mobile number already exists. Please use another number.')
+                        return redirect(f"{reverse('admin_users')}?tab=admins")
+                    
                     if password:
                         cursor.execute("""
                             UPDATE ADMIN 
@@ -2251,11 +2648,35 @@ def admin_delete_user_view(request):
             user_type = request.POST.get('user_type')
             user_id = request.POST.get('user_id')
             
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 if user_type == 'customer':
+                    bump_credential_version(cursor, user_id)
+                    # Lock the customer so no booking lands between the count and the delete
+                    cursor.execute("SELECT Customer_ID FROM CUSTOMER WHERE Customer_ID = %s FOR UPDATE", [user_id])
+                    appointment_days = appointment_days_for(cursor, 'Customer_ID', user_id)
                     cursor.execute("DELETE FROM CUSTOMER WHERE Customer_ID = %s", [user_id])
+                    if cursor.rowcount:
+                        # Their appointments go with them (ON DELETE CASCADE)
+                        adjust_dashboard(
+                            cursor, customers=-1,
+                            appointment_days={day: -count for day, count in appointment_days.items()}
+                        )
                 elif user_type == 'employee':
+                    cursor.execute("SELECT Employee_ID FROM EMPLOYEE WHERE Employee_ID = %s FOR UPDATE", [user_id])
+                    appointment_days = appointment_days_for(cursor, 'Employee_ID', user_id)
+                    sales, refunds = sale_revenue_lines(cursor, 'Employee_ID', user_id)
                     cursor.execute("DELETE FROM EMPLOYEE WHERE Employee_ID = %s", [user_id])
+                    if cursor.rowcount:
+                        # Their appointments and sales go with them (ON DELETE CASCADE)
+                        adjust_dashboard(
+                            cursor,
+                            sales=sum(line[4] for line in refunds) - sum(line[4] for line in sales),
+                            appointment_days={day: -count for day, count in appointment_days.items()}
+                        )
+                        record_revenue(cursor, sales, sign=-1)
+                        record_revenue(cursor, refunds, refunds=True, sign=-1)
+                    transaction.on_commit(invalidate_roster)
+                    transaction.on_commit(invalidate_availability)
                 elif user_type == 'admin':
                     cursor.execute("DELETE FROM ADMIN WHERE Admin_ID = %s", [user_id])
             
@@ -2282,6 +2703,7 @@ def delete_address_view(request):
                     
                     # Update customer object in session
                     request.customer.Address = None
+                    update_customer_snapshot(request, request.customer)
             
             return JsonResponse({'success': True, 'message': 'Address deleted successfully'})
         except OperationalError as exc:
@@ -38,6 +38,15 @@ DROP TABLE IF EXISTS authentication_booking;
 DROP TABLE IF EXISTS authentication_customer;
 
 -- Current MySQL-first tables
+DROP TABLE IF EXISTS CATALOG_VERSION;
+DROP TABLE IF EXISTS REVENUE_MONTHLY;
+DROP TABLE IF EXISTS REVENUE_DAILY;
+DROP TABLE IF EXISTS DAILY_APPOINTMENT_COUNT;
+DROP TABLE IF EXISTS DASHBOARD_SUMMARY;
+DROP TABLE IF EXISTS BOOKING_REQUEST;
+DROP TABLE IF EXISTS RECEIPT_SEQUENCE;
+DROP TABLE IF EXISTS SLOT_CLAIM;
+DROP TABLE IF EXISTS USER_IDENTITY;
 DROP TABLE IF EXISTS RECEIPTS;
 DROP TABLE IF EXISTS APPOINTMENT;
 DROP TABLE IF EXISTS SALES;
@@ -59,9 +68,13 @@ CREATE TABLE IF NOT EXISTS CUSTOMER (
     Mobile_No VARCHAR(50) NOT NULL,
     Password VARCHAR(255) NOT NULL,
     Address TEXT COMMENT 'Plain text address (not JSON)',
+    Credential_Version INT NOT NULL DEFAULT 0 COMMENT 'Bumped on password/profile change to invalidate session snapshots',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_mobile_no (Mobile_No)
+    INDEX idx_mobile_no (Mobile_No),
+    INDEX idx_created_at (created_at, Customer_ID),
+    INDEX idx_first_name (First_Name),
+    INDEX idx_last_name (Last_Name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =====================================================
@@ -76,9 +89,15 @@ CREATE TABLE IF NOT EXISTS EMPLOYEE (
     Skills TEXT,
     Rating DECIMAL(3,2) DEFAULT 0.00 CHECK (Rating >= 0 AND Rating <= 5),
     Availability ENUM('available', 'busy', 'unavailable') DEFAULT 'available',
+    Work_Start TIME NOT NULL DEFAULT '11:00:00',
+    Work_End TIME NOT NULL DEFAULT '16:30:00',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_availability (Availability)
+    INDEX idx_availability (Availability),
+    INDEX idx_phone (Phone),
+    INDEX idx_created_at (created_at, Employee_ID),
+    INDEX idx_first_name (First_Name),
+    INDEX idx_last_name (Last_Name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =====================================================
@@ -93,7 +112,10 @@ CREATE TABLE IF NOT EXISTS ADMIN (
     Password VARCHAR(255) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_mobile_no (Mobile_No)
+    INDEX idx_mobile_no (Mobile_No),
+    INDEX idx_created_at (created_at, Admin_ID),
+    INDEX idx_first_name (First_Name),
+    INDEX idx_last_name (Last_Name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =====================================================
@@ -107,6 +129,7 @@ CREATE TABLE IF NOT EXISTS SERVICE (
     Price DECIMAL(10,2) NOT NULL CHECK (Price >= 0),
     Original_Price DECIMAL(10,2) DEFAULT NULL,
     Discount_Label VARCHAR(50) DEFAULT NULL,
+    Duration_Minutes INT NOT NULL DEFAULT 30 CHECK (Duration_Minutes > 0),
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -150,7 +173,8 @@ CREATE TABLE IF NOT EXISTS SALES (
     INDEX idx_employee_id (Employee_ID),
     INDEX idx_admin_id (Admin_ID),
     INDEX idx_service_id (Service_ID),
-    INDEX idx_date (Date)
+    INDEX idx_date (Date),
+    INDEX idx_service_date (Service_ID, Date, Sales_ID)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =====================================================
@@ -176,6 +200,12 @@ CREATE TABLE IF NOT EXISTS APPOINTMENT (
     INDEX idx_sales_id (Sales_ID),
     INDEX idx_date (Date),
     INDEX idx_status (Status),
+    INDEX idx_customer_status_date (Customer_ID, Status, Date, Time),
+    INDEX idx_receipt (Receipt),
+    INDEX idx_customer_date_time (Customer_ID, Date, Time, Appointment_ID),
+    INDEX idx_date_time (Date, Time, Appointment_ID),
+    INDEX idx_status_date_time (Status, Date, Time, Appointment_ID),
+    INDEX idx_employee_date_time (Employee_ID, Date, Time, Appointment_ID),
     -- Foreign Key Constraints
     CONSTRAINT fk_appointment_customer FOREIGN KEY (Customer_ID) REFERENCES CUSTOMER(Customer_ID) ON DELETE CASCADE ON UPDATE CASCADE,
     CONSTRAINT fk_appointment_employee FOREIGN KEY (Employee_ID) REFERENCES EMPLOYEE(Employee_ID) ON DELETE CASCADE ON UPDATE CASCADE,
@@ -223,6 +253,7 @@ CREATE TABLE IF NOT EXISTS RECEIPTS (
     INDEX idx_sales_id (Sales_ID),
     INDEX idx_customer_id (Customer_ID),
     INDEX idx_receipt_date (Receipt_Date),
+    INDEX idx_customer_receipt_date (Customer_ID, Receipt_Date, Receipt_ID),
     -- Foreign Key Constraints
     CONSTRAINT fk_receipts_appointment FOREIGN KEY (Appointment_ID) REFERENCES APPOINTMENT(Appointment_ID) ON DELETE SET NULL ON UPDATE CASCADE,
     CONSTRAINT fk_receipts_payment FOREIGN KEY (Payment_ID) REFERENCES PAYMENT(Payment_ID) ON DELETE SET NULL ON UPDATE CASCADE,
@@ -230,6 +261,192 @@ CREATE TABLE IF NOT EXISTS RECEIPTS (
     CONSTRAINT fk_receipts_customer FOREIGN KEY (Customer_ID) REFERENCES CUSTOMER(Customer_ID) ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- =====================================================
+-- 9.1. CREATE USER_IDENTITY TABLE
+-- =====================================================
+-- One row per mobile number across CUSTOMER and ADMIN, so login, signup,
+-- forgot-password and profile checks resolve a number with one indexed lookup.
+-- The primary key also keeps a mobile number from belonging to two users.
+-- Kept in sync by the triggers below - never write to it directly.
+CREATE TABLE IF NOT EXISTS USER_IDENTITY (
+    Mobile_No VARCHAR(50) NOT NULL PRIMARY KEY,
+    User_Type ENUM('customer', 'admin') NOT NULL,
+    User_ID INT NOT NULL,
+    UNIQUE KEY uq_user (User_Type, User_ID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TRIGGER IF NOT EXISTS trg_customer_identity_insert AFTER INSERT ON CUSTOMER
+FOR EACH ROW
+    INSERT INTO USER_IDENTITY (Mobile_No, User_Type, User_ID) VALUES (NEW.Mobile_No, 'customer', NEW.Customer_ID);
+
+CREATE TRIGGER IF NOT EXISTS trg_customer_identity_update AFTER UPDATE ON CUSTOMER
+FOR EACH ROW
+    UPDATE USER_IDENTITY SET Mobile_No = NEW.Mobile_No
+    WHERE User_Type = 'customer' AND User_ID = NEW.Customer_ID AND Mobile_No <> NEW.Mobile_No;
+
+CREATE TRIGGER IF NOT EXISTS trg_customer_identity_delete AFTER DELETE ON CUSTOMER
+FOR EACH ROW
+    DELETE FROM USER_IDENTITY WHERE User_Type = 'customer' AND User_ID = OLD.Customer_ID;
+
+CREATE TRIGGER IF NOT EXISTS trg_admin_identity_insert AFTER INSERT ON ADMIN
+FOR EACH ROW
+    INSERT INTO USER_IDENTITY (Mobile_No, User_Type, User_ID) VALUES (NEW.Mobile_No, 'admin', NEW.Admin_ID);
+
+CREATE TRIGGER IF NOT EXISTS trg_admin_identity_update AFTER UPDATE ON ADMIN
+FOR EACH ROW
+    UPDATE USER_IDENTITY SET Mobile_No = NEW.Mobile_No
+    WHERE User_Type = 'admin' AND User_ID = NEW.Admin_ID AND Mobile_No <> NEW.Mobile_No;
+
+CREATE TRIGGER IF NOT EXISTS trg_admin_identity_delete AFTER DELETE ON ADMIN
+FOR EACH ROW
+    DELETE FROM USER_IDENTITY WHERE User_Type = 'admin' AND User_ID = OLD.Admin_ID;
+
+-- =====================================================
+-- 9.2. CREATE SLOT_CLAIM TABLE
+-- =====================================================
+-- One row per employee per booked 30-minute slot. The primary key makes a
+-- double booking of the same employee and time fail with a duplicate key, so
+-- concurrent checkouts are arbitrated per slot without locking APPOINTMENT.
+-- A service longer than one slot claims each slot it covers. Rows are removed
+-- with their appointment (ON DELETE CASCADE).
+-- A row with no Appointment_ID and an Expires_At is a hold: the slot a customer
+-- picked, kept for them while they pay. Expired holds are taken over by the
+-- next claim and removed by `python manage.py sweep_slot_holds`.
+CREATE TABLE IF NOT EXISTS SLOT_CLAIM (
+    Employee_ID INT NOT NULL,
+    Date DATE NOT NULL,
+    Time TIME NOT NULL,
+    Customer_ID INT NOT NULL,
+    Appointment_ID INT DEFAULT NULL,
+    Expires_At DATETIME DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (Employee_ID, Date, Time),
+    INDEX idx_appointment_expiry (Appointment_ID, Expires_At),
+    INDEX idx_customer_id (Customer_ID),
+    CONSTRAINT fk_slot_claim_employee FOREIGN KEY (Employee_ID) REFERENCES EMPLOYEE(Employee_ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_slot_claim_customer FOREIGN KEY (Customer_ID) REFERENCES CUSTOMER(Customer_ID) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_slot_claim_appointment FOREIGN KEY (Appointment_ID) REFERENCES APPOINTMENT(Appointment_ID) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =====================================================
+-- 9.3. CREATE RECEIPT_SEQUENCE TABLE
+-- =====================================================
+-- Counter behind receipt numbers (RCP001, RCP002, ...). Each app worker
+-- reserves a block of numbers with one UPDATE ... LAST_INSERT_ID() and hands
+-- them out from memory, so bookings never scan or lock RECEIPTS for a number.
+-- The app seeds the row from the highest existing receipt number on first use,
+-- so sample or imported receipts loaded before that are never renumbered.
+CREATE TABLE IF NOT EXISTS RECEIPT_SEQUENCE (
+    Name VARCHAR(50) NOT NULL PRIMARY KEY,
+    Last_Value BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =====================================================
+-- 9.4. LINK PAYMENT TO ITS APPOINTMENT ON INSERT
+-- =====================================================
+-- PAYMENT is written before its APPOINTMENT, so the booking used to come back
+-- and UPDATE PAYMENT.Appointment_ID. The trigger fills it in as part of the
+-- APPOINTMENT insert instead (same transaction, no extra round trip).
+CREATE TRIGGER IF NOT EXISTS trg_appointment_payment_link AFTER INSERT ON APPOINTMENT
+FOR EACH ROW
+    UPDATE PAYMENT SET Appointment_ID = NEW.Appointment_ID
+    WHERE Payment_ID = NEW.Payment_ID AND Appointment_ID IS NULL;
+
+-- =====================================================
+-- 9.5. CREATE BOOKING_REQUEST TABLE
+-- =====================================================
+-- One row per submitted checkout form, keyed by the token rendered into the
+-- address page. It is written in the booking transaction, so a resubmitted
+-- form (double click, retry after a timeout) finds the original receipt with
+-- one primary key lookup instead of booking again. Rows older than a week are
+-- removed by `python manage.py sweep_slot_holds`.
+CREATE TABLE IF NOT EXISTS BOOKING_REQUEST (
+    Token CHAR(32) NOT NULL PRIMARY KEY,
+    Customer_ID INT NOT NULL,
+    Receipt_Number VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_created_at (created_at),
+    CONSTRAINT fk_booking_request_customer FOREIGN KEY (Customer_ID) REFERENCES CUSTOMER(Customer_ID) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =====================================================
+-- 9.6. CREATE DASHBOARD_SUMMARY TABLE
+-- =====================================================
+-- Admin dashboard totals: row 1 holds the last recount and rows 2-17 are
+-- delta slots, summed on read. Signups, bookings, reschedules and deletions
+-- add their deltas to a random slot in their own transaction, so concurrent
+-- checkouts do not queue on one row (the app does this rather than
+-- triggers, because rows removed by ON DELETE CASCADE fire no triggers).
+-- The app seeds the rows on the first dashboard load;
+-- `python manage.py reconcile_dashboard` recounts them at any time.
+CREATE TABLE IF NOT EXISTS DASHBOARD_SUMMARY (
+    Summary_ID TINYINT UNSIGNED NOT NULL PRIMARY KEY,
+    Total_Customers INT NOT NULL DEFAULT 0,
+    Total_Appointments INT NOT NULL DEFAULT 0,
+    Total_Sales DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =====================================================
+-- 9.7. CREATE DAILY_APPOINTMENT_COUNT TABLE
+-- =====================================================
+-- Appointments per date, maintained alongside DASHBOARD_SUMMARY, so
+-- "today's appointments" is a primary key lookup
+CREATE TABLE IF NOT EXISTS DAILY_APPOINTMENT_COUNT (
+    Date DATE NOT NULL PRIMARY KEY,
+    Appointment_Count INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =====================================================
+-- 9.8. CREATE REVENUE_DAILY TABLE
+-- =====================================================
+-- Paid sales and refunds per sale date, service, employee and category
+-- (0 / '' when unknown). Booking commits, refunds, reschedules and employee
+-- deletions add their deltas in their own transaction; revenue analytics
+-- read these rows instead of the SALES/PAYMENT ledger. Rebuild with
+-- `python manage.py backfill_revenue_rollups`.
+CREATE TABLE IF NOT EXISTS REVENUE_DAILY (
+    Date DATE NOT NULL,
+    Service_ID INT NOT NULL DEFAULT 0,
+    Employee_ID INT NOT NULL DEFAULT 0,
+    Category VARCHAR(50) NOT NULL DEFAULT '',
+    Sales_Count INT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    Refund_Count INT NOT NULL DEFAULT 0,
+    Refunds DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Date, Service_ID, Employee_ID, Category)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =====================================================
+-- 9.9. CREATE REVENUE_MONTHLY TABLE
+-- =====================================================
+-- Same rollup per calendar month (Month is the first day), so ranges
+-- covering whole months read one row per month and group
+CREATE TABLE IF NOT EXISTS REVENUE_MONTHLY (
+    Month DATE NOT NULL,
+    Service_ID INT NOT NULL DEFAULT 0,
+    Employee_ID INT NOT NULL DEFAULT 0,
+    Category VARCHAR(50) NOT NULL DEFAULT '',
+    Sales_Count INT NOT NULL DEFAULT 0,
+    Revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    Refund_Count INT NOT NULL DEFAULT 0,
+    Refunds DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (Month, Service_ID, Employee_ID, Category)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =====================================================
+-- 9.10. CREATE CATALOG_VERSION TABLE
+-- =====================================================
+-- Version of the service catalog (microseconds since the epoch of the last
+-- SERVICE change), moved on in the same transaction as every add, edit or
+-- delete. Every worker reads the same value, so the in-process catalog
+-- caches and the search suggestion ETag / Last-Modified agree across workers.
+-- Seeded by section 12.17; until then the app reads the catalog uncached.
+CREATE TABLE IF NOT EXISTS CATALOG_VERSION (
+    Catalog_ID TINYINT UNSIGNED NOT NULL PRIMARY KEY,
+    Version BIGINT UNSIGNED NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- =====================================================
 -- 10. ADD FOREIGN KEY CONSTRAINTS FOR PAYMENT TABLE
 -- =====================================================
@@ -278,6 +495,157 @@ ALTER TABLE SAVED_CARDS MODIFY COLUMN Card_Type ENUM('Credit Card', 'Debit Card'
 ALTER TABLE ADMIN ADD COLUMN IF NOT EXISTS Mobile_No VARCHAR(50) NOT NULL DEFAULT '' AFTER Last_Name;
 ALTER TABLE ADMIN ADD INDEX IF NOT EXISTS idx_mobile_no (Mobile_No);
 
+-- =====================================================
+-- 12.4. UPDATE CUSTOMER TABLE - Add Credential_Version column for session snapshots
+-- =====================================================
+-- Run this to add the Credential_Version column used by IDENTITY_SNAPSHOT_ENABLED
+ALTER TABLE CUSTOMER ADD COLUMN IF NOT EXISTS Credential_Version INT NOT NULL DEFAULT 0 AFTER Address;
+
+-- =====================================================
+-- 12.5. BACKFILL USER_IDENTITY FROM EXISTING USERS
+-- =====================================================
+-- Run this once after creating USER_IDENTITY (section 9.1) on an existing database.
+-- Login resolves mobile numbers through USER_IDENTITY, so every account needs its
+-- own number. First list the numbers shared by more than one account and give
+-- those accounts distinct numbers; this must return no rows:
+SELECT Mobile_No, GROUP_CONCAT(CONCAT(User_Type, ' #', User_ID) ORDER BY User_Type, User_ID) AS Accounts
+FROM (
+    SELECT Mobile_No, 'customer' AS User_Type, Customer_ID AS User_ID FROM CUSTOMER
+    UNION ALL
+    SELECT Mobile_No, 'admin', Admin_ID FROM ADMIN
+) AS accounts
+GROUP BY Mobile_No
+HAVING COUNT(*) > 1;
+-- The inserts fail on a number that is still shared instead of dropping an
+-- account; rows already present (e.g. added by the triggers) are skipped
+INSERT INTO USER_IDENTITY (Mobile_No, User_Type, User_ID)
+SELECT c.Mobile_No, 'customer', c.Customer_ID FROM CUSTOMER c
+WHERE NOT EXISTS (
+    SELECT 1 FROM USER_IDENTITY i WHERE i.User_Type = 'customer' AND i.User_ID = c.Customer_ID
+);
+INSERT INTO USER_IDENTITY (Mobile_No, User_Type, User_ID)
+SELECT a.Mobile_No, 'admin', a.Admin_ID FROM ADMIN a
+WHERE NOT EXISTS (
+    SELECT 1 FROM USER_IDENTITY i WHERE i.User_Type = 'admin' AND i.User_ID = a.Admin_ID
+);
+
+-- =====================================================
+-- 12.6. ADD WORKING HOURS AND SERVICE DURATIONS FOR SLOT AVAILABILITY
+-- =====================================================
+-- Booking availability checks each employee's hours against the service duration
+ALTER TABLE EMPLOYEE ADD COLUMN IF NOT EXISTS Work_Start TIME NOT NULL DEFAULT '11:00:00' AFTER Availability;
+ALTER TABLE EMPLOYEE ADD COLUMN IF NOT EXISTS Work_End TIME NOT NULL DEFAULT '16:30:00' AFTER Work_Start;
+ALTER TABLE SERVICE ADD COLUMN IF NOT EXISTS Duration_Minutes INT NOT NULL DEFAULT 30 AFTER Discount_Label;
+
+-- =====================================================
+-- 12.7. ADD CUSTOMER BOOKED-SLOT INDEX ON APPOINTMENT
+-- =====================================================
+-- Covers the booking page's lookup of a customer's slots inside the booking window
+ALTER TABLE APPOINTMENT ADD INDEX IF NOT EXISTS idx_customer_status_date (Customer_ID, Status, Date, Time);
+
+-- =====================================================
+-- 12.8. BACKFILL SLOT_CLAIM FROM UPCOMING APPOINTMENTS
+-- =====================================================
+-- Run this once after creating SLOT_CLAIM (section 9.2) on an existing database.
+-- Existing bookings claim their start slot; rows that already overlap on the
+-- same employee and time (from before claims existed) keep the first one.
+INSERT IGNORE INTO SLOT_CLAIM (Employee_ID, Date, Time, Customer_ID, Appointment_ID)
+SELECT Employee_ID, Date, Time, Customer_ID, Appointment_ID
+FROM APPOINTMENT
+WHERE Date >= CURDATE() AND Status IN ('scheduled', 'confirmed', 'in_progress')
+ORDER BY Appointment_ID;
+
+-- =====================================================
+-- 12.9. ADD SLOT HOLDS TO SLOT_CLAIM
+-- =====================================================
+-- Run this if SLOT_CLAIM was created before holds existed
+ALTER TABLE SLOT_CLAIM ADD COLUMN IF NOT EXISTS Expires_At DATETIME DEFAULT NULL AFTER Appointment_ID;
+ALTER TABLE SLOT_CLAIM ADD INDEX IF NOT EXISTS idx_appointment_expiry (Appointment_ID, Expires_At);
+ALTER TABLE SLOT_CLAIM ADD INDEX IF NOT EXISTS idx_customer_id (Customer_ID);
+
+-- =====================================================
+-- 12.10. ADD RECEIPT INDEX ON APPOINTMENT
+-- =====================================================
+-- A cart checkout puts several appointments on one receipt; the confirmation
+-- page and PDF list them by receipt number
+ALTER TABLE APPOINTMENT ADD INDEX IF NOT EXISTS idx_receipt (Receipt);
+
+-- =====================================================
+-- 12.11. ADD KEYSET PAGINATION INDEXES FOR CUSTOMER LISTINGS
+-- =====================================================
+-- My Bookings pages through (Date, Time, Appointment_ID) and My Receipts
+-- through (Receipt_Date, Receipt_ID), newest first, per customer
+ALTER TABLE APPOINTMENT ADD INDEX IF NOT EXISTS idx_customer_date_time (Customer_ID, Date, Time, Appointment_ID);
+ALTER TABLE RECEIPTS ADD INDEX IF NOT EXISTS idx_customer_receipt_date (Customer_ID, Receipt_Date, Receipt_ID);
+
+-- =====================================================
+-- 12.12. ADD KEYSET PAGINATION INDEXES FOR ADMIN APPOINTMENTS
+-- =====================================================
+-- The admin appointments list pages through (Date, Time, Appointment_ID),
+-- optionally filtered by status or employee (customer filters use
+-- idx_customer_date_time from 12.11)
+ALTER TABLE APPOINTMENT ADD INDEX IF NOT EXISTS idx_date_time (Date, Time, Appointment_ID);
+ALTER TABLE APPOINTMENT ADD INDEX IF NOT EXISTS idx_status_date_time (Status, Date, Time, Appointment_ID);
+ALTER TABLE APPOINTMENT ADD INDEX IF NOT EXISTS idx_employee_date_time (Employee_ID, Date, Time, Appointment_ID);
+
+-- =====================================================
+-- 12.13. ADD LISTING AND SEARCH INDEXES FOR ADMIN USERS
+-- =====================================================
+-- Each Users tab pages through (created_at, id) newest first and searches
+-- by name or phone prefix
+ALTER TABLE CUSTOMER ADD INDEX IF NOT EXISTS idx_created_at (created_at, Customer_ID);
+ALTER TABLE CUSTOMER ADD INDEX IF NOT EXISTS idx_first_name (First_Name);
+ALTER TABLE CUSTOMER ADD INDEX IF NOT EXISTS idx_last_name (Last_Name);
+ALTER TABLE EMPLOYEE ADD INDEX IF NOT EXISTS idx_phone (Phone);
+ALTER TABLE EMPLOYEE ADD INDEX IF NOT EXISTS idx_created_at (created_at, Employee_ID);
+ALTER TABLE EMPLOYEE ADD INDEX IF NOT EXISTS idx_first_name (First_Name);
+ALTER TABLE EMPLOYEE ADD INDEX IF NOT EXISTS idx_last_name (Last_Name);
+ALTER TABLE ADMIN ADD INDEX IF NOT EXISTS idx_created_at (created_at, Admin_ID);
+ALTER TABLE ADMIN ADD INDEX IF NOT EXISTS idx_first_name (First_Name);
+ALTER TABLE ADMIN ADD INDEX IF NOT EXISTS idx_last_name (Last_Name);
+
+-- =====================================================
+-- 12.14. SEED DASHBOARD COUNTERS
+-- =====================================================
+-- Run after creating DASHBOARD_SUMMARY and DAILY_APPOINTMENT_COUNT (sections
+-- 9.6, 9.7) on an existing database, or run `python manage.py reconcile_dashboard`
+DELETE FROM DASHBOARD_SUMMARY WHERE Summary_ID <> 1;
+INSERT INTO DASHBOARD_SUMMARY (Summary_ID, Total_Customers, Total_Appointments, Total_Sales)
+SELECT 1,
+       (SELECT COUNT(*) FROM CUSTOMER),
+       (SELECT COUNT(*) FROM APPOINTMENT),
+       (SELECT COALESCE(SUM(p.Amount), 0) FROM SALES s JOIN PAYMENT p ON s.Payment_ID = p.Payment_ID
+        WHERE p.Status <> 'refunded')
+ON DUPLICATE KEY UPDATE
+    Total_Customers = VALUES(Total_Customers),
+    Total_Appointments = VALUES(Total_Appointments),
+    Total_Sales = VALUES(Total_Sales);
+INSERT INTO DAILY_APPOINTMENT_COUNT (Date, Appointment_Count)
+SELECT Date, COUNT(*) FROM APPOINTMENT GROUP BY Date
+ON DUPLICATE KEY UPDATE Appointment_Count = VALUES(Appointment_Count);
+
+-- =====================================================
+-- 12.15. BACKFILL REVENUE ROLLUPS
+-- =====================================================
+-- Run after creating REVENUE_DAILY and REVENUE_MONTHLY (sections 9.8, 9.9)
+-- on an existing database: `python manage.py backfill_revenue_rollups`
+
+-- =====================================================
+-- 12.16. ADD KEYSET PAGINATION INDEX FOR ADMIN SALES
+-- =====================================================
+-- The admin sales ledger pages through (Date, Sales_ID), optionally
+-- filtered by service (InnoDB appends the primary key to idx_date, so it
+-- already serves the unfiltered order)
+ALTER TABLE SALES ADD INDEX IF NOT EXISTS idx_service_date (Service_ID, Date, Sales_ID);
+
+-- =====================================================
+-- 12.17. ADD SHARED CATALOG VERSION
+-- =====================================================
+-- Seeds the CATALOG_VERSION row (section 9.10) on new and existing databases;
+-- the app never creates it while serving requests
+INSERT IGNORE INTO CATALOG_VERSION (Catalog_ID, Version)
+VALUES (1, CAST(UNIX_TIMESTAMP(NOW(6)) * 1000000 AS UNSIGNED));
+
 -- =====================================================
 -- 13. VIEW ALL CREATED TABLES
 -- =====================================================
@@ -295,6 +663,15 @@ DESCRIBE SALES;
 DESCRIBE APPOINTMENT;
 DESCRIBE RECEIPTS;
 DESCRIBE SAVED_CARDS;
+DESCRIBE USER_IDENTITY;
+DESCRIBE SLOT_CLAIM;
+DESCRIBE RECEIPT_SEQUENCE;
+DESCRIBE BOOKING_REQUEST;
+DESCRIBE DASHBOARD_SUMMARY;
+DESCRIBE DAILY_APPOINTMENT_COUNT;
+DESCRIBE REVENUE_DAILY;
+DESCRIBE REVENUE_MONTHLY;
+DESCRIBE CATALOG_VERSION;
 
 -- =====================================================
 -- 15. VERIFY DATABASE CONNECTION
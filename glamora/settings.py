@@ -40,6 +40,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'authentication.middleware.IdentityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,6 +85,20 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Holds each worker's recently read catalog version (the shared value lives
+# in CATALOG_VERSION) and customer credential versions. For the latter,
+# point this at a shared backend (Redis/Memcached) when running several
+# workers so password and profile edits reach all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'glamora',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -129,6 +144,13 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rendered receipt PDFs (RECEIPTS.Receipt_File is relative to this). Kept
+# outside MEDIA_ROOT because receipts must only be served to their owner.
+RECEIPT_FILES_ROOT = config('RECEIPT_FILES_ROOT', default=str(BASE_DIR / 'private'))
+# Worker processes that pre-render new receipts after booking (0 renders
+# them on first view instead)
+RECEIPT_RENDER_WORKERS = config('RECEIPT_RENDER_WORKERS', default=2, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -141,3 +163,29 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
 SESSION_COOKIE_NAME = 'glamora_session'
 
+# Identity snapshot mode: keep the logged-in customer's profile in the signed
+# session and only re-read CUSTOMER when their Credential_Version changes
+# (password/profile edits) or after IDENTITY_RECHECK_SECONDS. Requires the
+# CUSTOMER.Credential_Version column from database_queries.sql.
+IDENTITY_SNAPSHOT_ENABLED = config('IDENTITY_SNAPSHOT_ENABLED', default=False, cast=bool)
+IDENTITY_RECHECK_SECONDS = config('IDENTITY_RECHECK_SECONDS', default=300, cast=int)
+
+# Logging
+# https://docs.djangoproject.com/en/4.2/topics/logging/
+
+# Sends the app's INFO messages (e.g. booking commit p50/p99 latency) to the console
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'authentication': {
+            'handlers': ['console'],
+            'level': config('APP_LOG_LEVEL', default='INFO'),
+        },
+    },
+}